@@ -0,0 +1 @@
+"""Бенчмарки парсеров и загрузки в БД (запуск: python -m benchmarks.<имя>)"""
@@ -0,0 +1,59 @@
+"""
+Ответ /api/data/smartlab/history: все точки против прореживания LTTB
+до max_points (время выбора точек, сериализации JSON и размер ответа)
+
+    python -m benchmarks.history_downsampling [--repeat N] [--points N] [--max-points N ...]
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.html_backends import _measure
+from src.api.downsample import downsample
+
+
+def _history(points: int):
+    """Случайное блуждание цены: строки (parsed_at, last_price_rub) как из БД"""
+    rng = np.random.default_rng(0)
+    prices = 250 + np.cumsum(rng.normal(scale=0.5, size=points))
+    start = datetime(2025, 1, 1)
+    return [
+        (start + timedelta(minutes=10 * i), Decimal(f"{price:.2f}"))
+        for i, price in enumerate(prices)
+    ]
+
+
+def _response(rows, max_points):
+    """Тело ответа эндпоинта, как его кодирует FastAPI"""
+    rows = downsample(rows, max_points, time=lambda row: row[0], value=lambda row: row[1])
+    items = [{"parsed_at": row[0], "last_price_rub": float(row[1])} for row in rows]
+    return json.dumps(jsonable_encoder(items)).encode()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--points", type=int, default=50000)
+    arg_parser.add_argument("--max-points", type=int, nargs="+", default=[1500, 500])
+    args = arg_parser.parse_args()
+
+    rows = _history(args.points)
+
+    print(f"{'max_points':>11}{'points':>8}{'downsample':>13}{'response':>11}{'size':>10}")
+    for max_points in [None, *args.max_points]:
+        body = _response(rows, max_points)
+        points = len(json.loads(body))
+        sampled = _measure(
+            lambda: downsample(rows, max_points, time=lambda row: row[0], value=lambda row: row[1]),
+            args.repeat,
+        )
+        total = _measure(lambda: _response(rows, max_points), args.repeat)
+        print(f"{str(max_points or '-'):>11}{points:>8}{sampled:>11.1f}ms{total:>9.1f}ms{len(body) / 1024:>8.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
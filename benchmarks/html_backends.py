@@ -0,0 +1,66 @@
+"""
+Время разбора одной страницы каждым HTML бэкендом
+
+    python -m benchmarks.html_backends [--repeat N]
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict
+
+from benchmarks import pages
+from src.parsers.sources import SmartlabParser, DohodParser, RBCParser
+from src.parsers.sources.html_backend import BACKENDS, get_backend
+
+
+def _measure(func: Callable[[], object], repeat: int) -> float:
+    """Медианное время вызова, мс"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _cases(backend: str) -> Dict[str, Callable[[], object]]:
+    """Полный разбор каждой страницы парсером источника"""
+    smartlab_html = pages.smartlab_page()
+    dohod_html = pages.dohod_page()
+    article_html = pages.rbc_article_page()
+    homepage_html = pages.rbc_homepage()
+
+    smartlab = SmartlabParser("https://smart-lab.ru/q/shares/")
+    dohod = DohodParser()
+    rbc = RBCParser()
+    for parser in (smartlab, dohod, rbc):
+        parser.html_backend = get_backend(backend)
+    smartlab.fetch_html = lambda: smartlab_html
+    dohod.fetch_html = lambda: dohod_html
+
+    return {
+        "smartlab table": smartlab.parse,
+        "dohod table": dohod.parse,
+        "rbc article": lambda: rbc._extract_article(article_html, "https://www.rbc.ru/test"),
+        "rbc homepage": lambda: rbc._find_news_urls(homepage_html),
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    results = {backend: {} for backend in BACKENDS}
+    for backend in BACKENDS:
+        for name, func in _cases(backend).items():
+            results[backend][name] = _measure(func, args.repeat)
+
+    names = list(results["bs4"])
+    print(f"{'page':<16}" + "".join(f"{backend:>14}" for backend in BACKENDS))
+    for name in names:
+        print(f"{name:<16}" + "".join(f"{results[b][name]:>12.1f}ms" for b in BACKENDS))
+
+
+if __name__ == "__main__":
+    main()
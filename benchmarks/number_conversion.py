@@ -0,0 +1,59 @@
+"""
+Разбор чисел таблицы Smartlab: float по ячейке с повторным Decimal(str(...))
+при сохранении против разбора колонок сразу в Decimal
+
+    python -m benchmarks.number_conversion [--repeat N] [--tickers N]
+"""
+import argparse
+from decimal import Decimal
+from typing import List
+
+from benchmarks import pages
+from benchmarks.html_backends import _measure
+from src.parsers.sources import SmartlabParser
+from src.parsers.sources.records import NO_INFORMATION
+from src.parsers.sources.smartlab import _NUMERIC_POSITIONS
+
+
+def float_clean_number(value: str) -> float:
+    """Прежний _clean_number: цепочка replace и float"""
+    if not value or value == NO_INFORMATION:
+        return 0.0
+
+    clean_val = value.replace(" ", "").replace("%", "").replace("+", "")
+    clean_val = clean_val.replace(",", ".")
+
+    try:
+        return float(clean_val)
+    except ValueError:
+        return 0.0
+
+
+def per_cell_decimals(rows: List[List[str]]) -> List[List[Decimal]]:
+    """Прежний путь: float при разборе, Decimal(str(float)) при сохранении"""
+    return [
+        [Decimal(str(float_clean_number(row[position]))) for position in _NUMERIC_POSITIONS]
+        for row in rows
+    ]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--tickers", type=int, default=500)
+    args = arg_parser.parse_args()
+
+    sample_size = len(pages.load_sample("smartlab_stocks"))
+    html = pages.smartlab_page(repeat=-(-args.tickers // sample_size), chrome_blocks=0)
+
+    parser = SmartlabParser("https://smart-lab.ru/q/shares/")
+    rows = [parser._extract_row(row) for row in parser.parse_document(html).css("tr")[1:args.tickers + 1]]
+
+    old = _measure(lambda: per_cell_decimals(rows), args.repeat)
+    new = _measure(lambda: parser._to_records(rows), args.repeat)
+    print(f"{'rows':>6}{'float+str':>14}{'per column':>14}{'speedup':>9}")
+    print(f"{len(rows):>6}{old:>12.1f}ms{new:>12.1f}ms{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
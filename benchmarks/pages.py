@@ -0,0 +1,139 @@
+"""
+Синтетические страницы источников для бенчмарков
+
+Страницы собираются из сохраненных примеров данных (*.json рядом с парсерами)
+и повторяют разметку сайтов: таблица данных окружена навигацией, лентой
+новостей и подвалом, как на реальных страницах.
+"""
+import json
+import pathlib
+from html import escape
+from typing import Dict, List
+
+SOURCES_DIR = pathlib.Path(__file__).resolve().parent.parent / "src" / "parsers" / "sources"
+
+SMARTLAB_COLUMNS = [
+    ("trades-table__name", "name"),
+    ("trades-table__ticker", "ticker"),
+    ("trades-table__price", "last price, rub"),
+    ("trades-table__change-per", "price change"),
+    ("trades-table__volume", "volume, mln rub"),
+    ("trades-table__week", "change in one week"),
+    ("trades-table__month", "change in one month"),
+    ("trades-table__first", "change in year to date"),
+    ("trades-table__year", "change in twelve month"),
+    ("trades-table__rub", "capitalization, bln rub"),
+    ("trades-table__usd", "capitalization, bln usd"),
+]
+
+
+def load_sample(name: str) -> List[Dict]:
+    """Загружает пример данных источника (smartlab_stocks, dohod_divs, rbc_news)"""
+    with open(SOURCES_DIR / f"{name}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _chrome(blocks: int) -> str:
+    """Навигация, лента и подвал страницы - разметка вокруг полезных данных"""
+    items = "".join(
+        f'<div class="feed__item"><a class="feed__link" href="/blog/{i}.php">Запись блога номер {i}</a>'
+        f'<span class="feed__date">12.12.2025</span><span class="feed__comments">{i % 97}</span></div>'
+        for i in range(blocks)
+    )
+    return f'<nav class="menu">{items}</nav>'
+
+
+def smartlab_page(repeat: int = 1, chrome_blocks: int = 1500) -> str:
+    """Страница smart-lab.ru/q/shares с таблицей акций (repeat - размножение строк)"""
+    rows = []
+    for n, item in enumerate(load_sample("smartlab_stocks") * repeat, start=1):
+        cells = [f'<td class="trades-table__num">{n}</td>']
+        for css_class, key in SMARTLAB_COLUMNS:
+            value = escape(item[key])
+            if css_class == "trades-table__name":
+                value = f'<a href="/forum/{escape(item["ticker"])}">{value}</a>'
+            cells.append(f'<td class="{css_class}">{value}</td>')
+        cells.append('<td class="trades-table__chart"><a href="#"><img src="/i/chart.png"></a></td>')
+        rows.append(f"<tr>{''.join(cells)}</tr>")
+
+    header = "<tr>" + "".join(f"<th>{key}</th>" for _, key in SMARTLAB_COLUMNS) + "</tr>"
+    table = (
+        '<div class="main__table"><table class="simple-little-table trades-table">'
+        f"{header}{''.join(rows)}</table></div>"
+    )
+    chrome = _chrome(chrome_blocks)
+    return f"<html><head><title>Акции</title></head><body>{chrome}{table}{chrome}</body></html>"
+
+
+def dohod_page(repeat: int = 1, chrome_blocks: int = 1500) -> str:
+    """Страница dohod.ru/ik/analytics/dividend с таблицей дивидендов"""
+    rows = ['<tr class="filter-row"><td colspan="11"><input type="text"></td></tr>']
+    for item in load_sample("dohod_divs") * repeat:
+        record_date = item["record_date_estimate"] or "n/a"
+        if record_date != "n/a":
+            y, m, d = record_date.split("-")
+            record_date = f"{d}.{m}.{y}"
+        cells = [
+            f'<a href="/ik/analytics/dividend/{item["ticker"].lower()}">{escape(item["ticker"])}</a>',
+            escape(item["company_name"]),
+            escape(item["sector"]),
+            escape(item["period"]),
+            str(item["payment_per_share"]).replace(".", ","),
+            item["currency"],
+            f'{item["yield_percent"]}%',
+            "—",
+            record_date,
+            f'{item["capitalization_mln_rub"]:,.2f}'.replace(",", " "),
+            str(item["dsi"]),
+        ]
+        rows.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+
+    header = "<thead><tr>" + "".join(f"<th>col {i}</th>" for i in range(11)) + "</tr></thead>"
+    table = f'<table id="table-dividend">{header}<tbody>{"".join(rows)}</tbody></table>'
+    chrome = _chrome(chrome_blocks)
+    return f"<html><head><title>Дивиденды</title></head><body>{chrome}{table}{chrome}</body></html>"
+
+
+def rbc_article_page(index: int = 0, chrome_blocks: int = 600) -> str:
+    """Страница статьи rbc.ru"""
+    items = load_sample("rbc_news")
+    item = items[index % len(items)]
+    sentences = [s.strip() for s in item["text"].split(". ") if s.strip()]
+    paragraphs = "".join(f"<p>{escape(s)}.</p>" for s in sentences)
+    title = escape(item["title"])
+    return (
+        "<html><head>"
+        f'<title>{title} :: РБК</title><meta property="og:title" content="{title}">'
+        '<meta property="og:description" content="Описание статьи">'
+        '<meta property="article:published_time" content="2025-12-07T10:00:00+03:00">'
+        f"</head><body>{_chrome(chrome_blocks)}"
+        f'<div class="article"><h1 class="article__header__title">{title}</h1>'
+        f'<article><div class="article__text">{paragraphs}</div></article></div>'
+        f"{_chrome(chrome_blocks)}</body></html>"
+    )
+
+
+def rbc_homepage(links: int = 5000) -> str:
+    """Главная rbc.ru: статьи, разделы, сюжеты, служебные и внешние ссылки"""
+    sections = ["politics", "economics", "business", "society", "technology", "finance"]
+    kinds = []
+    for i in range(links):
+        section = sections[i % len(sections)]
+        article_id = f"{i:024x}"
+        kind = i % 10
+        if kind < 4:
+            href = f"/{section}/07/12/2025/{article_id}"
+        elif kind == 4:
+            href = f"https://www.rbc.ru/rbcfreenews/{article_id}"
+        elif kind == 5:
+            href = f"/{section}/?utm_source=topline"
+        elif kind == 6:
+            href = f"https://style.rbc.ru/life/{article_id}?from=main"
+        elif kind == 7:
+            href = f"/story/{article_id}"
+        elif kind == 8:
+            href = f"https://www.rbc.ru/quote/ticker/{i}"
+        else:
+            href = f"https://external-{i}.example.com/news/{article_id}"
+        kinds.append(f'<a href="{href}">Ссылка на материал номер {i} на главной</a>')
+    return f"<html><body>{''.join(kinds)}</body></html>"
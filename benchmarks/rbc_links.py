@@ -0,0 +1,82 @@
+"""
+Классификация ссылок главной страницы РБК: проверки подстрок и два
+re.search на каждую ссылку против одного скомпилированного классификатора
+
+    python -m benchmarks.rbc_links [--repeat N] [--links N]
+
+Ссылки берутся из синтетической главной страницы (benchmarks.pages.rbc_homepage),
+DOM разбирается один раз - замеряется только отбор ссылок.
+"""
+import argparse
+import re
+from typing import List, Tuple
+
+from benchmarks import pages
+from benchmarks.html_backends import _measure
+from src.parsers.sources import RBCParser
+from src.parsers.sources.rbc import LINK_ARTICLE, LINK_PAGE, classify_link
+
+NEWS_PATTERNS = [
+    '/article/', '/news/', '/story/',
+    '/politics/', '/economics/', '/business/',
+    '/society/', '/technology/', '/finance/',
+    '/rbcfreenews/', '/life/', '/style/',
+    '/books/', '/person/', '/designs/',
+    'pro.rbc.ru/demo/', 'pro.rbc.ru/books/',
+    'style.rbc.ru/'
+]
+EXCLUDE_PATTERNS = [
+    '/politics/?', '/economics/?', '/business/?',
+    '/society/?', '/technology/?', '/finance/?',
+    '?utm_source=', 'story/68822f889a79475439ba67bb',
+]
+
+
+def substring_select(links: List[Tuple[str, str]]) -> List[str]:
+    """Прежний отбор: any() по шаблонам, исключениям и два re.search на ссылку"""
+    selected = []
+    for href, text in links:
+        is_news_link = any(pattern in href for pattern in NEWS_PATTERNS)
+        is_rbc_link = 'rbc.ru' in href or href.startswith('/')
+        is_section = any(exclude in href for exclude in EXCLUDE_PATTERNS)
+        has_article_id = bool(re.search(r'/\d{2}/\d{2}/\d{4}/[a-f0-9]+', href)) or bool(re.search(r'/[a-f0-9]{24}', href))
+        if is_news_link and is_rbc_link and not is_section and (has_article_id or len(text) > 15):
+            selected.append(href)
+    return selected
+
+
+def classifier_select(links: List[Tuple[str, str]]) -> List[str]:
+    """Отбор через classify_link"""
+    selected = []
+    for href, text in links:
+        kind = classify_link(href)
+        if kind == LINK_ARTICLE or (kind == LINK_PAGE and len(text) > 15):
+            selected.append(href)
+    return selected
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=7)
+    arg_parser.add_argument("--links", type=int, default=5000)
+    args = arg_parser.parse_args()
+
+    html = pages.rbc_homepage(links=args.links)
+    parser = RBCParser()
+    links = [
+        (link.attr("href", ""), link.text(strip=True))
+        for link in parser.parse_document(html).css("a[href]")
+    ]
+
+    selected = classifier_select(links)
+    assert substring_select(links) == selected
+
+    old = _measure(lambda: substring_select(links), args.repeat)
+    new = _measure(lambda: classifier_select(links), args.repeat)
+    print(f"links: {len(links)}, articles: {len(selected)}")
+    print(f"{'substring checks':<20}{old:>10.2f}ms")
+    print(f"{'compiled classifier':<20}{new:>10.2f}ms{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
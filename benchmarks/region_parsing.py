@@ -0,0 +1,60 @@
+"""
+Разбор всей страницы против разбора только участка с таблицей
+
+    python -m benchmarks.region_parsing [--repeat N]
+
+Пиковая память считается через tracemalloc и учитывает только объекты
+Python, поэтому для selectolax (DOM в памяти C) показывается только время.
+"""
+import argparse
+import tracemalloc
+
+from benchmarks import pages
+from benchmarks.html_backends import _measure
+from src.parsers.sources import SmartlabParser, DohodParser
+from src.parsers.sources.html_backend import BACKENDS, get_backend
+
+
+def _peak_memory(func) -> float:
+    """Пиковое потребление памяти Python при вызове, МБ"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    smartlab_html = pages.smartlab_page()
+    dohod_html = pages.dohod_page()
+
+    print(f"{'page':<10}{'backend':<12}{'full':>10}{'region':>10}{'full mem':>12}{'region mem':>12}")
+    for backend in BACKENDS:
+        smartlab = SmartlabParser("https://smart-lab.ru/q/shares/")
+        dohod = DohodParser()
+        smartlab.fetch_html = lambda: smartlab_html
+        dohod.fetch_html = lambda: dohod_html
+
+        for name, parser in (("smartlab", smartlab), ("dohod", dohod)):
+            parser.html_backend = get_backend(backend)
+            row = {}
+            for mode in ("full", "region"):
+                parser.region_parsing = mode == "region"
+                row[mode] = _measure(parser.parse, args.repeat)
+                row[f"{mode} mem"] = _peak_memory(parser.parse) if backend != "selectolax" else None
+
+            memory = "".join(
+                f"{row[key]:>10.1f}MB" if row[key] is not None else f"{'-':>12}"
+                for key in ("full mem", "region mem")
+            )
+            print(f"{name:<10}{backend:<12}{row['full']:>8.1f}ms{row['region']:>8.1f}ms{memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Извлечение строк таблицы Smartlab: поиск ячейки на каждую колонку
+против одного прохода по ячейкам строки
+
+    python -m benchmarks.smartlab_rows [--repeat N] [--tickers N]
+"""
+import argparse
+from typing import List
+
+from benchmarks import pages
+from benchmarks.html_backends import _measure
+from src.parsers.sources import SmartlabParser
+from src.parsers.sources.html_backend import BACKENDS, HTMLNode, get_backend
+from src.parsers.sources.records import NO_INFORMATION, SmartlabQuote
+from src.parsers.sources.smartlab import COLUMNS
+
+
+def per_column_rows(rows: List[HTMLNode]) -> List[List[str]]:
+    """Прежний способ: отдельный поиск td.<класс> в строке для каждой колонки"""
+    result = []
+    for row in rows:
+        values = [NO_INFORMATION] * len(SmartlabQuote._fields)
+        for css_class, (key, link_text) in COLUMNS.items():
+            cell = row.css_first(f"td.{css_class}")
+            if not cell:
+                continue
+            position = SmartlabQuote._fields.index(key)
+            if link_text:
+                link = cell.css_first("a")
+                if link:
+                    values[position] = link.text(strip=True)
+            else:
+                values[position] = cell.text(strip=True)
+        result.append(values)
+    return result
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--tickers", type=int, default=500)
+    args = arg_parser.parse_args()
+
+    sample_size = len(pages.load_sample("smartlab_stocks"))
+    html = pages.smartlab_page(repeat=-(-args.tickers // sample_size), chrome_blocks=0)
+
+    print(f"{'backend':<12}{'rows':>6}{'per column':>14}{'single pass':>14}{'speedup':>9}")
+    for backend in BACKENDS:
+        parser = SmartlabParser("https://smart-lab.ru/q/shares/")
+        parser.html_backend = get_backend(backend)
+        rows = parser.parse_document(html).css("tr")[1:args.tickers + 1]
+
+        assert per_column_rows(rows) == [parser._extract_row(row) for row in rows]
+        old = _measure(lambda: per_column_rows(rows), args.repeat)
+        new = _measure(lambda: [parser._extract_row(row) for row in rows], args.repeat)
+        print(f"{backend:<12}{len(rows):>6}{old:>12.1f}ms{new:>12.1f}ms{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Сохранение после полного разбора против потокового parse_iter() + save_iter()
+
+    python -m benchmarks.streaming [--tickers N] [--latency MS]
+
+Время до первой записи - момент первого вызова save_to_db от начала
+запуска. Smartlab разбирается из готового HTML (бэкенд bs4), обход
+статей РБК имитируется задержкой загрузки каждой статьи.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from benchmarks import pages
+from src.parsers.sources import SmartlabParser, RBCParser, RBCArticle
+
+
+def _run(parser, func: Callable[[], object]) -> Tuple[float, float, float]:
+    """Время до первой записи, общее время (мс) и пиковая память Python (МБ)"""
+    first = []
+    started = time.perf_counter()
+
+    def save_to_db(batch):
+        if not first:
+            first.append(time.perf_counter())
+        return len(batch)
+
+    parser.save_to_db = save_to_db
+    func()
+    finished = time.perf_counter()
+
+    # Память меряется отдельным запуском: tracemalloc сильно замедляет разбор
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (first[0] - started) * 1000, (finished - started) * 1000, peak / 1024 / 1024
+
+
+def _smartlab(tickers: int):
+    sample_size = len(pages.load_sample("smartlab_stocks"))
+    html = pages.smartlab_page(repeat=-(-tickers // sample_size), chrome_blocks=0)
+    parser = SmartlabParser("https://smart-lab.ru/q/shares/")
+    parser.fetch_html = lambda: html
+    return parser
+
+
+def _rbc(latency: float):
+    parser = RBCParser()
+    homepage = pages.rbc_homepage()
+
+    async def fetch_html_async(url=None, session=None):
+        return homepage
+
+    async def fetch_article_async(url, session):
+        await asyncio.sleep(latency / 1000)
+        return RBCArticle(title="Заголовок", url=url, text="Текст")
+
+    parser.fetch_html_async = fetch_html_async
+    parser._fetch_article_async = fetch_article_async
+    parser._filter_new_urls = list
+    return parser
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--tickers", type=int, default=2000)
+    arg_parser.add_argument("--latency", type=float, default=100)
+    args = arg_parser.parse_args()
+
+    cases = {
+        "smartlab": (
+            _smartlab(args.tickers),
+            lambda p: p.save_to_db(p.parse()),
+            lambda p: p.save_iter(p.parse_iter()),
+        ),
+        "rbc": (
+            _rbc(args.latency),
+            lambda p: p.save_to_db(asyncio.run(p.parse_async())),
+            lambda p: asyncio.run(p.save_iter_async(p.parse_iter_async())),
+        ),
+    }
+
+    print(f"{'source':<10}{'mode':<8}{'first row':>12}{'total':>12}{'peak mem':>12}")
+    for name, (parser, whole, stream) in cases.items():
+        for mode, func in (("list", whole), ("stream", stream)):
+            first, total, peak = _run(parser, lambda: func(parser))
+            print(f"{name:<10}{mode:<8}{first:>10.1f}ms{total:>10.1f}ms{peak:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
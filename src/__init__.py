@@ -3,9 +3,14 @@ from src.database import (
     Source,
     Log,
     RBCNews,
+    RBCNewsUrl,
     SmartlabStock,
+    SmartlabLatest,
+    SmartlabOHLC,
     DohodDiv,
+    TableRowCount,
     get_async_session,
+    get_async_sessionmaker,
     get_sync_session,
 )
 from src.tasks import (
@@ -21,9 +26,14 @@ __all__ = [
     "Source",
     "Log",
     "RBCNews",
+    "RBCNewsUrl",
     "SmartlabStock",
+    "SmartlabLatest",
+    "SmartlabOHLC",
     "DohodDiv",
+    "TableRowCount",
     "get_async_session",
+    "get_async_sessionmaker",
     "get_sync_session",
     # Tasks
     "celery",
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Индексы точек, выбранных методом Largest-Triangle-Three-Buckets
+
+    Первая и последняя точки сохраняются, остальные делятся на max_points - 2
+    корзины, из каждой берется точка, образующая наибольший треугольник
+    с выбранной точкой предыдущей корзины и средней точкой следующей.
+    Средние корзин считаются сразу для всех через cumsum, площади - одной
+    векторной операцией на корзину.
+
+    Args:
+        x: Координаты по оси X (по возрастанию)
+        y: Значения
+        max_points: Сколько точек оставить (не меньше 3)
+
+    Returns:
+        Индексы выбранных точек по возрастанию
+    """
+    n = len(x)
+    if max_points < 3:
+        raise ValueError("max_points должен быть не меньше 3")
+    if n <= max_points:
+        return np.arange(n)
+
+    # Границы корзин внутри (0, n - 1): шаг не меньше 1, корзины не пустые
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = ends - starts
+    # Средняя точка следующей корзины, для последней - последняя точка ряда
+    next_x = np.append(((sum_x[ends] - sum_x[starts]) / sizes)[1:], x[-1])
+    next_y = np.append(((sum_y[ends] - sum_y[starts]) / sizes)[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        px, py = x[previous], y[previous]
+        area = np.abs((px - next_x[bucket]) * (y[start:end] - py) - (px - x[start:end]) * (next_y[bucket] - py))
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample(items: Sequence[T], max_points: Optional[int],
+               time: Callable[[T], datetime], value: Callable[[T], Any]) -> List[T]:
+    """
+    Прореживание временного ряда методом LTTB
+
+    Args:
+        items: Точки ряда по возрастанию времени
+        max_points: Сколько точек оставить (None - все)
+        time: Время точки
+        value: Значение точки (число)
+
+    Returns:
+        Выбранные точки в исходном порядке
+    """
+    if not max_points or len(items) <= max_points:
+        return list(items)
+
+    x = np.fromiter((time(item).timestamp() for item in items), dtype=np.float64, count=len(items))
+    y = np.fromiter((value(item) for item in items), dtype=np.float64, count=len(items))
+    return [items[index] for index in lttb_indices(x, y, max_points)]
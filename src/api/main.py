@@ -1,20 +1,57 @@
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException, Depends
 from celery.result import AsyncResult
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
 from src import celery, task_parse_smartlab, task_parse_rbc, task_parse_dohod
 from src import (
     get_async_session,
+    get_async_sessionmaker,
     Source,
     Log,
     RBCNews,
     SmartlabStock,
+    SmartlabLatest,
+    SmartlabOHLC,
     DohodDiv,
 )
+from src.database.counters import STATS_COUNT_MODE, row_counts_query
+from src.database.rollups import RESOLUTIONS
+from src.api.downsample import downsample
+from src.api.pagination import keyset_page, page_response
+from src.tasks.status_board import entries_from_rows, get_status_board, latest_runs_query
+
+logger = logging.getLogger(__name__)
+
+
+async def _rebuild_status_board(session: AsyncSession):
+    """Заполняет табло статусов из БД одним запросом (LATERAL) и возвращает записи"""
+    result = await session.execute(latest_runs_query())
+    entries = entries_from_rows(result.all())
+    try:
+        get_status_board().replace(entries)
+    except Exception as e:
+        logger.warning(f"Не удалось обновить табло статусов: {e}")
+    return entries
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """При старте табло статусов восстанавливается из logs"""
+    try:
+        async with get_async_sessionmaker()() as session:
+            await _rebuild_status_board(session)
+    except Exception as e:
+        logger.warning(f"Табло статусов не восстановлено при старте: {e}")
+    yield
 
-app = FastAPI(title="Parser Project API")
+
+app = FastAPI(title="Parser Project API", lifespan=lifespan)
 
 
 @app.get("/")
@@ -48,38 +85,68 @@ def task_status(task_id: str):
 
 
 @app.get("/api/stats")
-async def stats(session: AsyncSession = Depends(get_async_session)):
-    """Получение статистики по всем источникам"""
-    smartlab_count = await session.scalar(select(func.count(SmartlabStock.id)))
-    rbc_count = await session.scalar(select(func.count(RBCNews.id)))
-    dohod_count = await session.scalar(select(func.count(DohodDiv.id)))
-    
+async def stats(mode: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
+    """
+    Получение статистики по всем источникам
+
+    Числа строк берутся из счетчиков (mode=exact) или из оценки
+    планировщика (mode=approximate), без count(*) по таблицам.
+    """
+    try:
+        stmt = row_counts_query(mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    counts = dict((await session.execute(stmt)).all())
+
     return {
-        "smartlab_total": smartlab_count or 0,
-        "rbc_total": rbc_count or 0,
-        "dohod_total": dohod_count or 0
+        "smartlab_total": counts.get("smartlab_stocks", 0),
+        "rbc_total": counts.get("rbc_news", 0),
+        "dohod_total": counts.get("dohod_divs", 0),
+        "mode": mode or STATS_COUNT_MODE,
     }
 
 
+def _page(stmt, time_column, id_column, limit: int, cursor: Optional[str]):
+    """Keyset-страница запроса списка, некорректные limit / cursor - ошибка 400"""
+    try:
+        return keyset_page(stmt, time_column, id_column, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/api/data/smartlab")
 async def smartlab_data(
     limit: int = 200,
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Получение данных об акциях SmartLab"""
-    stmt = (
-        select(SmartlabStock)
-        .order_by(SmartlabStock.parsed_at.desc(), SmartlabStock.id.desc())
-        .limit(limit)
-    )
+    """Получение данных об акциях SmartLab (страница от новых к старым, см. next_cursor)"""
+    stmt = _page(select(SmartlabStock), SmartlabStock.parsed_at, SmartlabStock.id, limit, cursor)
     result = await session.execute(stmt)
     stocks = result.scalars().all()
     
+    return page_response(stocks, limit, position=lambda stock: (stock.parsed_at, stock.id), serialize=lambda stock: {
+        "id": stock.id,
+        "name": stock.name,
+        "ticker": stock.ticker,
+        "last_price_rub": float(stock.last_price_rub) if stock.last_price_rub is not None else None,
+        "price_change_percent": float(stock.price_change_percent) if stock.price_change_percent is not None else None,
+        "volume_mln_rub": float(stock.volume_mln_rub) if stock.volume_mln_rub is not None else None,
+        "parsed_at": stock.parsed_at,
+    })
+
+
+@app.get("/api/data/smartlab/latest")
+async def smartlab_latest(session: AsyncSession = Depends(get_async_session)):
+    """Последние котировки SmartLab: одна строка на тикер"""
+    stmt = select(SmartlabLatest).order_by(SmartlabLatest.ticker)
+    result = await session.execute(stmt)
+    stocks = result.scalars().all()
+
     return [
         {
-            "id": stock.id,
-            "name": stock.name,
             "ticker": stock.ticker,
+            "name": stock.name,
             "last_price_rub": float(stock.last_price_rub) if stock.last_price_rub is not None else None,
             "price_change_percent": float(stock.price_change_percent) if stock.price_change_percent is not None else None,
             "volume_mln_rub": float(stock.volume_mln_rub) if stock.volume_mln_rub is not None else None,
@@ -92,128 +159,105 @@ async def smartlab_data(
 @app.get("/api/data/rbc")
 async def rbc_data(
     limit: int = 50,
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Получение новостей RBC"""
-    stmt = (
-        select(RBCNews)
-        .order_by(RBCNews.parsed_at.desc(), RBCNews.id.desc())
-        .limit(limit)
-    )
+    """Получение новостей RBC (страница от новых к старым, см. next_cursor)"""
+    stmt = _page(select(RBCNews), RBCNews.parsed_at, RBCNews.id, limit, cursor)
     result = await session.execute(stmt)
     news = result.scalars().all()
     
-    return [
-        {
-            "id": item.id,
-            "title": item.title,
-            "url": item.url,
-            "parsed_at": item.parsed_at
-        }
-        for item in news
-    ]
+    return page_response(news, limit, position=lambda item: (item.parsed_at, item.id), serialize=lambda item: {
+        "id": item.id,
+        "title": item.title,
+        "url": item.url,
+        "parsed_at": item.parsed_at
+    })
 
 
 @app.get("/api/data/dohod")
 async def dohod_data(
     limit: int = 200,
+    history: bool = False,
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Получение данных о дивидендах Dohod"""
-    stmt = (
-        select(DohodDiv)
-        .order_by(DohodDiv.parsed_at.desc(), DohodDiv.id.desc())
-        .limit(limit)
-    )
+    """
+    Получение данных о дивидендах Dohod (по умолчанию только текущие версии)
+
+    Страница от новых к старым, см. next_cursor.
+    """
+    stmt = select(DohodDiv)
+    if not history:
+        stmt = stmt.where(DohodDiv.valid_to.is_(None))
+    stmt = _page(stmt, DohodDiv.parsed_at, DohodDiv.id, limit, cursor)
     result = await session.execute(stmt)
     divs = result.scalars().all()
     
-    return [
-        {
-            "id": div.id,
-            "ticker": div.ticker,
-            "company_name": div.company_name,
-            "sector": div.sector,
-            "period": div.period,
-            "payment_per_share": float(div.payment_per_share) if div.payment_per_share is not None else None,
-            "currency": div.currency,
-            "yield_percent": float(div.yield_percent) if div.yield_percent is not None else None,
-            "record_date_estimate": div.record_date_estimate,
-            "capitalization_mln_rub": float(div.capitalization_mln_rub) if div.capitalization_mln_rub is not None else None,
-            "dsi": float(div.dsi) if div.dsi is not None else None,
-            "parsed_at": div.parsed_at,
-        }
-        for div in divs
-    ]
+    return page_response(divs, limit, position=lambda div: (div.parsed_at, div.id), serialize=lambda div: {
+        "id": div.id,
+        "ticker": div.ticker,
+        "company_name": div.company_name,
+        "sector": div.sector,
+        "period": div.period,
+        "payment_per_share": float(div.payment_per_share) if div.payment_per_share is not None else None,
+        "currency": div.currency,
+        "yield_percent": float(div.yield_percent) if div.yield_percent is not None else None,
+        "record_date_estimate": div.record_date_estimate,
+        "capitalization_mln_rub": float(div.capitalization_mln_rub) if div.capitalization_mln_rub is not None else None,
+        "dsi": float(div.dsi) if div.dsi is not None else None,
+        "valid_from": div.valid_from,
+        "valid_to": div.valid_to,
+        "parsed_at": div.parsed_at,
+    })
 
 
 @app.get("/api/logs")
 async def api_logs(
     limit: int = 200,
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Получение логов выполнения парсеров"""
-    stmt = (
-        select(Log, Source)
-        .join(Source, Log.source_id == Source.id)
-        .order_by(Log.started_at.desc().nullslast(), Log.id.desc())
-        .limit(limit)
+    """Получение логов выполнения парсеров (страница от новых к старым, см. next_cursor)"""
+    stmt = _page(
+        select(Log, Source).join(Source, Log.source_id == Source.id),
+        Log.started_at, Log.id, limit, cursor,
     )
     result = await session.execute(stmt)
     rows = result.all()
     
-    return [
-        {
-            "id": log.id,
-            "source_name": source.name,
-            "source_url": source.url,
-            "celery_task_id": log.celery_task_id,
-            "status": log.status,
-            "items_parsed": log.items_parsed,
-            "started_at": log.started_at,
-            "finished_at": log.finished_at,
-            "duration_seconds": log.duration_seconds,
-            "error_code": log.error_code,
-            "error_message": log.error_message,
-        }
-        for log, source in rows
-    ]
+    return page_response(rows, limit, position=lambda row: (row[0].started_at, row[0].id), serialize=lambda row: {
+        "id": row[0].id,
+        "source_name": row[1].name,
+        "source_url": row[1].url,
+        "celery_task_id": row[0].celery_task_id,
+        "status": row[0].status,
+        "items_parsed": row[0].items_parsed,
+        "started_at": row[0].started_at,
+        "finished_at": row[0].finished_at,
+        "duration_seconds": row[0].duration_seconds,
+        "error_code": row[0].error_code,
+        "error_message": row[0].error_message,
+    })
 
 
 @app.get("/api/status")
 async def api_status(session: AsyncSession = Depends(get_async_session)):
     """
     Последний статус по каждому source (RBC/SmartLab/Dohod)
+
+    Отдается из табло статусов, которое обновляют задачи при старте
+    и завершении. В БД идет только неполное (не пересобранное после
+    потери) или недоступное табло.
     """
-    # Получаем все источники
-    sources_stmt = select(Source).order_by(Source.id)
-    sources_result = await session.execute(sources_stmt)
-    sources = sources_result.scalars().all()
-    
-    result = []
-    for source in sources:
-        # Получаем последний лог для каждого источника
-        log_stmt = (
-            select(Log)
-            .where(Log.source_id == source.id)
-            .order_by(Log.started_at.desc().nullslast(), Log.id.desc())
-            .limit(1)
-        )
-        log_result = await session.execute(log_stmt)
-        log = log_result.scalar_one_or_none()
-        
-        result.append({
-            "source_id": source.id,
-            "name": source.name,
-            "url": source.url,
-            "status": log.status if log else "NO_RUNS",
-            "started_at": log.started_at if log else None,
-            "finished_at": log.finished_at if log else None,
-            "duration_seconds": log.duration_seconds if log else None,
-            "error_message": log.error_message if log else None,
-        })
-    
-    return result
+    try:
+        entries = get_status_board().get_all()
+    except Exception as e:
+        logger.warning(f"Табло статусов недоступно: {e}")
+        entries = None
+    if entries is not None:
+        return entries
+    return await _rebuild_status_board(session)
 
 
 @app.get("/api/rbc_news/{news_id}")
@@ -242,20 +286,50 @@ async def rbc_news_one(
 async def smartlab_history(
     ticker: str,
     limit: int = 50000,
+    since: Optional[datetime] = None,
+    resolution: str = "raw",
+    max_points: Optional[int] = None,
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Получение истории цен акции по тикеру"""
+    """
+    Получение истории цен акции по тикеру
+
+    since ограничивает историю по parsed_at, тогда PostgreSQL читает
+    только месячные секции начиная с этой даты.
+
+    resolution: raw - сохраненные котировки, 1h / 1d - агрегаты OHLC
+    из smartlab_ohlc (parsed_at - начало интервала, last_price_rub - close).
+
+    max_points прореживает ответ методом LTTB до заданного числа точек
+    с сохранением формы графика.
+    """
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+
+    if resolution != "raw":
+        if resolution not in RESOLUTIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown resolution '{resolution}'. Available: raw, {', '.join(RESOLUTIONS)}",
+            )
+        return await _smartlab_ohlc(session, ticker, resolution, since, limit, max_points)
+
     stmt = (
         select(SmartlabStock.parsed_at, SmartlabStock.last_price_rub)
         .where(
             SmartlabStock.ticker == ticker,
             SmartlabStock.last_price_rub.isnot(None)
         )
+    )
+    if since is not None:
+        stmt = stmt.where(SmartlabStock.parsed_at >= since)
+    stmt = (
+        stmt
         .order_by(SmartlabStock.parsed_at.asc(), SmartlabStock.id.asc())
         .limit(limit)
     )
     result = await session.execute(stmt)
-    rows = result.all()
+    rows = downsample(result.all(), max_points, time=lambda row: row[0], value=lambda row: row[1])
     
     return [
         {
@@ -264,3 +338,33 @@ async def smartlab_history(
         }
         for row in rows
     ]
+
+
+async def _smartlab_ohlc(session: AsyncSession, ticker: str, resolution: str,
+                         since: Optional[datetime], limit: int, max_points: Optional[int]):
+    """История цен из агрегатов OHLC"""
+    stmt = select(SmartlabOHLC).where(
+        SmartlabOHLC.ticker == ticker,
+        SmartlabOHLC.resolution == resolution,
+    )
+    if since is not None:
+        stmt = stmt.where(SmartlabOHLC.bucket >= since)
+    stmt = stmt.order_by(SmartlabOHLC.bucket.asc()).limit(limit)
+    result = await session.execute(stmt)
+    bars = downsample(result.scalars().all(), max_points, time=lambda bar: bar.bucket, value=lambda bar: bar.close)
+
+    def number(value):
+        return float(value) if value is not None else None
+
+    return [
+        {
+            "parsed_at": bar.bucket,
+            "last_price_rub": number(bar.close),
+            "open": number(bar.open),
+            "high": number(bar.high),
+            "low": number(bar.low),
+            "close": number(bar.close),
+            "volume_mln_rub": number(bar.volume_mln_rub),
+        }
+        for bar in bars
+    ]
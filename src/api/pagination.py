@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(moment: datetime, row_id: int) -> str:
+    """Непрозрачный курсор: позиция последней строки страницы (время, id)"""
+    payload = json.dumps([moment.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Позиция из курсора
+
+    Raises:
+        ValueError: Курсор поврежден или создан не encode_cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        moment, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(moment), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor!r}") from e
+
+
+def keyset_page(stmt: Select, time_column, id_column, limit: int, cursor: Optional[str]) -> Select:
+    """
+    Страница запроса от новых строк к старым по ключу (время, id)
+
+    Вместо OFFSET следующая страница начинается условием
+    (время, id) < позиции курсора, поэтому глубокая страница читает
+    индекс (время, id) так же, как первая. Берется limit + 1 строка,
+    чтобы узнать, есть ли следующая страница (см. page_response).
+
+    Raises:
+        ValueError: Некорректный курсор или limit
+    """
+    if limit < 1:
+        raise ValueError("limit должен быть положительным")
+    if cursor is not None:
+        moment, row_id = decode_cursor(cursor)
+        # Отдельное условие по времени нужно для отсечения месячных секций:
+        # по сравнению кортежей PostgreSQL секции не отбрасывает
+        stmt = stmt.where(time_column <= moment, tuple_(time_column, id_column) < tuple_(moment, row_id))
+    return stmt.order_by(time_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def page_response(rows: Sequence, limit: int, position: Callable[[Any], Tuple[datetime, int]],
+                  serialize: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Ответ списка: {"items": [...], "next_cursor": курсор | None}
+
+    Args:
+        rows: Строки keyset_page (до limit + 1)
+        limit: Размер страницы
+        position: (время, id) строки
+        serialize: Строка -> элемент ответа
+    """
+    items: List[Dict[str, Any]] = [serialize(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(*position(rows[limit - 1])) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
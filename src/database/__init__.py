@@ -1,13 +1,18 @@
-from src.database.models import Base, Source, Log, RBCNews, SmartlabStock, DohodDiv
+from src.database.models import Base, Source, Log, RBCNews, RBCNewsUrl, SmartlabStock, SmartlabLatest, SmartlabOHLC, DohodDiv, TableRowCount
 from src.database.database import (
     get_async_engine, get_sync_engine,
     get_async_sessionmaker, get_sessionmaker,
     get_async_session, get_sync_session, init_db,
 )
+from src.database.loader import bulk_load, upsert_rows
+from src.database.rollups import upsert_ohlc
+from src.database.partitions import ensure_partitions, drop_old_partitions
 
 __all__ = [
-    "Base", "Source", "Log", "RBCNews", "SmartlabStock", "DohodDiv",
+    "Base", "Source", "Log", "RBCNews", "RBCNewsUrl", "SmartlabStock", "SmartlabLatest", "SmartlabOHLC", "DohodDiv",
+    "TableRowCount",
     "get_async_engine", "get_sync_engine",
     "get_async_sessionmaker", "get_sessionmaker",
     "get_async_session", "get_sync_session", "init_db",
+    "bulk_load", "upsert_rows", "upsert_ohlc", "ensure_partitions", "drop_old_partitions",
 ]
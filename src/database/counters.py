@@ -0,0 +1,52 @@
+import os
+from typing import Optional, Union
+
+from sqlalchemy import Select, select, text
+from sqlalchemy.sql.elements import TextClause
+
+from src.database.models import TableRowCount
+
+# Таблицы со счетчиками строк (триггеры в миграции 0005_row_counts)
+COUNTED_TABLES = ("smartlab_stocks", "rbc_news", "dohod_divs")
+
+# Режим /api/stats: exact - счетчики таблицы table_row_counts,
+# approximate - оценка планировщика pg_class.reltuples (после ANALYZE)
+COUNT_MODES = ("exact", "approximate")
+STATS_COUNT_MODE = os.getenv("STATS_COUNT_MODE", "exact")
+
+_TABLE_OIDS = ", ".join(f"to_regclass('{table}')" for table in COUNTED_TABLES)
+
+# У секционированной таблицы оценка - сумма оценок секций. Таблицы и секции,
+# ни разу не прошедшие ANALYZE, имеют reltuples = -1 и считаются пустыми
+_APPROXIMATE_COUNTS = text(
+    "SELECT parent.relname AS table_name, "
+    "CASE WHEN parent.relkind = 'p' THEN COALESCE(sum(GREATEST(child.reltuples, 0)), 0) "
+    "ELSE GREATEST(parent.reltuples, 0) END::BIGINT AS row_count "
+    "FROM pg_class parent "
+    "LEFT JOIN pg_inherits ON pg_inherits.inhparent = parent.oid "
+    "LEFT JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    f"WHERE parent.oid IN ({_TABLE_OIDS}) "
+    "GROUP BY parent.relname, parent.relkind, parent.reltuples"
+)
+
+
+def row_counts_query(mode: Optional[str] = None) -> Union[Select, TextClause]:
+    """
+    Запрос числа строк в COUNTED_TABLES: строки (table_name, row_count)
+
+    Оба режима читают по строке на таблицу, время не зависит от размера таблиц.
+
+    Args:
+        mode: exact | approximate (по умолчанию STATS_COUNT_MODE)
+
+    Raises:
+        ValueError: Неизвестный режим
+    """
+    mode = mode or STATS_COUNT_MODE
+    if mode == "exact":
+        return select(TableRowCount.table_name, TableRowCount.row_count).where(
+            TableRowCount.table_name.in_(COUNTED_TABLES)
+        )
+    if mode == "approximate":
+        return _APPROXIMATE_COUNTS
+    raise ValueError(f"Неизвестный режим подсчета '{mode}'. Доступны: {', '.join(COUNT_MODES)}")
@@ -3,7 +3,6 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
 from typing import AsyncGenerator, Optional
 
-from src.database import Base
 
 # Инициализация движков
 _async_engine: Optional[object] = None
@@ -103,9 +102,11 @@ def get_sync_session():
 
 async def init_db():
     """
-    Инициализация БД (создание таблиц)
+    Инициализация БД (применение миграций из src/database/migrations)
     """
+    from src.database.migrate import apply_migrations
+
     async_engine = get_async_engine()
     async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(apply_migrations)
 
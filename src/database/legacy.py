@@ -0,0 +1,181 @@
+"""
+Перевод базы исходной схемы (init.sql до миграций) на секционированные таблицы
+
+В исходной схеме logs, dohod_divs, rbc_news и smartlab_stocks - обычные
+таблицы, и CREATE TABLE IF NOT EXISTS из 0001_initial их бы пропустил.
+Перед миграцией 0001 такие таблицы переименовываются в <таблица>_legacy,
+после нее строки копируются в секционированные таблицы, а старые таблицы
+удаляются. Все выполняется в транзакции apply_migrations.
+
+Перед копированием создаются месячные секции на все месяцы старых строк:
+в секции DEFAULT история осталась бы навсегда (ее не удаляет
+drop_old_partitions и не исключает отсечение секций в запросах).
+"""
+import logging
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.database.partitions import PARTITIONED_TABLES, create_partitions
+
+logger = logging.getLogger(__name__)
+
+LEGACY_TABLES = ("logs", "dohod_divs", "rbc_news", "smartlab_stocks")
+
+# Копирование строк: колонки новой таблицы и выражения по старой.
+# Время записи стало NOT NULL (ключ секционирования)
+_COPY_COLUMNS = {
+    "logs": {
+        "id": "id", "source_id": "source_id", "celery_task_id": "celery_task_id", "status": "status",
+        "error_code": "error_code", "error_message": "error_message", "items_parsed": "items_parsed",
+        "started_at": "COALESCE(started_at, finished_at, LOCALTIMESTAMP)",
+        "finished_at": "finished_at", "duration_seconds": "duration_seconds",
+    },
+    "dohod_divs": {
+        "id": "id", "source_id": "source_id", "ticker": "ticker", "company_name": "company_name",
+        "sector": "sector", "period": "period", "payment_per_share": "payment_per_share",
+        "currency": "currency", "yield_percent": "yield_percent",
+        "record_date_estimate": "record_date_estimate", "capitalization_mln_rub": "capitalization_mln_rub",
+        "dsi": "dsi", "valid_from": "COALESCE(parsed_at, LOCALTIMESTAMP)",
+        "parsed_at": "COALESCE(parsed_at, LOCALTIMESTAMP)",
+    },
+    "rbc_news": {
+        "id": "id", "source_id": "source_id", "title": "title", "url": "url", "text": "text",
+        "parsed_at": "COALESCE(parsed_at, LOCALTIMESTAMP)",
+    },
+    "smartlab_stocks": {
+        "id": "id", "source_id": "source_id", "name": "name", "ticker": "ticker",
+        "last_price_rub": "last_price_rub", "price_change_percent": "price_change_percent",
+        "volume_mln_rub": "volume_mln_rub", "change_week_percent": "change_week_percent",
+        "change_month_percent": "change_month_percent", "change_ytd_percent": "change_ytd_percent",
+        "change_year_percent": "change_year_percent", "capitalization_bln_rub": "capitalization_bln_rub",
+        "capitalization_bln_usd": "capitalization_bln_usd",
+        # Исходная схема хранила каждый запуск целиком
+        "is_full_snapshot": "TRUE",
+        "parsed_at": "COALESCE(parsed_at, LOCALTIMESTAMP)",
+    },
+}
+
+
+def _legacy_name(table: str) -> str:
+    return f"{table}_legacy"
+
+
+def find_legacy_tables(connection: Connection) -> List[str]:
+    """Таблицы исходной схемы, которые еще не секционированы"""
+    return [
+        table for table in LEGACY_TABLES
+        if connection.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table}
+        ).scalar() == "r"
+    ]
+
+
+def rename_legacy_tables(connection: Connection, tables: List[str]) -> None:
+    """
+    Переименовывает старые таблицы, их индексы и последовательности id
+
+    Имена индексов и последовательностей общие для схемы, без
+    переименования они заняли бы имена, нужные миграции 0001.
+    """
+    for table in tables:
+        legacy = _legacy_name(table)
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": legacy}).scalar() is not None:
+            raise RuntimeError(f"Таблица {legacy} уже существует, перевод {table} прерван")
+
+        connection.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+        indexes = connection.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"
+        ), {"table": legacy}).scalars().all()
+        # Индекс первичного ключа / UNIQUE переименовывается вместе с ограничением
+        for index in indexes:
+            connection.execute(text(f"ALTER INDEX {index} RENAME TO {index}_legacy"))
+        sequence = connection.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": legacy}
+        ).scalar()
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {legacy}_id_seq"))
+        logger.info(f"Таблица {table} исходной схемы переименована в {legacy}")
+
+
+def _fill_dohod_versions(connection: Connection) -> None:
+    """
+    Версии SCD type 2 для скопированных дивидендов
+
+    content_hash считается той же функцией, что и у парсера, поэтому первый
+    запуск после перевода узнает текущие версии. Текущей (valid_to IS NULL)
+    остается последняя строка каждого хэша, предыдущие закрываются временем
+    следующей строки того же хэша.
+    """
+    from src.parsers.sources.dohod import content_hash
+
+    rows = connection.execute(text(
+        "SELECT id, parsed_at, COALESCE(ticker, '') AS ticker, COALESCE(period, '') AS period, "
+        "payment_per_share, record_date_estimate FROM dohod_divs"
+    )).all()
+    if not rows:
+        return
+    connection.execute(
+        text("UPDATE dohod_divs SET content_hash = :hash WHERE id = :id AND parsed_at = :parsed_at"),
+        [{"hash": content_hash(row), "id": row.id, "parsed_at": row.parsed_at} for row in rows],
+    )
+    connection.execute(text(
+        "UPDATE dohod_divs SET valid_to = versions.next_parsed_at "
+        "FROM (SELECT id, parsed_at, "
+        "lead(parsed_at) OVER (PARTITION BY content_hash ORDER BY parsed_at, id) AS next_parsed_at "
+        "FROM dohod_divs) versions "
+        "WHERE dohod_divs.id = versions.id AND dohod_divs.parsed_at = versions.parsed_at "
+        "AND versions.next_parsed_at IS NOT NULL"
+    ))
+
+
+def _fill_rbc_news_urls(connection: Connection) -> None:
+    """
+    Заполняет rbc_news_urls сохраненными URL
+
+    По этой таблице парсер RBC отбирает новые статьи, без нее все
+    уже сохраненные новости были бы сохранены повторно.
+    """
+    connection.execute(text(
+        "INSERT INTO rbc_news_urls (url, first_seen_at) "
+        "SELECT url, min(parsed_at) FROM rbc_news WHERE url IS NOT NULL GROUP BY url "
+        "ON CONFLICT (url) DO NOTHING"
+    ))
+
+
+def _create_history_partitions(connection: Connection, table: str) -> None:
+    """Месячные секции с первого по последний месяц строк старой таблицы"""
+    partitioned = next(item for item in PARTITIONED_TABLES if item.name == table)
+    # Время строки - то же выражение, с которым она копируется
+    moment = _COPY_COLUMNS[table][partitioned.column]
+    first, last = connection.execute(text(
+        f"SELECT min({moment})::date, max({moment})::date FROM {_legacy_name(table)}"
+    )).one()
+    if first is not None:
+        create_partitions(connection, partitioned, first, last)
+
+
+def copy_legacy_tables(connection: Connection, tables: List[str]) -> None:
+    """
+    Копирует строки старых таблиц в секционированные и удаляет старые таблицы
+
+    id сохраняются, последовательности новых таблиц продолжаются после них.
+    """
+    for table in tables:
+        _create_history_partitions(connection, table)
+        columns = _COPY_COLUMNS[table]
+        copied = connection.execute(text(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns.values())} FROM {_legacy_name(table)}"
+        )).rowcount
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(max(id), 1), max(id) IS NOT NULL) "
+            f"FROM {table}"
+        ))
+        if table == "dohod_divs":
+            _fill_dohod_versions(connection)
+        if table == "rbc_news":
+            _fill_rbc_news_urls(connection)
+        connection.execute(text(f"DROP TABLE {_legacy_name(table)}"))
+        logger.info(f"Таблица {table} переведена на секции, скопировано строк: {copied}")
@@ -0,0 +1,178 @@
+import io
+import logging
+import os
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Способ массовой загрузки строк: executemany | copy | asyncpg
+DB_LOADER = os.getenv("DB_LOADER", "executemany")
+LOADERS = ("executemany", "copy", "asyncpg")
+
+# Экранирование значений для текстового формата COPY
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def bulk_load(session: Session, model, rows: List[Dict[str, Any]], method: str | None = None) -> None:
+    """
+    Массовая загрузка строк в таблицу модели
+
+    Способы:
+        executemany - Core insert одним executemany (любая БД)
+        copy - COPY ... FROM STDIN через соединение сессии (в ее транзакции)
+        asyncpg - copy_records_to_table через соединение asyncpg сессии
+                  (в ее транзакции; сессия - AsyncSession.run_sync на postgresql+asyncpg)
+
+    Для COPY нужен PostgreSQL, на других БД используется executemany.
+    Отдельное соединение не открывается: строки должны фиксироваться
+    вместе с остальными изменениями транзакции сессии.
+
+    Raises:
+        ValueError: Неизвестный способ или asyncpg для сессии на другом драйвере
+
+    Args:
+        session: Сессия БД
+        model: ORM модель таблицы
+        rows: Строки {колонка: значение}
+        method: Способ загрузки (по умолчанию DB_LOADER)
+    """
+    method = method or DB_LOADER
+    if method not in LOADERS:
+        raise ValueError(f"Неизвестный способ загрузки '{method}'. Доступны: {', '.join(LOADERS)}")
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    if method != "executemany" and dialect != "postgresql":
+        logger.debug(f"COPY недоступен для {dialect}, используется executemany")
+        method = "executemany"
+
+    if method == "asyncpg" and session.get_bind().dialect.driver != "asyncpg":
+        raise ValueError(
+            "Способ asyncpg выполняет COPY в транзакции сессии и требует сессию на драйвере asyncpg, "
+            f"а не {session.get_bind().dialect.driver}; для синхронной сессии используйте copy"
+        )
+
+    if method == "copy":
+        copy_rows(session, model.__table__, rows)
+    elif method == "asyncpg":
+        from sqlalchemy.util import await_only
+
+        connection = session.connection().connection.driver_connection
+        await_only(copy_records_asyncpg(connection, model.__table__, rows))
+    else:
+        session.execute(insert(model), rows)
+
+
+def dialect_insert(session: Session, model):
+    """INSERT с поддержкой ON CONFLICT: PostgreSQL, для SQLite - его вариант"""
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
+
+def upsert_rows(session: Session, model, rows: List[Dict[str, Any]], key: Sequence[str]) -> None:
+    """
+    Вставка строк с заменой существующих по ключу (INSERT ... ON CONFLICT DO UPDATE)
+
+    Используется синтаксис PostgreSQL (для SQLite - его вариант ON CONFLICT),
+    строки отправляются одним executemany.
+
+    Args:
+        session: Сессия БД
+        model: ORM модель таблицы
+        rows: Строки {колонка: значение}, во всех строках одинаковые колонки
+        key: Колонки уникального ключа
+    """
+    if not rows:
+        return
+
+    stmt = dialect_insert(session, model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={column: stmt.excluded[column] for column in rows[0] if column not in key},
+    )
+    session.execute(stmt, rows)
+
+
+def _with_defaults(table: Table, rows: List[Dict[str, Any]]) -> List[str]:
+    """
+    Дополняет строки значениями Python-умолчаний колонок (COPY их не применяет)
+
+    Returns:
+        Колонки для загрузки в порядке строк
+    """
+    columns = list(rows[0])
+    defaults = {}
+    for column in table.columns:
+        default = column.default
+        if column.name in rows[0] or default is None:
+            continue
+        if default.is_callable:
+            defaults[column.name] = default.arg(None)
+        elif default.is_scalar:
+            defaults[column.name] = default.arg
+
+    if defaults:
+        for row in rows:
+            row.update(defaults)
+        columns.extend(defaults)
+    return columns
+
+
+def _copy_text(rows: List[Dict[str, Any]], columns: Sequence[str]) -> str:
+    """Строки в текстовом формате COPY: значения через табуляцию, NULL - \\N"""
+    lines = []
+    for row in rows:
+        lines.append("\t".join(
+            "\\N" if (value := row[column]) is None else str(value).translate(_COPY_ESCAPES)
+            for column in columns
+        ))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def copy_rows(session: Session, table: Table, rows: List[Dict[str, Any]]) -> None:
+    """
+    Загрузка строк через COPY ... FROM STDIN в транзакции сессии
+
+    Поддерживаются драйверы pg8000 (stream=) и psycopg2 (copy_expert).
+    """
+    columns = _with_defaults(table, rows)
+    preparer = session.get_bind().dialect.identifier_preparer
+    sql = (
+        f"COPY {preparer.format_table(table)} "
+        f"({', '.join(preparer.quote(column) for column in columns)}) FROM STDIN"
+    )
+    buffer = io.StringIO(_copy_text(rows, columns))
+
+    connection = session.connection().connection.driver_connection
+    cursor = connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sql, buffer)
+        else:
+            cursor.execute(sql, stream=buffer)
+    finally:
+        cursor.close()
+
+
+async def copy_records_asyncpg(connection, table: Table, rows: List[Dict[str, Any]]) -> None:
+    """
+    Загрузка строк через asyncpg copy_records_to_table (бинарный COPY)
+
+    Args:
+        connection: Соединение asyncpg (транзакцией управляет вызывающий)
+        table: Таблица
+        rows: Строки {колонка: значение}
+    """
+    columns = _with_defaults(table, rows)
+    records = [tuple(row[column] for column in columns) for row in rows]
+    await connection.copy_records_to_table(
+        table.name, records=records, columns=columns, schema_name=table.schema
+    )
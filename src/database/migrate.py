@@ -0,0 +1,144 @@
+"""
+Версионные миграции схемы БД
+
+Миграции - файлы src/database/migrations/NNNN_<название>.sql, применяются
+по возрастанию номера. Примененные версии записываются в schema_migrations.
+
+    python -m src.database.migrate
+"""
+import logging
+import re
+from pathlib import Path
+from typing import List, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.database.legacy import copy_legacy_tables, find_legacy_tables, rename_legacy_tables
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# Ключ advisory lock: миграции из нескольких контейнеров не идут параллельно
+_LOCK_KEY = 7_301_019
+
+# Миграция, создающая исходные таблицы (до нее переводится старая схема)
+_INITIAL_VERSION = 1
+
+_MIGRATION_FILE = re.compile(r"(\d+)_(\w+)\.sql")
+
+
+class Migration(NamedTuple):
+    """Файл миграции"""
+    version: int
+    name: str
+    path: Path
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Миграции каталога по возрастанию версии"""
+    migrations = []
+    for path in directory.glob("*.sql"):
+        match = _MIGRATION_FILE.fullmatch(path.name)
+        if not match:
+            raise ValueError(f"Имя миграции не в формате NNNN_название.sql: {path.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), path))
+
+    migrations.sort()
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Повторяются номера миграций: {versions}")
+    return migrations
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Разбивает файл миграции на отдельные запросы
+
+    Строки-комментарии отбрасываются, запросы разделяются ';' в конце строки.
+    Внутри тела функции в $$ ... $$ ';' запрос не завершает.
+    """
+    statements, current, in_body = [], [], False
+    for line in sql.splitlines():
+        if not in_body and line.lstrip().startswith("--"):
+            continue
+        current.append(line)
+        if line.count("$$") % 2:
+            in_body = not in_body
+        if not in_body and re.search(r";\s*$", line):
+            statements.append("\n".join(current))
+            current = []
+    statements.append("\n".join(current))
+
+    statements = [re.sub(r";\s*$", "", statement.strip()) for statement in statements]
+    return [statement for statement in statements if statement]
+
+
+def applied_versions(connection: Connection) -> List[int]:
+    """Версии уже примененных миграций"""
+    return list(connection.execute(text("SELECT version FROM schema_migrations ORDER BY version")).scalars())
+
+
+def apply_migrations(connection: Connection, directory: Path = MIGRATIONS_DIR) -> List[int]:
+    """
+    Применяет непримененные миграции в транзакции соединения
+
+    Таблицы исходной схемы (без секций) переводятся на секционированные
+    с сохранением строк, см. src.database.legacy.
+
+    Args:
+        connection: Соединение с PostgreSQL (в транзакции)
+        directory: Каталог миграций
+
+    Returns:
+        Версии примененных миграций
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INT PRIMARY KEY, "
+        "name VARCHAR(255) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+    done = set(applied_versions(connection))
+    # База исходной схемы: обычные таблицы переводятся на секции вокруг 0001
+    legacy = [] if _INITIAL_VERSION in done else find_legacy_tables(connection)
+    if legacy:
+        logger.info(f"Найдены таблицы исходной схемы: {', '.join(legacy)}")
+        rename_legacy_tables(connection, legacy)
+
+    applied = []
+    for migration in load_migrations(directory):
+        if migration.version in done:
+            continue
+        for statement in split_statements(migration.path.read_text(encoding="utf-8")):
+            connection.exec_driver_sql(statement)
+        if migration.version == _INITIAL_VERSION and legacy:
+            copy_legacy_tables(connection, legacy)
+        connection.execute(
+            text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+            {"version": migration.version, "name": migration.name},
+        )
+        applied.append(migration.version)
+        logger.info(f"Применена миграция {migration.path.name}")
+
+    return applied
+
+
+def main() -> None:
+    """Применяет миграции и создает месячные секции"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    from src.database.database import get_sync_engine
+    from src.database.partitions import ensure_partitions
+
+    with get_sync_engine().begin() as connection:
+        applied = apply_migrations(connection)
+        ensure_partitions(connection)
+    logger.info(f"Схема актуальна, применено миграций: {len(applied)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+-- Таблица источников
+CREATE TABLE IF NOT EXISTS source (
+    id SERIAL PRIMARY KEY,
+    url VARCHAR(255) UNIQUE NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Таблицы с временными рядами секционированы по месяцам (RANGE по времени
+-- записи). Месячные секции создает и удаляет src.database.partitions
+-- (задача maintain_partitions), строки вне созданных секций попадают
+-- в секцию DEFAULT. Ключ секционирования входит в первичный ключ.
+
+-- Таблица логов
+CREATE TABLE IF NOT EXISTS logs (
+    id SERIAL,
+    source_id INT NOT NULL,
+    celery_task_id VARCHAR(255),
+    status VARCHAR(20),
+    error_code VARCHAR(50),
+    error_message TEXT,
+    items_parsed INT DEFAULT 0,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    duration_seconds INT,
+    PRIMARY KEY (id, started_at),
+    FOREIGN KEY (source_id) REFERENCES source(id)
+) PARTITION BY RANGE (started_at);
+
+-- Таблица для Dohod
+CREATE TABLE IF NOT EXISTS dohod_divs (
+    id SERIAL,
+    source_id INT NOT NULL,
+    ticker VARCHAR(20),
+    company_name VARCHAR(255),
+    sector VARCHAR(100),
+    period VARCHAR(100),
+    payment_per_share DECIMAL(10, 4),
+    currency VARCHAR(10),
+    yield_percent DECIMAL(10, 2),
+    record_date_estimate DATE,
+    capitalization_mln_rub DECIMAL(20, 2),
+    dsi DECIMAL(10, 2),
+    content_hash VARCHAR(64),
+    valid_from TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    valid_to TIMESTAMP,
+    parsed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, parsed_at),
+    FOREIGN KEY (source_id) REFERENCES source(id)
+) PARTITION BY RANGE (parsed_at);
+
+-- Таблица для RBC
+CREATE TABLE IF NOT EXISTS rbc_news (
+    id SERIAL,
+    source_id INT NOT NULL,
+    title TEXT,
+    url TEXT,
+    text TEXT,
+    parsed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, parsed_at),
+    FOREIGN KEY (source_id) REFERENCES source(id)
+) PARTITION BY RANGE (parsed_at);
+
+-- Уже сохраненные URL новостей RBC. Уникальность url в секционированной
+-- rbc_news не обеспечить (ключ секции должен входить в уникальный индекс)
+CREATE TABLE IF NOT EXISTS rbc_news_urls (
+    url TEXT PRIMARY KEY,
+    first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Таблица для SmartLab
+CREATE TABLE IF NOT EXISTS smartlab_stocks (
+    id SERIAL,
+    source_id INT NOT NULL,
+    name VARCHAR(255),
+    ticker VARCHAR(20),
+    last_price_rub DECIMAL(10, 2),
+    price_change_percent DECIMAL(10, 2),
+    volume_mln_rub DECIMAL(20, 2),
+    change_week_percent DECIMAL(10, 2),
+    change_month_percent DECIMAL(10, 2),
+    change_ytd_percent DECIMAL(10, 2),
+    change_year_percent DECIMAL(10, 2),
+    capitalization_bln_rub DECIMAL(20, 2),
+    capitalization_bln_usd DECIMAL(20, 2),
+    is_full_snapshot BOOLEAN NOT NULL DEFAULT FALSE,
+    parsed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, parsed_at),
+    FOREIGN KEY (source_id) REFERENCES source(id)
+) PARTITION BY RANGE (parsed_at);
+
+-- Секции по умолчанию: принимают строки, для которых месячной секции еще нет
+CREATE TABLE IF NOT EXISTS logs_default PARTITION OF logs DEFAULT;
+CREATE TABLE IF NOT EXISTS dohod_divs_default PARTITION OF dohod_divs DEFAULT;
+CREATE TABLE IF NOT EXISTS rbc_news_default PARTITION OF rbc_news DEFAULT;
+CREATE TABLE IF NOT EXISTS smartlab_stocks_default PARTITION OF smartlab_stocks DEFAULT;
+
+-- Индексы для быстрого поиска (создаются на каждой секции)
+CREATE INDEX IF NOT EXISTS idx_logs_source_id ON logs(source_id);
+CREATE INDEX IF NOT EXISTS idx_logs_started_at ON logs(started_at);
+CREATE INDEX IF NOT EXISTS idx_dohod_ticker ON dohod_divs(ticker);
+CREATE INDEX IF NOT EXISTS idx_dohod_current_hash ON dohod_divs(content_hash) WHERE valid_to IS NULL;
+CREATE INDEX IF NOT EXISTS idx_dohod_parsed_at ON dohod_divs(parsed_at);
+CREATE INDEX IF NOT EXISTS idx_rbc_url ON rbc_news(url);
+CREATE INDEX IF NOT EXISTS idx_rbc_parsed_at ON rbc_news(parsed_at);
+CREATE INDEX IF NOT EXISTS idx_smartlab_ticker ON smartlab_stocks(ticker);
+CREATE INDEX IF NOT EXISTS idx_smartlab_parsed_at ON smartlab_stocks(parsed_at);
+
+INSERT INTO source (url, name) VALUES
+    ('https://www.rbc.ru/quote', 'RBC'),
+    ('https://smart-lab.ru/q/shares/', 'SmartLab'),
+    ('https://www.dohod.ru/ik/analytics/share', 'Dohod')
+ON CONFLICT (url) DO NOTHING;
@@ -0,0 +1,29 @@
+-- Индексы под реальные запросы API. Индексы на секционированных таблицах
+-- создаются на каждой секции, в том числе на будущих.
+
+-- /api/data/smartlab, /api/data/rbc, /api/data/dohod?history=true:
+-- ORDER BY parsed_at DESC, id DESC LIMIT n (обратный проход по индексу)
+CREATE INDEX IF NOT EXISTS idx_smartlab_parsed_at_id ON smartlab_stocks(parsed_at, id);
+CREATE INDEX IF NOT EXISTS idx_rbc_parsed_at_id ON rbc_news(parsed_at, id);
+CREATE INDEX IF NOT EXISTS idx_dohod_parsed_at_id ON dohod_divs(parsed_at, id);
+
+-- /api/data/dohod: только текущие версии (valid_to IS NULL)
+CREATE INDEX IF NOT EXISTS idx_dohod_current_parsed_at_id ON dohod_divs(parsed_at, id) WHERE valid_to IS NULL;
+
+-- /api/data/smartlab/history: ticker = ? ORDER BY parsed_at, id.
+-- Цена в INCLUDE - запрос читается только из индекса
+CREATE INDEX IF NOT EXISTS idx_smartlab_ticker_parsed_at ON smartlab_stocks(ticker, parsed_at, id) INCLUDE (last_price_rub);
+
+-- /api/logs: ORDER BY started_at DESC, id DESC LIMIT n (started_at NOT NULL)
+CREATE INDEX IF NOT EXISTS idx_logs_started_at_id ON logs(started_at, id);
+
+-- /api/status: source_id = ? ORDER BY started_at DESC, id DESC LIMIT 1
+CREATE INDEX IF NOT EXISTS idx_logs_source_started_at ON logs(source_id, started_at, id);
+
+-- Перекрыты составными индексами выше
+DROP INDEX IF EXISTS idx_smartlab_parsed_at;
+DROP INDEX IF EXISTS idx_smartlab_ticker;
+DROP INDEX IF EXISTS idx_rbc_parsed_at;
+DROP INDEX IF EXISTS idx_dohod_parsed_at;
+DROP INDEX IF EXISTS idx_logs_started_at;
+DROP INDEX IF EXISTS idx_logs_source_id;
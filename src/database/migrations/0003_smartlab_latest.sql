@@ -0,0 +1,33 @@
+-- Последние котировки SmartLab: одна строка на тикер, обновляется
+-- парсером в транзакции сохранения снимка
+CREATE TABLE IF NOT EXISTS smartlab_latest (
+    ticker VARCHAR(20) PRIMARY KEY,
+    source_id INT NOT NULL,
+    name VARCHAR(255),
+    last_price_rub DECIMAL(10, 2),
+    price_change_percent DECIMAL(10, 2),
+    volume_mln_rub DECIMAL(20, 2),
+    change_week_percent DECIMAL(10, 2),
+    change_month_percent DECIMAL(10, 2),
+    change_ytd_percent DECIMAL(10, 2),
+    change_year_percent DECIMAL(10, 2),
+    capitalization_bln_rub DECIMAL(20, 2),
+    capitalization_bln_usd DECIMAL(20, 2),
+    parsed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (source_id) REFERENCES source(id)
+);
+
+-- Заполнение из уже накопленной истории
+INSERT INTO smartlab_latest (
+    ticker, source_id, name, last_price_rub, price_change_percent, volume_mln_rub,
+    change_week_percent, change_month_percent, change_ytd_percent, change_year_percent,
+    capitalization_bln_rub, capitalization_bln_usd, parsed_at
+)
+SELECT DISTINCT ON (ticker)
+    ticker, source_id, name, last_price_rub, price_change_percent, volume_mln_rub,
+    change_week_percent, change_month_percent, change_ytd_percent, change_year_percent,
+    capitalization_bln_rub, capitalization_bln_usd, parsed_at
+FROM smartlab_stocks
+WHERE ticker IS NOT NULL
+ORDER BY ticker, parsed_at DESC, id DESC
+ON CONFLICT (ticker) DO NOTHING;
@@ -0,0 +1,43 @@
+-- Часовые и дневные агрегаты цен SmartLab (OHLC), обновляются парсером
+-- при каждом сохранении котировок
+CREATE TABLE IF NOT EXISTS smartlab_ohlc (
+    ticker VARCHAR(20) NOT NULL,
+    resolution VARCHAR(4) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    open DECIMAL(10, 2),
+    high DECIMAL(10, 2),
+    low DECIMAL(10, 2),
+    close DECIMAL(10, 2),
+    volume_mln_rub DECIMAL(20, 2),
+    samples INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ticker, resolution, bucket)
+);
+
+-- Заполнение из накопленной истории. В режиме хранения только изменений
+-- в истории нет неизменившихся наблюдений, поэтому samples занижен
+INSERT INTO smartlab_ohlc (
+    ticker, resolution, bucket, open, high, low, close, volume_mln_rub, samples, updated_at
+)
+SELECT
+    ticker, resolution, bucket,
+    (array_agg(last_price_rub ORDER BY parsed_at, id))[1],
+    max(last_price_rub),
+    min(last_price_rub),
+    (array_agg(last_price_rub ORDER BY parsed_at DESC, id DESC))[1],
+    (array_agg(volume_mln_rub ORDER BY parsed_at DESC, id DESC))[1],
+    count(*),
+    max(parsed_at)
+FROM (
+    SELECT ticker, '1h' AS resolution, date_trunc('hour', parsed_at) AS bucket,
+           last_price_rub, volume_mln_rub, parsed_at, id
+    FROM smartlab_stocks
+    WHERE ticker IS NOT NULL AND last_price_rub <> 0
+    UNION ALL
+    SELECT ticker, '1d', date_trunc('day', parsed_at),
+           last_price_rub, volume_mln_rub, parsed_at, id
+    FROM smartlab_stocks
+    WHERE ticker IS NOT NULL AND last_price_rub <> 0
+) observations
+GROUP BY ticker, resolution, bucket
+ON CONFLICT (ticker, resolution, bucket) DO NOTHING;
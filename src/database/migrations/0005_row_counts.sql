@@ -0,0 +1,80 @@
+-- Счетчики строк больших таблиц для /api/stats: обновляются триггерами
+-- уровня оператора, поэтому статистика не требует count(*) по таблице
+CREATE TABLE IF NOT EXISTS table_row_counts (
+    table_name VARCHAR(63) PRIMARY KEY,
+    row_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Один UPDATE счетчика на оператор (INSERT / COPY / DELETE), а не на строку
+CREATE OR REPLACE FUNCTION count_rows_inserted() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    delta BIGINT;
+BEGIN
+    SELECT count(*) INTO delta FROM new_rows;
+    IF delta > 0 THEN
+        UPDATE table_row_counts
+        SET row_count = row_count + delta, updated_at = LOCALTIMESTAMP
+        WHERE table_name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION count_rows_deleted() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    delta BIGINT;
+BEGIN
+    SELECT count(*) INTO delta FROM old_rows;
+    IF delta > 0 THEN
+        UPDATE table_row_counts
+        SET row_count = row_count - delta, updated_at = LOCALTIMESTAMP
+        WHERE table_name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION count_rows_truncated() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE table_row_counts SET row_count = 0, updated_at = LOCALTIMESTAMP WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS smartlab_stocks_count_insert ON smartlab_stocks;
+CREATE TRIGGER smartlab_stocks_count_insert AFTER INSERT ON smartlab_stocks
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows_inserted();
+DROP TRIGGER IF EXISTS smartlab_stocks_count_delete ON smartlab_stocks;
+CREATE TRIGGER smartlab_stocks_count_delete AFTER DELETE ON smartlab_stocks
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows_deleted();
+DROP TRIGGER IF EXISTS smartlab_stocks_count_truncate ON smartlab_stocks;
+CREATE TRIGGER smartlab_stocks_count_truncate AFTER TRUNCATE ON smartlab_stocks
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_truncated();
+
+DROP TRIGGER IF EXISTS rbc_news_count_insert ON rbc_news;
+CREATE TRIGGER rbc_news_count_insert AFTER INSERT ON rbc_news
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows_inserted();
+DROP TRIGGER IF EXISTS rbc_news_count_delete ON rbc_news;
+CREATE TRIGGER rbc_news_count_delete AFTER DELETE ON rbc_news
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows_deleted();
+DROP TRIGGER IF EXISTS rbc_news_count_truncate ON rbc_news;
+CREATE TRIGGER rbc_news_count_truncate AFTER TRUNCATE ON rbc_news
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_truncated();
+
+DROP TRIGGER IF EXISTS dohod_divs_count_insert ON dohod_divs;
+CREATE TRIGGER dohod_divs_count_insert AFTER INSERT ON dohod_divs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows_inserted();
+DROP TRIGGER IF EXISTS dohod_divs_count_delete ON dohod_divs;
+CREATE TRIGGER dohod_divs_count_delete AFTER DELETE ON dohod_divs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_rows_deleted();
+DROP TRIGGER IF EXISTS dohod_divs_count_truncate ON dohod_divs;
+CREATE TRIGGER dohod_divs_count_truncate AFTER TRUNCATE ON dohod_divs
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_truncated();
+
+-- Начальные значения: один полный подсчет при миграции
+INSERT INTO table_row_counts (table_name, row_count)
+SELECT 'smartlab_stocks', count(*) FROM smartlab_stocks
+UNION ALL SELECT 'rbc_news', count(*) FROM rbc_news
+UNION ALL SELECT 'dohod_divs', count(*) FROM dohod_divs
+ON CONFLICT (table_name) DO UPDATE SET row_count = EXCLUDED.row_count, updated_at = LOCALTIMESTAMP;
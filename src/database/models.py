@@ -1,7 +1,7 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, Date, 
-    Numeric, ForeignKey, Index
+    Numeric, Boolean, ForeignKey, Index, BigInteger
 )
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -34,14 +34,15 @@ class Log(Base):
     error_code = Column(String(50))
     error_message = Column(Text)
     items_parsed = Column(Integer, default=0)
-    started_at = Column(DateTime)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     finished_at = Column(DateTime)
     duration_seconds = Column(Integer)
 
     source = relationship("Source", back_populates="logs")
     
     __table_args__ = (
-        Index("idx_logs_source_id", "source_id"),
+        Index("idx_logs_started_at_id", "started_at", "id"),
+        Index("idx_logs_source_started_at", "source_id", "started_at", "id"),
     )
 
 
@@ -52,7 +53,7 @@ class RBCNews(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     source_id = Column(Integer, ForeignKey("source.id"), nullable=False)
     title = Column(Text)
-    url = Column(Text, unique=True)
+    url = Column(Text)
     text = Column(Text)
     parsed_at = Column(DateTime, default=datetime.utcnow)
 
@@ -60,9 +61,23 @@ class RBCNews(Base):
     
     __table_args__ = (
         Index("idx_rbc_url", "url"),
+        Index("idx_rbc_parsed_at_id", "parsed_at", "id"),
     )
 
 
+class RBCNewsUrl(Base):
+    """
+    Модель таблицы сохраненных URL новостей RBC
+
+    rbc_news секционирована по parsed_at, поэтому уникальность url
+    обеспечивается этой таблицей.
+    """
+    __tablename__ = "rbc_news_urls"
+
+    url = Column(Text, primary_key=True)
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+
+
 class SmartlabStock(Base):
     """Модель таблицы акций SmartLab"""
     __tablename__ = "smartlab_stocks"
@@ -80,15 +95,63 @@ class SmartlabStock(Base):
     change_year_percent = Column(Numeric(10, 2))
     capitalization_bln_rub = Column(Numeric(20, 2))
     capitalization_bln_usd = Column(Numeric(20, 2))
+    # True - строка полного снимка, False - сохранена только из-за изменения значений
+    is_full_snapshot = Column(Boolean, default=False, nullable=False)
     parsed_at = Column(DateTime, default=datetime.utcnow)
 
     source = relationship("Source", back_populates="smartlab_stocks")
     
     __table_args__ = (
-        Index("idx_smartlab_ticker", "ticker"),
+        Index("idx_smartlab_parsed_at_id", "parsed_at", "id"),
+        Index("idx_smartlab_ticker_parsed_at", "ticker", "parsed_at", "id", postgresql_include=["last_price_rub"]),
     )
 
 
+class SmartlabLatest(Base):
+    """
+    Модель таблицы последних котировок SmartLab (одна строка на тикер)
+
+    Обновляется при сохранении в той же транзакции, что и smartlab_stocks.
+    """
+    __tablename__ = "smartlab_latest"
+
+    ticker = Column(String(20), primary_key=True)
+    source_id = Column(Integer, ForeignKey("source.id"), nullable=False)
+    name = Column(String(255))
+    last_price_rub = Column(Numeric(10, 2))
+    price_change_percent = Column(Numeric(10, 2))
+    volume_mln_rub = Column(Numeric(20, 2))
+    change_week_percent = Column(Numeric(10, 2))
+    change_month_percent = Column(Numeric(10, 2))
+    change_ytd_percent = Column(Numeric(10, 2))
+    change_year_percent = Column(Numeric(10, 2))
+    capitalization_bln_rub = Column(Numeric(20, 2))
+    capitalization_bln_usd = Column(Numeric(20, 2))
+    parsed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SmartlabOHLC(Base):
+    """
+    Модель таблицы агрегатов цен SmartLab (OHLC) по часам и дням
+
+    Обновляется при каждом сохранении котировок, строка - тикер,
+    разрешение (1h | 1d) и начало интервала.
+    """
+    __tablename__ = "smartlab_ohlc"
+
+    ticker = Column(String(20), primary_key=True)
+    resolution = Column(String(4), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    open = Column(Numeric(10, 2))
+    high = Column(Numeric(10, 2))
+    low = Column(Numeric(10, 2))
+    close = Column(Numeric(10, 2))
+    # Оборот за день на момент последнего наблюдения в интервале
+    volume_mln_rub = Column(Numeric(20, 2))
+    samples = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
 class DohodDiv(Base):
     """Модель таблицы дивидендов Dohod"""
     __tablename__ = "dohod_divs"
@@ -105,10 +168,31 @@ class DohodDiv(Base):
     record_date_estimate = Column(Date)
     capitalization_mln_rub = Column(Numeric(20, 2))
     dsi = Column(Numeric(10, 2))
+    # Версия (SCD type 2): действует с valid_from до valid_to, NULL - текущая
+    content_hash = Column(String(64))
+    valid_from = Column(DateTime, default=datetime.utcnow)
+    valid_to = Column(DateTime)
     parsed_at = Column(DateTime, default=datetime.utcnow)
 
     source = relationship("Source", back_populates="dohod_divs")
     
     __table_args__ = (
         Index("idx_dohod_ticker", "ticker"),
+        Index("idx_dohod_current_hash", "content_hash", postgresql_where=valid_to.is_(None)),
+        Index("idx_dohod_parsed_at_id", "parsed_at", "id"),
+        Index("idx_dohod_current_parsed_at_id", "parsed_at", "id", postgresql_where=valid_to.is_(None)),
     )
+
+
+class TableRowCount(Base):
+    """
+    Модель таблицы счетчиков строк больших таблиц
+
+    Обновляется триггерами INSERT / DELETE / TRUNCATE и при удалении
+    старых секций, используется /api/stats вместо count(*).
+    """
+    __tablename__ = "table_row_counts"
+
+    table_name = Column(String(63), primary_key=True)
+    row_count = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,189 @@
+import logging
+import os
+import re
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from src.database.counters import COUNTED_TABLES
+
+logger = logging.getLogger(__name__)
+
+# Сколько месячных секций создавать наперед (кроме текущего месяца)
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Сколько месяцев хранить секции (0 - хранить все)
+RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "0"))
+# Схема, куда переносятся старые секции (пусто - секции удаляются)
+ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "")
+
+
+class PartitionedTable(NamedTuple):
+    """Таблица, секционированная по месяцам"""
+    name: str
+    # Колонка ключа секционирования
+    column: str
+    # Условие на строки, при наличии которых секция не удаляется
+    keep_if: Optional[str] = None
+
+
+PARTITIONED_TABLES = (
+    PartitionedTable("smartlab_stocks", "parsed_at"),
+    PartitionedTable("rbc_news", "parsed_at"),
+    # Текущие версии дивидендов (SCD type 2) нужны независимо от возраста
+    PartitionedTable("dohod_divs", "parsed_at", keep_if="valid_to IS NULL"),
+    PartitionedTable("logs", "started_at"),
+)
+
+
+def month_start(day: date) -> date:
+    """Первое число месяца"""
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """Первое число месяца, отстоящего от day на months месяцев"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Имя месячной секции: <таблица>_pYYYYMM"""
+    return f"{table}_p{month:%Y%m}"
+
+
+def _partition_month(table: str, name: str) -> Optional[date]:
+    """Месяц секции по ее имени (None - не месячная секция таблицы)"""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _exists(connection: Connection, name: str) -> bool:
+    return connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def create_partitions(connection: Connection, table: PartitionedTable, first: date, last: date) -> List[str]:
+    """
+    Создает недостающие месячные секции таблицы с месяца first по месяц last включительно
+
+    Строки за месяц новой секции, уже попавшие в секцию DEFAULT,
+    переносятся в нее перед присоединением (иначе ATTACH завершится ошибкой).
+
+    Returns:
+        Имена созданных секций
+    """
+    created = []
+    start = month_start(first)
+    while start <= last:
+        end = add_months(start, 1)
+        name = partition_name(table.name, start)
+        if not _exists(connection, name):
+            connection.execute(text(
+                f"CREATE TABLE {name} (LIKE {table.name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            if _exists(connection, f"{table.name}_default"):
+                connection.execute(text(
+                    f"WITH moved AS (DELETE FROM {table.name}_default "
+                    f"WHERE {table.column} >= :start AND {table.column} < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ), {"start": start, "end": end})
+            connection.execute(text(
+                f"ALTER TABLE {table.name} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            created.append(name)
+            logger.info(f"Создана секция {name} [{start}, {end})")
+        start = end
+    return created
+
+
+def ensure_partitions(connection: Connection, months_ahead: Optional[int] = None,
+                      today: Optional[date] = None) -> List[str]:
+    """
+    Создает месячные секции на текущий месяц и months_ahead месяцев вперед
+
+    Args:
+        connection: Соединение с PostgreSQL (в транзакции)
+        months_ahead: Сколько месяцев вперед (по умолчанию PARTITION_MONTHS_AHEAD)
+        today: Текущая дата (для тестов)
+
+    Returns:
+        Имена созданных секций
+    """
+    months_ahead = MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or date.today())
+    created = []
+
+    for table in PARTITIONED_TABLES:
+        created.extend(create_partitions(connection, table, current, add_months(current, months_ahead)))
+
+    return created
+
+
+def drop_old_partitions(connection: Connection, retention_months: Optional[int] = None,
+                        archive_schema: Optional[str] = None,
+                        today: Optional[date] = None) -> List[str]:
+    """
+    Отсоединяет секции старше retention_months месяцев и удаляет
+    или переносит их в архивную схему (без массового DELETE)
+
+    Секции со строками, подходящими под keep_if таблицы, не трогаются.
+    Строки отсоединенных секций вычитаются из table_row_counts.
+
+    Args:
+        connection: Соединение с PostgreSQL (в транзакции)
+        retention_months: Срок хранения в месяцах (по умолчанию PARTITION_RETENTION_MONTHS, 0 - без ограничений)
+        archive_schema: Схема для архива (по умолчанию PARTITION_ARCHIVE_SCHEMA, пусто - удалять)
+        today: Текущая дата (для тестов)
+
+    Returns:
+        Имена отсоединенных секций
+    """
+    retention_months = RETENTION_MONTHS if retention_months is None else retention_months
+    archive_schema = ARCHIVE_SCHEMA if archive_schema is None else archive_schema
+    if retention_months <= 0:
+        return []
+
+    # Секция за месяц cutoff и более новые остаются
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    if archive_schema:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+
+    detached = []
+    for table in PARTITIONED_TABLES:
+        names = connection.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ), {"table": table.name}).scalars().all()
+
+        for name in sorted(names):
+            month = _partition_month(table.name, name)
+            if month is None or month >= cutoff:
+                continue
+            if table.keep_if and connection.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE {table.keep_if})")
+            ).scalar():
+                logger.info(f"Секция {name} оставлена: есть строки {table.keep_if}")
+                continue
+
+            if table.name in COUNTED_TABLES:
+                # Строки уходят из таблицы без DELETE, триггеры счетчика не срабатывают
+                connection.execute(text(
+                    f"UPDATE table_row_counts SET row_count = row_count - (SELECT count(*) FROM {name}), "
+                    f"updated_at = LOCALTIMESTAMP WHERE table_name = :table"
+                ), {"table": table.name})
+            connection.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {name}"))
+            if archive_schema:
+                connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+                logger.info(f"Секция {name} перенесена в схему {archive_schema}")
+            else:
+                connection.execute(text(f"DROP TABLE {name}"))
+                logger.info(f"Секция {name} удалена")
+            detached.append(name)
+
+    return detached
@@ -0,0 +1,88 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.database.loader import dialect_insert
+from src.database.models import SmartlabOHLC
+
+# Разрешения агрегатов: имя -> поля datetime, обнуляемые до начала интервала
+RESOLUTIONS = {
+    "1h": {"minute": 0, "second": 0, "microsecond": 0},
+    "1d": {"hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+}
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Начало интервала разрешения, в который попадает moment"""
+    return moment.replace(**RESOLUTIONS[resolution])
+
+
+def ohlc_rows(quotes: Iterable, parsed_at: datetime) -> List[Dict[str, Any]]:
+    """
+    Строки агрегатов для котировок одного момента времени
+
+    Котировки без цены (None или 0) пропускаются. Повторы тикера
+    сворачиваются в одну строку (в одном INSERT ... ON CONFLICT ключ
+    не может встречаться дважды).
+
+    Args:
+        quotes: Записи с полями ticker, last_price_rub, volume_mln_rub
+        parsed_at: Время котировок
+
+    Returns:
+        Строки smartlab_ohlc для всех разрешений
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for quote in quotes:
+        price: Optional[Decimal] = quote.last_price_rub
+        if not price:
+            continue
+        row = merged.get(quote.ticker)
+        if row is None:
+            merged[quote.ticker] = {
+                "ticker": quote.ticker, "open": price, "high": price, "low": price, "close": price,
+                "volume_mln_rub": quote.volume_mln_rub, "samples": 1,
+            }
+        else:
+            row.update(
+                high=max(row["high"], price), low=min(row["low"], price), close=price,
+                volume_mln_rub=quote.volume_mln_rub, samples=row["samples"] + 1,
+            )
+
+    return [
+        {**row, "resolution": resolution, "bucket": bucket_start(parsed_at, resolution), "updated_at": parsed_at}
+        for resolution in RESOLUTIONS
+        for row in merged.values()
+    ]
+
+
+def upsert_ohlc(session: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Добавляет наблюдения в агрегаты одним INSERT ... ON CONFLICT DO UPDATE
+
+    open интервала остается первым, high/low расширяются, close и оборот
+    берутся из нового наблюдения.
+    """
+    if not rows:
+        return
+
+    sqlite = session.get_bind().dialect.name == "sqlite"
+    greatest, least = (func.max, func.min) if sqlite else (func.greatest, func.least)
+
+    table = SmartlabOHLC.__table__
+    stmt = dialect_insert(session, SmartlabOHLC)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["ticker", "resolution", "bucket"],
+        set_={
+            "high": greatest(table.c.high, stmt.excluded.high),
+            "low": least(table.c.low, stmt.excluded.low),
+            "close": stmt.excluded.close,
+            "volume_mln_rub": stmt.excluded.volume_mln_rub,
+            "samples": table.c.samples + stmt.excluded.samples,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    session.execute(stmt, rows)
@@ -2,6 +2,7 @@ from src.parsers.sources.base_parser import BaseParser
 from src.parsers.sources.smartlab import SmartlabParser, run_smartlab_parser
 from src.parsers.sources.rbc import RBCParser, run_rbc_parser
 from src.parsers.sources.dohod import DohodParser, run_dohod_parser
+from src.parsers.sources.records import SmartlabQuote, DohodDividend, RBCArticle
 
 __all__ = [
     "BaseParser",
@@ -11,4 +12,7 @@ __all__ = [
     "run_smartlab_parser",
     "run_rbc_parser",
     "run_dohod_parser",
+    "SmartlabQuote",
+    "DohodDividend",
+    "RBCArticle",
 ]
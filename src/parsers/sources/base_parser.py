@@ -1,14 +1,70 @@
+import asyncio
+import logging
+import os
+import aiohttp
 import requests
-from typing import List, Dict, Optional
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import (
+    AsyncIterable, AsyncIterator, List, Dict, Iterator, NamedTuple, Optional, Iterable, Pattern, Tuple, TypeVar,
+)
 import json
 from sqlalchemy.orm import Session
-from src.database import get_sync_session, Source
+from src.database import bulk_load, get_sync_session, Source
+from .http_cache import HTTPCache
+from .html_backend import HTMLNode, get_backend, slice_element
+
+logger = logging.getLogger(__name__)
+
+# Сетевые настройки парсеров (переопределяются переменными окружения)
+MAX_CONNECTIONS = int(os.getenv("PARSER_MAX_CONNECTIONS", "20"))
+REQUEST_TIMEOUT = int(os.getenv("PARSER_REQUEST_TIMEOUT", "10"))
+
+# HTTP кэш условных запросов (пустой каталог - кэш выключен)
+HTTP_CACHE_DIR = os.getenv("PARSER_HTTP_CACHE_DIR", "")
+HTTP_CACHE_MAX_MB = int(os.getenv("PARSER_HTTP_CACHE_MAX_MB", "100"))
+
+# Разбирать только нужный участок страницы (0 - всегда строить DOM всей страницы)
+REGION_PARSING = os.getenv("PARSER_REGION_PARSING", "1") != "0"
+
+# Размер пачки записей при потоковом разборе и сохранении в БД
+BATCH_SIZE = int(os.getenv("PARSER_BATCH_SIZE", "200"))
+
+T = TypeVar("T")
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Разбивает поток на списки не длиннее size"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _json_default(value):
+    """Сериализация значений, которые json не поддерживает сам"""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 
 class BaseParser:
-    def __init__(self, url: str, headers: Optional[Dict] = None):
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict] = None,
+        max_connections: Optional[int] = None,
+        cache: Optional[HTTPCache] = None,
+        html_backend: Optional[str] = None,
+    ):
         """
         url: URL страницы для парсинга
         headers: Заголовки HTTP запроса
+        max_connections: Размер пула соединений асинхронного клиента
+        cache: HTTP кэш для условных запросов (по умолчанию из PARSER_HTTP_CACHE_DIR)
+        html_backend: HTML бэкенд bs4 | bs4-lxml | selectolax (по умолчанию из PARSER_HTML_BACKEND)
         """
         self.url = url
         self.headers = headers or {
@@ -16,30 +72,279 @@ class BaseParser:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        self.max_connections = max_connections or MAX_CONNECTIONS
+        if cache is None and HTTP_CACHE_DIR:
+            cache = HTTPCache(HTTP_CACHE_DIR, max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024)
+        self.cache = cache
+        # True, если основная страница не изменилась с прошлого запуска (ответ 304)
+        self.not_modified = False
+        # Валидаторы, еще не записанные в кэш: url -> (ETag, Last-Modified).
+        # В кэш они попадают только после успешного сохранения (commit_validators)
+        self._pending_validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        # Неудачные save_to_db текущего save_iter (0 - все пачки сохранены)
+        self.save_errors = 0
+        self.html_backend = get_backend(html_backend)
+        self.region_parsing = REGION_PARSING
+        self.batch_size = BATCH_SIZE
+
+    def _conditional_headers(self, url: str) -> Dict:
+        """Заголовки запроса с валидаторами из кэша"""
+        if not self.cache:
+            return dict(self.headers)
+        return {**self.headers, **self.cache.validators(url)}
+
+    def _remember_response(self, url: str, headers) -> None:
+        """
+        Запоминает валидаторы ответа до подтверждения сохранения
+
+        Если записать валидаторы сразу, то после неудачного сохранения
+        следующие запуски получали бы 304 и не сохраняли страницу,
+        пока она не изменится.
+        """
+        if self.cache:
+            self._pending_validators[url] = (headers.get("ETag"), headers.get("Last-Modified"))
+
+    def commit_validators(self, url: Optional[str] = None) -> None:
+        """
+        Записывает в кэш валидаторы ответов, данные которых сохранены
+
+        Args:
+            url: URL страницы (по умолчанию все запомненные ответы)
+        """
+        if not self.cache:
+            return
+        urls = [url] if url is not None else list(self._pending_validators)
+        for pending_url in urls:
+            validators = self._pending_validators.pop(pending_url, None)
+            if validators is not None:
+                self.cache.store(pending_url, *validators)
+
+    def _handle_not_modified(self, url: str) -> None:
+        """Обработка ответа 304: страница не изменилась, разбирать ее не нужно"""
+        if self.cache:
+            self.cache.touch(url)
+        if url == self.url:
+            self.not_modified = True
     
     def fetch_html(self) -> Optional[str]:
         """
         HTML содержимое или None в случае ошибки
+
+        Если страница не изменилась с прошлого запроса (304), возвращает None
+        и выставляет self.not_modified.
         """
+        self.not_modified = False
         try:
-            response = self.session.get(self.url, headers=self.headers, timeout=10)
+            response = self.session.get(
+                self.url, headers=self._conditional_headers(self.url), timeout=REQUEST_TIMEOUT
+            )
+            if response.status_code == 304:
+                self._handle_not_modified(self.url)
+                return None
             response.raise_for_status()
+            self._remember_response(self.url, response.headers)
             return response.text
         except requests.RequestException as e:
             print(f"Ошибка при получении HTML: {e}")
             return None
+
+    # Асинхронный движок загрузки
+    def _create_async_session(self) -> aiohttp.ClientSession:
+        """
+        Создает aiohttp сессию с ограниченным пулом соединений
+        """
+        connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers)
+
+    async def fetch_html_async(
+        self,
+        url: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        conditional: bool = True,
+    ) -> Optional[str]:
+        """
+        Асинхронное получение HTML
+
+        Args:
+            url: URL страницы (по умолчанию self.url)
+            session: Общая aiohttp сессия; если не передана, создается временная
+            conditional: Условный запрос с валидаторами из кэша (False - обычный
+                запрос, ответ в кэш не записывается)
+
+        Returns:
+            HTML содержимое или None в случае ошибки либо ответа 304
+        """
+        if session is None:
+            async with self._create_async_session() as own_session:
+                return await self.fetch_html_async(url, own_session, conditional)
+
+        url = url or self.url
+        if url == self.url:
+            self.not_modified = False
+        try:
+            headers = self._conditional_headers(url) if conditional else dict(self.headers)
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    self._handle_not_modified(url)
+                    return None
+                response.raise_for_status()
+                html = await response.text()
+                if conditional:
+                    self._remember_response(url, response.headers)
+                return html
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Ошибка при получении HTML ({url}): {e}")
+            return None
+
+    async def fetch_many_async(
+        self,
+        urls: Iterable[str],
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> Dict[str, Optional[str]]:
+        """
+        Параллельная загрузка нескольких страниц через общий пул соединений
+
+        Returns:
+            Словарь {url: HTML или None}
+        """
+        urls = list(urls)
+        if session is None:
+            async with self._create_async_session() as own_session:
+                return await self.fetch_many_async(urls, own_session)
+
+        pages = await asyncio.gather(*(self.fetch_html_async(url, session) for url in urls))
+        return dict(zip(urls, pages))
     
-    def parse(self) -> List[Dict]:
+    def parse_document(self, html: str) -> HTMLNode:
         """
-        Список словарей с данными о компаниях/акциях
+        Разбирает HTML выбранным бэкендом
+        """
+        return self.html_backend.parse(html)
+
+    def parse_region(self, html: str, opening: Pattern, tag: str) -> HTMLNode:
+        """
+        Разбирает только элемент страницы, начинающийся с opening
+
+        Элемент вырезается из HTML по парным тегам, поэтому DOM строится
+        только для него. Если элемент не найден или режим выключен
+        (PARSER_REGION_PARSING=0), разбирается вся страница.
+        """
+        if self.region_parsing:
+            fragment = slice_element(html, opening, tag)
+            if fragment is not None:
+                return self.parse_document(fragment)
+        return self.parse_document(html)
+    
+    def parse(self) -> List[NamedTuple]:
+        """
+        Список записей с данными источника (NamedTuple из records.py)
         """
         raise NotImplementedError("Метод parse() должен быть реализован в дочернем классе")
+
+    async def parse_async(self) -> List[NamedTuple]:
+        """
+        Асинхронный вариант parse()
+
+        По умолчанию выполняет синхронный parse() в отдельном потоке,
+        дочерние классы переопределяют его для конкурентной загрузки страниц.
+        """
+        return await asyncio.to_thread(self.parse)
+
+    def parse_iter(self) -> Iterator[NamedTuple]:
+        """
+        Потоковый вариант parse(): записи выдаются по мере разбора
+
+        По умолчанию выдает результат parse(), дочерние классы
+        переопределяют его, чтобы не собирать весь список в памяти.
+        """
+        yield from self.parse()
+
+    async def parse_iter_async(self) -> AsyncIterator[NamedTuple]:
+        """
+        Асинхронный потоковый вариант parse()
+
+        По умолчанию выдает результат parse_async().
+        """
+        for item in await self.parse_async():
+            yield item
+
+    def save_iter(self, records: Iterable[NamedTuple], batch_size: Optional[int] = None) -> int:
+        """
+        Сохраняет записи в БД пачками по мере их поступления
+
+        Каждая пачка сохраняется отдельным save_to_db(), поэтому первые
+        записи попадают в БД, пока разбор еще идет, а ошибка в конце
+        запуска не отменяет уже сохраненные пачки. Валидаторы загруженных
+        страниц записываются в кэш, только если сохранились все пачки.
+
+        Args:
+            records: Записи (обычно parse_iter())
+            batch_size: Размер пачки (по умолчанию PARSER_BATCH_SIZE)
+
+        Returns:
+            Количество сохраненных записей (сумма ответов save_to_db)
+        """
+        self.save_errors = 0
+        total = 0
+        for batch in batched(records, batch_size or self.batch_size):
+            total += self.save_to_db(batch)
+        self._finish_save_iter()
+        return total
+
+    async def save_iter_async(
+        self, records: AsyncIterable[NamedTuple], batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Асинхронный вариант save_iter() для parse_iter_async()
+
+        Пачки сохраняются в отдельном потоке, загрузка страниц
+        в это время продолжается.
+        """
+        size = batch_size or self.batch_size
+        self.save_errors = 0
+        total = 0
+        batch: List[NamedTuple] = []
+        async for item in records:
+            batch.append(item)
+            if len(batch) >= size:
+                total += await asyncio.to_thread(self.save_to_db, batch)
+                batch = []
+        if batch:
+            total += await asyncio.to_thread(self.save_to_db, batch)
+        self._finish_save_iter()
+        return total
+
+    def _finish_save_iter(self) -> None:
+        """Завершение save_iter: валидаторы в кэш, если все пачки сохранены"""
+        if self.save_errors:
+            logger.warning(
+                f"Не сохранено пачек: {self.save_errors}, страницы будут загружены заново при следующем запуске"
+            )
+            self._pending_validators.clear()
+            return
+        self.commit_validators()
+
+    def save_to_db(self, data: List[NamedTuple]) -> int:
+        """
+        Сохраняет пачку записей в БД
+
+        При ошибке увеличивает self.save_errors.
+
+        Returns:
+            Количество сохраненных записей (0 при ошибке)
+        """
+        raise NotImplementedError("Метод save_to_db() должен быть реализован в дочернем классе")
     
-    def to_json(self, data: List[Dict]) -> str:
+    def to_json(self, data: List) -> str:
         """
         Преобразование данных в JSON строку
+
+        Записи NamedTuple сериализуются как объекты с именами полей,
+        даты - в формате ISO, Decimal - строкой без потери точности.
         """
-        return json.dumps(data, ensure_ascii=False, indent=2)
+        rows = [item._asdict() if hasattr(item, "_asdict") else item for item in data]
+        return json.dumps(rows, ensure_ascii=False, indent=2, default=_json_default)
 
     # Подключение к БД
     def _get_db_session(self) -> Session:
@@ -49,6 +354,23 @@ class BaseParser:
     def _get_source_by_name(self, session: Session, name: str) -> Optional[Source]:
         """Получает источник по имени"""
         return session.query(Source).filter(Source.name == name).first()
+
+    def _bulk_insert(self, session: Session, model, source_id: int, data: List[NamedTuple], **columns) -> None:
+        """
+        Вставляет записи массовой загрузкой (см. bulk_load, способ из DB_LOADER)
+
+        ORM объекты не создаются: поля записи совпадают с колонками модели,
+        строки передаются executemany или COPY.
+
+        Args:
+            session: Сессия БД
+            model: ORM модель таблицы
+            source_id: id источника
+            data: Записи NamedTuple
+            columns: Одинаковые для всех строк значения дополнительных колонок
+        """
+        rows = [{"source_id": source_id, **columns, **item._asdict()} for item in data]
+        bulk_load(session, model, rows)
     
     def get_parsed_data(self) -> str:
         """
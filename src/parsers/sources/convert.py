@@ -0,0 +1,32 @@
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+# Значение для пустых и нечисловых ячеек
+ZERO = Decimal(0)
+
+
+def convert_column(values: Iterable[str], parse: Callable[[str], T]) -> List[T]:
+    """
+    Преобразует колонку таблицы в типизированные значения
+
+    Повторяющиеся значения (нули, прочерки, одинаковые цены) разбираются
+    один раз на колонку.
+
+    Args:
+        values: Тексты ячеек колонки
+        parse: Функция разбора одной ячейки
+
+    Returns:
+        Значения в том же порядке
+    """
+    cache: Dict[str, T] = {}
+    result: List[T] = []
+    for value in values:
+        try:
+            converted = cache[value]
+        except KeyError:
+            converted = cache[value] = parse(value)
+        result.append(converted)
+    return result
@@ -1,142 +1,180 @@
-from .base_parser import BaseParser
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from .base_parser import BaseParser, batched
+from .records import DohodDividend
+from .convert import ZERO, convert_column
+from typing import Iterable, Iterator, List, Optional, Set
 import re
+import hashlib
 import logging
-from datetime import datetime
-from src.database import Source
+from datetime import date, datetime
+from decimal import Decimal
+from src.database import Source, bulk_load
 
 
 logger = logging.getLogger(__name__)
 
 CURRENCY_RE = re.compile(r"^(RUB|USD|EUR|CNY|HKD|GBP)$", re.IGNORECASE)
+# Числа в ячейках: с разделителями тысяч и без
+NUMBER_RE = re.compile(r"-?\d+(?:[ \u00A0\u202F]\d{3})*(?:[.,]\d+)?")
+PERCENT_RE = re.compile(r"-?\d+(?:[.,]\d+)?")
+NUMBER_TRANSLATION = str.maketrans({" ": None, "\u00A0": None, "\u202F": None, ",": "."})
+# Начало таблицы дивидендов (для разбора только этого участка страницы)
+DIVIDEND_TABLE_RE = re.compile(r"""<table\b[^>]*\bid\s*=\s*["']?table-dividend(?![\w-])""", re.IGNORECASE)
+# Поля, которые обновляются в текущей версии на месте (не создают новую версию)
+TYPE1_FIELDS = ("company_name", "sector", "currency", "yield_percent", "capitalization_mln_rub", "dsi")
+
+
+def content_hash(item: DohodDividend) -> str:
+    """
+    Хэш версии дивиденда: тикер, период, выплата и дата закрытия реестра
+
+    Выплата нормализуется, поэтому 34.840 и 34.84 дают один хэш.
+    """
+    payment = item.payment_per_share
+    record_date = item.record_date_estimate
+    key = "|".join((
+        item.ticker,
+        item.period,
+        str(payment.normalize()) if isinstance(payment, Decimal) else str(payment or ""),
+        record_date.isoformat() if record_date else "",
+    ))
+    return hashlib.sha256(key.encode()).hexdigest()
+
 
 class DohodParser(BaseParser):
     def __init__(self):
         super().__init__("https://www.dohod.ru/ik/analytics/dividend")
+        # Хэши версий, встреченные в текущем запуске save_iter (None - вне запуска)
+        self._seen_hashes: Optional[Set[str]] = None
+
+    def parse(self) -> List[DohodDividend]:
+        return list(self.parse_iter())
 
-    def parse(self) -> List[Dict]:
+    def parse_iter(self) -> Iterator[DohodDividend]:
+        """Потоковый парсинг: записи выдаются пачками по self.batch_size строк"""
         html = self.fetch_html()
         if not html:
-            return []
+            if self.not_modified:
+                logger.info("Страница дивидендов не изменилась с прошлого запуска (304)")
+            return
 
-        soup = BeautifulSoup(html, "html.parser")
+        doc = self.parse_region(html, DIVIDEND_TABLE_RE, "table")
 
         # таблица по id
-        table = soup.find("table", {"id": "table-dividend"})
+        table = doc.css_first("table#table-dividend")
         if not table:
-            for t in soup.find_all("table"):
-                th_texts = [th.get_text(" ", strip=True).lower() for th in t.find_all("th")]
+            for t in doc.css("table"):
+                th_texts = [th.text(" ", strip=True).lower() for th in t.css("th")]
                 if any("ticker" in x for x in th_texts):
                     table = t
                     break
 
         if not table:
             logger.error("Таблица table-dividend не найдена")
-            return []
+            return
 
         # определяю тело таблицы
-        tbody = table.find("tbody") or table
+        tbody = table.css_first("tbody") or table
 
-        data_rows = tbody.find_all("tr")
-        if data_rows and data_rows[0].find_all("th"):
+        data_rows = tbody.css("tr")
+        if data_rows and data_rows[0].css("th"):
             data_rows = data_rows[1:]
 
-        data_list: List[Dict] = []
+        for raw_rows in batched(self._iter_rows(data_rows), self.batch_size):
+            yield from self._to_records(raw_rows)
 
+    def _iter_rows(self, data_rows) -> Iterator[List[str]]:
+        """
+        Тексты ячеек строк в порядке полей DohodDividend
+
+        Числа и даты разбираются позже по колонкам (см. _to_records).
+        """
         for row in data_rows:
-            cls = row.get("class") or []
+            cls = row.classes
             if "filter-row" in cls:
                 continue
 
-            cells = row.find_all("td")
+            cells = row.css("td")
             if len(cells) < 11:
                 continue
 
             ticker_cell = cells[0]
             name_cell = cells[1] if len(cells) > 1 else cells[0]
 
-            link = ticker_cell.find("a", href=True) or name_cell.find("a", href=True)
-            company_name = (name_cell.get_text(" ", strip=True) or ticker_cell.get_text(" ", strip=True))
+            link = ticker_cell.css_first("a[href]") or name_cell.css_first("a[href]")
+            company_name = (name_cell.text(" ", strip=True) or ticker_cell.text(" ", strip=True))
 
             ticker = ""
-            if link and link.get("href"):
-                ticker = link["href"].rstrip("/").split("/")[-1].upper()
-
-            sector = cells[2].get_text(" ", strip=True)
-            period = cells[3].get_text(" ", strip=True)
-
-            payment_val = self._parse_float(cells[4].get_text(" ", strip=True))
+            if link and link.attr("href"):
+                ticker = link.attr("href").rstrip("/").split("/")[-1].upper()
 
-            currency = cells[5].get_text(" ", strip=True).upper()
+            currency = cells[5].text(" ", strip=True).upper()
             if not CURRENCY_RE.match(currency):
                 currency = ""
 
-            yield_percent = self._parse_percent(cells[6].get_text(" ", strip=True))
-
-            record_date = self._parse_date(cells[8].get_text(" ", strip=True))
-
-            capitalization = self._parse_float(cells[9].get_text(" ", strip=True))
-            dsi_index = self._parse_float(cells[10].get_text(" ", strip=True))
-
-            data_list.append(
-                {
-                    "ticker": ticker,
-                    "company_name": company_name,
-                    "sector": sector,
-                    "period": period,
-                    "payment_per_share": payment_val,
-                    "currency": currency,
-                    "yield_percent": yield_percent,
-                    "record_date_estimate": record_date,
-                    "capitalization_mln_rub": capitalization,
-                    "dsi": dsi_index,
-                }
-            )
-
-        return data_list
+            yield [
+                ticker,
+                company_name,
+                cells[2].text(" ", strip=True),   # sector
+                cells[3].text(" ", strip=True),   # period
+                cells[4].text(" ", strip=True),   # payment_per_share
+                currency,
+                cells[6].text(" ", strip=True),   # yield_percent
+                cells[8].text(" ", strip=True),   # record_date_estimate
+                cells[9].text(" ", strip=True),   # capitalization_mln_rub
+                cells[10].text(" ", strip=True),  # dsi
+            ]
+
+    def _to_records(self, rows: List[List[str]]) -> List[DohodDividend]:
+        """
+        Преобразует тексты ячеек в записи DohodDividend
+
+        Числа (сразу в Decimal) и даты разбираются по колонке за раз.
+        """
+        if not rows:
+            return []
 
-    def _parse_float(self, text: str) -> float:
+        parsers = {
+            "payment_per_share": self._parse_decimal,
+            "yield_percent": self._parse_percent,
+            "record_date_estimate": self._parse_date,
+            "capitalization_mln_rub": self._parse_decimal,
+            "dsi": self._parse_decimal,
+        }
+        columns: List[List] = [list(column) for column in zip(*rows)]
+        for position, field in enumerate(DohodDividend._fields):
+            if field in parsers:
+                columns[position] = convert_column(columns[position], parsers[field])
+
+        return [DohodDividend._make(values) for values in zip(*columns)]
+
+    def _parse_decimal(self, text: str) -> Decimal:
         if text is None:
-            return 0.0
+            return ZERO
         t = text.strip()
         if not t or t.lower() in {"n/a", "na", "-", "—"}:
-            return 0.0
+            return ZERO
 
-        m = re.search(r"-?\d+(?:[ \u00A0\u202F]\d{3})*(?:[.,]\d+)?", t.replace("−", "-"))
+        m = NUMBER_RE.search(t.replace("−", "-"))
         if not m:
-            return 0.0
-
-        num = (
-            m.group(0)
-            .replace(" ", "")
-            .replace("\u00A0", "")
-            .replace("\u202F", "")
-            .replace(",", ".")
-        )
-        try:
-            return float(num)
-        except ValueError:
-            return 0.0
+            return ZERO
 
-    def _parse_percent(self, text: str) -> float:
+        # найденное регуляркой число всегда корректно для Decimal
+        return Decimal(m.group(0).translate(NUMBER_TRANSLATION))
+
+    def _parse_percent(self, text: str) -> Decimal:
         if text is None:
-            return 0.0
+            return ZERO
         t = text.strip().replace("%", "")
         if not t or t.lower() in {"n/a", "na", "-", "—"}:
-            return 0.0
+            return ZERO
 
-        m = re.search(r"-?\d+(?:[.,]\d+)?", t.replace("−", "-"))
+        m = PERCENT_RE.search(t.replace("−", "-"))
         if not m:
-            return 0.0
+            return ZERO
 
-        num = m.group(0).replace(",", ".")
-        try:
-            return float(num)
-        except ValueError:
-            return 0.0
+        return Decimal(m.group(0).replace(",", "."))
 
-    def _parse_date(self, text: str):
+    def _parse_date(self, text: str) -> Optional[date]:
         if not text:
             return None
         if text.strip().lower() in {"n/a", "na", "-", "—"}:
@@ -150,52 +188,166 @@ class DohodParser(BaseParser):
         except ValueError:
             return None
 
-    def save_to_db(self, data: List[Dict]) -> None:
-        """Сохранение данных в БД через SQLAlchemy"""
+    def _get_source(self, session) -> Optional[Source]:
+        """Источник Dohod в таблице source"""
+        return session.query(Source).filter(
+            (Source.name == "Dohod") | (Source.name == "dohod.ru")
+        ).first()
+
+    def _close_missing(self, session, source_id: int, seen: Set[str], now: datetime) -> int:
+        """
+        Закрывает текущие версии, которых нет среди seen (выплата пропала
+        со страницы или изменилась), а также старые строки без хэша
+
+        Returns:
+            Количество закрытых версий
+        """
+        from src.database import DohodDiv
+        from sqlalchemy import or_, update
+
+        stmt = (
+            update(DohodDiv)
+            .where(
+                DohodDiv.source_id == source_id,
+                DohodDiv.valid_to.is_(None),
+                or_(DohodDiv.content_hash.is_(None), DohodDiv.content_hash.not_in(seen)),
+            )
+            .values(valid_to=now)
+        )
+        return session.execute(stmt).rowcount
+
+    def save_iter(self, records: Iterable[DohodDividend], batch_size: Optional[int] = None) -> int:
+        """
+        Сохранение пачками (см. BaseParser.save_iter)
+
+        Пачки только открывают новые версии и обновляют текущие; версии,
+        которых не было ни в одной пачке, закрываются после всего запуска.
+        """
+        self._seen_hashes = set()
+        try:
+            return super().save_iter(records, batch_size)
+        finally:
+            self._seen_hashes = None
+
+    def _finish_save_iter(self) -> None:
+        """
+        Закрывает отсутствующие версии, если все пачки сохранены
+
+        После неудачной пачки ее версии не открыты, и закрытие старых
+        убрало бы эти дивиденды из текущих. Валидаторы страницы пишутся
+        в кэш после закрытия (см. BaseParser._finish_save_iter).
+        """
+        if self.save_errors:
+            logger.warning("Версии дивидендов не закрываются: часть пачек не сохранена")
+        elif self._seen_hashes:
+            self._close_versions(self._seen_hashes)
+        super()._finish_save_iter()
+
+    def _close_versions(self, seen: Set[str]) -> None:
+        """Закрывает отсутствующие в запуске версии отдельной транзакцией"""
+        session = None
+        try:
+            session = self._get_db_session()
+            source = self._get_source(session)
+            if not source:
+                return
+            closed = self._close_missing(session, source.id, seen, datetime.utcnow())
+            session.commit()
+            logger.info(f"Закрыто {closed} устаревших версий дивидендов.")
+        except Exception as e:
+            logger.error(f"Ошибка закрытия версий дивидендов: {e}", exc_info=True)
+            self.save_errors += 1
+            if session:
+                session.rollback()
+        finally:
+            if session:
+                session.close()
+
+    def save_to_db(self, data: List[DohodDividend]) -> int:
+        """
+        Сохранение дивидендов версиями (SCD type 2) через SQLAlchemy
+
+        Версия определяется content_hash (тикер, период, выплата, дата
+        реестра). Для нового хэша открывается версия (valid_from = сейчас),
+        у существующей текущей версии на месте обновляются TYPE1_FIELDS.
+        При вызове вне save_iter data считается всей таблицей и текущие
+        версии, которых в ней нет, закрываются (valid_to = сейчас).
+
+        Returns:
+            Количество открытых версий
+        """
         if not data:
             logger.warning("Нет данных для сохранения в БД.")
-            return
+            return 0
+
+        versions = {}
+        for item in data:
+            versions.setdefault(content_hash(item), item)
 
         session = None
         try:
             session = self._get_db_session()
             # Получаю источник
-            source = session.query(Source).filter(
-                (Source.name == "Dohod") | (Source.name == "dohod.ru")
-            ).first()
+            source = self._get_source(session)
             
             if not source:
                 logger.error("Источник 'Dohod' не найден в БД. Проверь таблицу source.")
-                return
+                self.save_errors += 1
+                return 0
 
             # Импортирую модель
             from src.database import DohodDiv
-            from decimal import Decimal
-
-            # Вставляю данные
-            for item in data:
-                div = DohodDiv(
-                    source_id=source.id,
-                    ticker=item.get('ticker'),
-                    company_name=item.get('company_name'),
-                    sector=item.get('sector'),
-                    period=item.get('period'),
-                    payment_per_share=Decimal(str(item.get('payment_per_share', 0))),
-                    currency=item.get('currency'),
-                    yield_percent=Decimal(str(item.get('yield_percent', 0))),
-                    record_date_estimate=item.get('record_date_estimate'),
-                    capitalization_mln_rub=Decimal(str(item.get('capitalization_mln_rub', 0))),
-                    dsi=Decimal(str(item.get('dsi', 0))),
+            from sqlalchemy import select, update
+
+            now = datetime.utcnow()
+            current = {
+                row.content_hash: row
+                for row in session.execute(
+                    select(DohodDiv.id, DohodDiv.content_hash, *(getattr(DohodDiv, f) for f in TYPE1_FIELDS))
+                    .where(
+                        DohodDiv.source_id == source.id,
+                        DohodDiv.valid_to.is_(None),
+                        DohodDiv.content_hash.in_(list(versions)),
+                    )
                 )
-                session.add(div)
+            }
+
+            # Открываю новые версии одной массовой вставкой
+            opened = [
+                {"source_id": source.id, "content_hash": key, "valid_from": now, **item._asdict()}
+                for key, item in versions.items() if key not in current
+            ]
+            bulk_load(session, DohodDiv, opened)
+
+            # Обновляю изменившиеся поля текущих версий
+            changed = [
+                {"id": row.id, **{f: getattr(item, f) for f in TYPE1_FIELDS}}
+                for key, item in versions.items()
+                if (row := current.get(key)) is not None
+                and any(getattr(row, f) != getattr(item, f) for f in TYPE1_FIELDS)
+            ]
+            if changed:
+                session.execute(update(DohodDiv), changed)
+
+            closed = 0
+            if self._seen_hashes is None:
+                closed = self._close_missing(session, source.id, set(versions), now)
 
             session.commit()
-            logger.info(f"Успешно сохранено {len(data)} записей дивидендов.")
+            # Встреченными считаются только версии зафиксированной пачки
+            if self._seen_hashes is not None:
+                self._seen_hashes.update(versions)
+            logger.info(
+                f"Дивиденды: открыто {len(opened)}, обновлено {len(changed)}, закрыто {closed} версий."
+            )
+            return len(opened)
 
         except Exception as e:
             logger.error(f"Ошибка сохранения в БД: {e}", exc_info=True)
+            self.save_errors += 1
             if session:
                 session.rollback()
+            return 0
         finally:
             if session:
                 session.close()
@@ -209,17 +361,14 @@ def run_dohod_parser():
         parser = DohodParser()
         logger.info("Начинаем парсинг Dohod.ru...")
 
-        data = parser.parse()
-
-        if data:
-            logger.info(f"Спарсено {len(data)} записей.")
-
-            # Сохраняю в БД
-            parser.save_to_db(data)
+        # Сохраняю в БД пачками по мере разбора
+        saved = parser.save_iter(parser.parse_iter())
 
+        if saved:
+            logger.info(f"Сохранено {saved} новых версий дивидендов.")
             logger.info("Готово.")
         else:
-            logger.warning("Пустой результат парсинга.")
+            logger.warning("Новых версий нет (парсинг пуст или дивиденды не изменились).")
 
     except Exception as e:
         logger.error(f"Ошибка запуска: {e}", exc_info=True)
@@ -0,0 +1,208 @@
+import os
+import re
+from typing import Callable, Dict, List, Optional, Pattern
+
+from bs4 import BeautifulSoup
+
+# HTML бэкенд по умолчанию (переопределяется переменной окружения)
+HTML_BACKEND = os.getenv("PARSER_HTML_BACKEND", "bs4")
+
+
+class HTMLNode:
+    """
+    Узел HTML документа - общий интерфейс для всех бэкендов
+
+    Парсеры работают только через CSS селекторы и методы этого класса,
+    поэтому один и тот же код извлечения работает с любым бэкендом.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def tag(self) -> str:
+        """Имя тега"""
+        raise NotImplementedError
+
+    @property
+    def classes(self) -> List[str]:
+        """Список CSS классов узла"""
+        return (self.attr("class") or "").split()
+
+    def css(self, selector: str) -> List["HTMLNode"]:
+        """Все потомки, подходящие под CSS селектор, в порядке документа"""
+        raise NotImplementedError
+
+    def css_first(self, selector: str) -> Optional["HTMLNode"]:
+        """Первый потомок, подходящий под CSS селектор, или None"""
+        raise NotImplementedError
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        """
+        Текст узла и его потомков
+
+        Args:
+            separator: Разделитель между текстовыми фрагментами
+            strip: Обрезать пробелы у каждого фрагмента и пропускать пустые
+        """
+        raise NotImplementedError
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Значение атрибута (для class - строка через пробел)"""
+        raise NotImplementedError
+
+
+class BS4Node(HTMLNode):
+    """Узел BeautifulSoup"""
+
+    __slots__ = ()
+
+    @property
+    def tag(self) -> str:
+        return self._node.name
+
+    @property
+    def classes(self) -> List[str]:
+        return self._node.get("class") or []
+
+    def css(self, selector: str) -> List[HTMLNode]:
+        return [BS4Node(node) for node in self._node.select(selector)]
+
+    def css_first(self, selector: str) -> Optional[HTMLNode]:
+        node = self._node.select_one(selector)
+        return BS4Node(node) if node is not None else None
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        return self._node.get_text(separator, strip=strip)
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._node.get(name)
+        if value is None:
+            return default
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+
+class LexborNode(HTMLNode):
+    """Узел selectolax (движок lexbor)"""
+
+    __slots__ = ()
+
+    @property
+    def tag(self) -> str:
+        return self._node.tag
+
+    def css(self, selector: str) -> List[HTMLNode]:
+        return [LexborNode(node) for node in self._node.css(selector)]
+
+    def css_first(self, selector: str) -> Optional[HTMLNode]:
+        node = self._node.css_first(selector)
+        return LexborNode(node) if node is not None else None
+
+    def text(self, separator: str = "", strip: bool = False) -> str:
+        return self._node.text(separator=separator, strip=strip)
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._node.attributes.get(name)
+        return default if value is None else value
+
+
+class HTMLBackend:
+    """Бэкенд, строящий документ из HTML строки"""
+
+    name = ""
+
+    def parse(self, html: str) -> HTMLNode:
+        """Разбирает HTML и возвращает корневой узел документа"""
+        raise NotImplementedError
+
+
+class BS4Backend(HTMLBackend):
+    """BeautifulSoup с выбранным tree builder'ом (html.parser или lxml)"""
+
+    def __init__(self, features: str = "html.parser"):
+        self.features = features
+        self.name = "bs4" if features == "html.parser" else f"bs4-{features}"
+
+    def parse(self, html: str) -> HTMLNode:
+        return BS4Node(BeautifulSoup(html, self.features))
+
+
+class SelectolaxBackend(HTMLBackend):
+    """selectolax на движке lexbor (C)"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError as e:
+            raise ImportError("Для бэкенда selectolax установите пакет selectolax") from e
+        self._parser_cls = LexborHTMLParser
+
+    def parse(self, html: str) -> HTMLNode:
+        return LexborNode(self._parser_cls(html).root)
+
+
+BACKENDS: Dict[str, Callable[[], HTMLBackend]] = {
+    "bs4": lambda: BS4Backend("html.parser"),
+    "bs4-lxml": lambda: BS4Backend("lxml"),
+    "selectolax": SelectolaxBackend,
+}
+
+
+def get_backend(name: Optional[str] = None) -> HTMLBackend:
+    """
+    Создает HTML бэкенд по имени
+
+    Args:
+        name: bs4 | bs4-lxml | selectolax (по умолчанию PARSER_HTML_BACKEND)
+
+    Returns:
+        Экземпляр бэкенда
+    """
+    name = name or HTML_BACKEND
+    factory = BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"Неизвестный HTML бэкенд '{name}'. Доступны: {', '.join(BACKENDS)}")
+    return factory()
+
+
+_TAG_PATTERNS: Dict[str, Pattern] = {}
+
+
+def slice_element(html: str, opening: Pattern, tag: str) -> Optional[str]:
+    """
+    Вырезает из HTML элемент целиком, не разбирая остальной документ
+
+    Находит открывающий тег по регулярному выражению и идет по открывающим и
+    закрывающим тегам того же имени до парного закрывающего тега.
+
+    Args:
+        html: Исходный HTML
+        opening: Регулярное выражение, совпадающее с началом открывающего тега
+        tag: Имя тега элемента (div, table, ...)
+
+    Returns:
+        HTML элемента или None, если элемент не найден или не закрыт
+    """
+    match = opening.search(html)
+    if not match:
+        return None
+
+    tag_re = _TAG_PATTERNS.get(tag)
+    if tag_re is None:
+        tag_re = _TAG_PATTERNS[tag] = re.compile(rf"<(/?){tag}\b[^>]*>", re.IGNORECASE)
+
+    depth = 0
+    for tag_match in tag_re.finditer(html, match.start()):
+        if tag_match.group(1):
+            depth -= 1
+            if depth == 0:
+                return html[match.start():tag_match.end()]
+        else:
+            depth += 1
+    return None
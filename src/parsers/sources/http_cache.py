@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+
+class HTTPCache:
+    """
+    Дисковый кэш валидаторов HTTP ответов для условных запросов
+
+    Для каждого URL хранятся только ETag и Last-Modified: на ответ 304
+    парсер пропускает страницу, а не разбирает ее повторно, поэтому тело
+    ответа не нужно. Записи лежат в отдельных JSON файлах; при превышении max_bytes удаляются
+    записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 100 * 1024 * 1024):
+        """
+        directory: Каталог для файлов кэша (создается при необходимости)
+        max_bytes: Максимальный суммарный размер кэша в байтах
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Возвращает запись кэша {url, etag, last_modified} или None
+        """
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """
+        Заголовки условного запроса (If-None-Match / If-Modified-Since) для URL
+        """
+        entry = self.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Сохраняет валидаторы ответа, если есть хотя бы один
+        """
+        if not etag and not last_modified:
+            return
+
+        entry = {"url": url, "etag": etag, "last_modified": last_modified}
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def touch(self, url: str) -> None:
+        """Отмечает обращение к записи (для вытеснения по давности)"""
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Удаляет самые старые записи, пока кэш больше max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.name.endswith(".json"):
+                    continue
+                stat = item.stat()
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,77 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Асинхронный token bucket
+
+    Корзина пополняется со скоростью rate токенов в секунду и вмещает
+    не более capacity токенов; каждый запрос забирает один токен.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        rate: Скорость пополнения, токенов в секунду
+        capacity: Размер корзины (допустимый всплеск), по умолчанию max(1, rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate должен быть больше 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        # Блокировка привязывается к циклу событий, поэтому создается для
+        # каждого цикла: парсер может запускать asyncio.run несколько раз
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _loop_lock(self) -> asyncio.Lock:
+        """Блокировка корзины для текущего цикла событий"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self) -> None:
+        """Ждет, пока в корзине появится токен, и забирает его"""
+        async with self._loop_lock():
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class HostRateLimiter:
+    """Набор token bucket'ов, по одному на хост"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        rate: Скорость запросов к одному хосту, в секунду
+        capacity: Допустимый всплеск запросов к одному хосту
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        """Возвращает корзину для хоста из URL"""
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+            self._buckets[host] = bucket
+        return bucket
+
+    async def acquire(self, url: str) -> None:
+        """Ждет разрешения на запрос к хосту из URL"""
+        await self.bucket_for(url).acquire()
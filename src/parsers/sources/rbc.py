@@ -1,252 +1,481 @@
 from .base_parser import BaseParser
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from .rate_limiter import HostRateLimiter
+from .html_backend import HTMLNode
+from .records import RBCArticle
+from typing import AsyncIterator, List, Optional, Tuple
+import aiohttp
+import asyncio
+import os
 import re
-import time
 import logging
 
 logger = logging.getLogger(__name__)
+
+# Максимальное количество статей за один запуск
+MAX_ARTICLES = 30
+
+# Настройки обхода статей (переопределяются переменными окружения)
+CRAWL_WORKERS = int(os.getenv("RBC_CRAWL_WORKERS", "8"))
+RATE_PER_HOST = float(os.getenv("RBC_RATE_PER_HOST", "5"))
+RATE_BURST = float(os.getenv("RBC_RATE_BURST", "5"))
+# Статей в одной пачке сохранения (за запуск их не больше MAX_ARTICLES)
+SAVE_BATCH_SIZE = int(os.getenv("RBC_SAVE_BATCH_SIZE", "10"))
+
+# Контейнеры с текстом статьи: div/section, в классе которых есть одно из слов
+CONTENT_SELECTOR = ", ".join(
+    f'{tag}[class*="{word}" i]'
+    for tag in ('div', 'section')
+    for word in ('article', 'text', 'content', 'body', 'story')
+)
+
+# Типы ссылок на главной странице
+LINK_ARTICLE = "article"  # новостная ссылка с id статьи
+LINK_PAGE = "page"  # новостная ссылка без id: статья, если текст ссылки длиннее 15 символов
+LINK_SECTION = "section"  # раздел, сюжет-подборка или ссылка с utm-меткой
+LINK_IGNORE = "ignore"  # не новость или внешний сайт
+
+# Признаки ссылки: одно регулярное выражение находит за проход по href все
+# признаки сразу. Каждая ветка начинается с литерала, поэтому движок
+# пропускает неподходящие символы без проверки веток; шаблоны не захватывают
+# завершающий "/", чтобы соседние признаки (раздел и id статьи) не перекрывались
+LINK_TOKENS_RE = re.compile(
+    r"""
+      /(?:
+          (?P<section>
+              (?:politics|economics|business|society|technology|finance)/\?
+            | story/68822f889a79475439ba67bb
+          )
+        | (?P<news>
+              (?:article|news|story|politics|economics|business|society|technology|finance
+                |rbcfreenews|life|style|books|person|designs)(?=/)
+          )
+        | (?P<article_id>\d{2}/\d{2}/\d{4}(?=/[a-f0-9]) | [a-f0-9]{24})
+      )
+    | \?(?P<utm>utm_source=)
+    | s(?:(?P<story>tory/68822f889a79475439ba67bb) | (?P<style>tyle\.rbc\.ru(?=/)))
+    | p(?P<pro>ro\.rbc\.ru/(?:demo|books)(?=/))
+    | r(?P<rbc>bc\.ru)
+    """,
+    re.VERBOSE,
+)
+SECTION_TOKENS = frozenset(("section", "utm", "story"))
+NEWS_TOKENS = frozenset(("news", "style", "pro"))
+RBC_TOKENS = frozenset(("rbc", "style", "pro"))
+
+
+def classify_link(href: str) -> str:
+    """
+    Определяет тип ссылки главной страницы за один проход по href
+
+    Returns:
+        LINK_ARTICLE, LINK_PAGE, LINK_SECTION или LINK_IGNORE
+    """
+    tokens = {match.lastgroup for match in LINK_TOKENS_RE.finditer(href)}
+
+    if not (href.startswith('/') or not RBC_TOKENS.isdisjoint(tokens)):
+        return LINK_IGNORE
+    if not SECTION_TOKENS.isdisjoint(tokens):
+        return LINK_SECTION
+    if NEWS_TOKENS.isdisjoint(tokens):
+        return LINK_IGNORE
+    return LINK_ARTICLE if "article_id" in tokens else LINK_PAGE
+
+
 class RBCParser(BaseParser):
     """Парсер для сайта РБК - главная страница с новостями"""
     
-    def __init__(self):
-        """Инициализация парсера для главной страницы РБК"""
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        rate_per_host: Optional[float] = None,
+        rate_burst: Optional[float] = None,
+    ):
+        """
+        Инициализация парсера для главной страницы РБК
+
+        Args:
+            workers: Количество параллельных загрузчиков статей
+            rate_per_host: Лимит запросов в секунду к одному хосту
+            rate_burst: Допустимый всплеск запросов к одному хосту
+        """
         super().__init__("https://www.rbc.ru/")
+        self.workers = workers or CRAWL_WORKERS
+        self.batch_size = SAVE_BATCH_SIZE
+        self.rate_limiter = HostRateLimiter(
+            rate=rate_per_host or RATE_PER_HOST,
+            capacity=rate_burst or RATE_BURST,
+        )
     
-    def parse(self) -> List[Dict]:
+    def parse(self) -> List[RBCArticle]:
         """
         Парсинг новостей с сайта РБК
         1. Сканирует главную страницу
-        2. Находит URL новостей
-        3. Переходит по каждому URL
-        4. Извлекает заголовки со страниц новостей
+        2. Находит URL новостей и отбрасывает уже сохраненные в БД
+        3. Параллельно обходит URL с ограничением частоты запросов к хосту
+        4. Извлекает заголовок, текст и метаданные со страницы новости
         
         Returns:
-            Список словарей с данными о новостях:
+            Список записей RBCArticle:
             - title: заголовок новости (полный, со страницы статьи)
             - url: ссылка на новость
             - text: текст новости
+            - description, published_at: метаданные статьи
         """
-        html = self.fetch_html()
-        if not html:
+        return asyncio.run(self.parse_async())
+
+    async def parse_async(self) -> List[RBCArticle]:
+        """
+        Асинхронный парсинг новостей РБК
+
+        Главная страница и страницы статей загружаются через общий
+        ограниченный пул соединений. Статьи обходят self.workers
+        параллельных загрузчиков, частота запросов к каждому хосту
+        ограничена token bucket'ом.
+
+        Returns:
+            Список записей RBCArticle (как в parse()) в порядке главной страницы
+        """
+        try:
+            async with self._create_async_session() as session:
+                news_urls = await self._news_urls_async(session)
+                articles = {url: article async for url, article in self._crawl_articles(news_urls, session)}
+
+            return [articles[url] for url in news_urls if url in articles]
+
+        except Exception as e:
+            logger.error(f"Критическая ошибка при парсинге: {e}", exc_info=True)
             return []
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        news_urls = []
-        
+
+    async def parse_iter_async(self) -> AsyncIterator[RBCArticle]:
+        """
+        Потоковый асинхронный парсинг новостей РБК
+
+        Статьи выдаются по мере загрузки (в порядке готовности, а не
+        главной страницы), поэтому их можно сохранять, пока обход еще идет.
+
+        Yields:
+            Записи RBCArticle
+        """
         try:
-            # Нахожу все URL новостей на главной странице
-            all_links = soup.find_all('a', href=True)
-            
-            # Паттерны для новостей
-            news_patterns = [
-                '/article/', '/news/', '/story/',
-                '/politics/', '/economics/', '/business/',
-                '/society/', '/technology/', '/finance/',
-                '/rbcfreenews/', '/life/', '/style/',
-                '/books/', '/person/', '/designs/',
-                'pro.rbc.ru/demo/', 'pro.rbc.ru/books/',
-                'style.rbc.ru/'
-            ]
-            
-            seen_urls = set()
-            for link in all_links:
-                href = link.get('href', '')
-                text = link.get_text(strip=True)
-                
-                is_news_link = any(pattern in href for pattern in news_patterns)
-                is_rbc_link = 'rbc.ru' in href or href.startswith('/')
-                
-                is_section = any(exclude in href for exclude in ['/politics/?', '/economics/?', '/business/?', 
-                                                                  '/society/?', '/technology/?', '/finance/?',
-                                                                  '?utm_source=', 'story/68822f889a79475439ba67bb'])
-                
-                # Проверяю, что это ссылка на конкретную статью
-                has_article_id = bool(re.search(r'/\d{2}/\d{2}/\d{4}/[a-f0-9]+', href)) or bool(re.search(r'/[a-f0-9]{24}', href))
-                
-                if is_news_link and is_rbc_link and not is_section and (has_article_id or len(text) > 15):
-                    # Формирую полный URL
-                    if href.startswith('http'):
-                        full_url = href
-                    else:
-                        full_url = f"https://www.rbc.ru{href}"
-                    
-                    # Убираю параметры для дедупликации
-                    clean_url = full_url.split('?')[0]
-                    
-                    if clean_url not in seen_urls:
-                        seen_urls.add(clean_url)
-                        news_urls.append(full_url)
-            
-            # Перехожу по каждому URL и извлекаю заголовки и текст
-            news_items = []
-            for url in news_urls[:30]:
-                try:
-                    title = self._extract_title_from_page(url)
-                    text = self._extract_text_from_page(url)
-                    if title:
-                        news_items.append({
-                            "title": title,
-                            "url": url,
-                            "text": text
-                        })
-                    time.sleep(0.1)
-                except Exception as e:
-                    logger.warning(f"Ошибка при парсинге {url}: {e}")
-                    continue
-            
-            return news_items
-            
+            async with self._create_async_session() as session:
+                news_urls = await self._news_urls_async(session)
+                async for _, article in self._crawl_articles(news_urls, session):
+                    yield article
+
         except Exception as e:
             logger.error(f"Критическая ошибка при парсинге: {e}", exc_info=True)
+
+    async def _news_urls_async(self, session: aiohttp.ClientSession) -> List[str]:
+        """
+        Загружает главную страницу и возвращает URL новых статей для обхода
+        """
+        html = await self.fetch_html_async(session=session)
+        if not html:
+            if self.not_modified:
+                logger.info("Главная страница РБК не изменилась с прошлого запуска (304)")
             return []
+
+        # Синхронный запрос к БД в потоке: не блокирует цикл событий
+        new_urls = await asyncio.to_thread(self._filter_new_urls, self._find_news_urls(html))
+        return new_urls[:MAX_ARTICLES]
+
+    async def _crawl_articles(
+        self, urls: List[str], session: aiohttp.ClientSession
+    ) -> AsyncIterator[Tuple[str, RBCArticle]]:
+        """
+        Параллельный обход статей пулом загрузчиков
+
+        Args:
+            urls: URL статей
+            session: Общая aiohttp сессия
+
+        Yields:
+            Пары (url, статья) по мере загрузки для успешно разобранных статей с заголовком
+        """
+        if not urls:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = iter(urls)
+
+        async def worker() -> None:
+            for url in pending:
+                try:
+                    article = await self._fetch_article_async(url, session)
+                    if article and article.title:
+                        queue.put_nowait((url, article))
+                except Exception as e:
+                    logger.warning(f"Ошибка при парсинге {url}: {e}")
+
+        async def crawl() -> None:
+            try:
+                await asyncio.gather(*(worker() for _ in range(min(self.workers, len(urls)))))
+            finally:
+                # Признак окончания обхода
+                queue.put_nowait(None)
+
+        crawler = asyncio.create_task(crawl())
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            await crawler
+        finally:
+            crawler.cancel()
+
+    async def _fetch_article_async(self, url: str, session: aiohttp.ClientSession) -> Optional[RBCArticle]:
+        """
+        Загружает страницу новости с учетом лимита хоста и извлекает статью
+
+        Args:
+            url: URL страницы новости
+            session: Общая aiohttp сессия
+
+        Returns:
+            Запись RBCArticle или None при ошибке
+        """
+        await self.rate_limiter.acquire(url)
+        # Статья не сохранена (см. _filter_new_urls), поэтому запрос без
+        # валидаторов: ответ 304 оставил бы ее без текста
+        html = await self.fetch_html_async(url, session, conditional=False)
+        if not html:
+            return None
+        return self._extract_article(html, url)
+
+    def _find_news_urls(self, html: str) -> List[str]:
+        """
+        Находит URL новостей на главной странице
+
+        Args:
+            html: HTML главной страницы
+
+        Returns:
+            Список уникальных URL статей в порядке появления
+        """
+        doc = self.parse_document(html)
+        news_urls = []
+
+        seen_urls = set()
+        for link in doc.css('a[href]'):
+            href = link.attr('href', '')
+
+            kind = classify_link(href)
+            if kind == LINK_ARTICLE or (kind == LINK_PAGE and len(link.text(strip=True)) > 15):
+                # Формирую полный URL
+                if href.startswith('http'):
+                    full_url = href
+                else:
+                    full_url = f"https://www.rbc.ru{href}"
+
+                # Убираю параметры для дедупликации
+                clean_url = full_url.split('?')[0]
+
+                if clean_url not in seen_urls:
+                    seen_urls.add(clean_url)
+                    news_urls.append(full_url)
+
+        return news_urls
     
-    def _extract_title_from_page(self, url: str) -> str:
+    def _filter_new_urls(self, urls: List[str]) -> List[str]:
         """
-        Извлекает заголовок со страницы новости
+        Отбрасывает URL статей, которые уже сохранены (таблица rbc_news_urls)
+
+        Проверка делается одним запросом к БД до загрузки статей, поэтому
+        сеть и CPU тратятся только на новые статьи. Если БД недоступна,
+        возвращает все URL.
+
+        Args:
+            urls: URL статей с главной страницы
+
+        Returns:
+            URL новых статей в исходном порядке
+        """
+        if not urls:
+            return []
+
+        session = None
+        try:
+            session = self._get_db_session()
+
+            from src.database import RBCNewsUrl
+            from sqlalchemy import select
+
+            stored = set(session.scalars(select(RBCNewsUrl.url).where(RBCNewsUrl.url.in_(urls))))
+        except Exception as e:
+            logger.warning(f"Не удалось проверить сохраненные статьи: {e}")
+            return list(urls)
+        finally:
+            if session:
+                session.close()
+
+        new_urls = [url for url in urls if url not in stored]
+        logger.info(f"Новых статей: {len(new_urls)} из {len(urls)}")
+        return new_urls
+
+    def _extract_article(self, html: str, url: str) -> Optional[RBCArticle]:
+        """
+        Извлекает заголовок, текст и метаданные из одного документа
         
         Args:
+            html: HTML страницы новости
             url: URL страницы новости
             
         Returns:
-            Заголовок новости или пустая строка
+            Запись RBCArticle или None, если страницу не удалось разобрать
         """
         try:
-            response = self.session.get(url, timeout=10)
-            if response.status_code != 200:
-                return ""
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Ищу в h1
-            h1 = soup.find('h1')
-            if h1:
-                title = h1.get_text(strip=True)
-                if title and len(title) > 10:
-                    return title
-            
-            # Ищу в meta og:title
-            meta_title = soup.find('meta', property='og:title')
-            if meta_title:
-                title = meta_title.get('content', '').strip()
-                if title and len(title) > 10:
-                    return title
-            
-            # Ищу в title теге
-            title_tag = soup.find('title')
-            if title_tag:
-                title = title_tag.get_text(strip=True)
-                title = re.sub(r'\s*::\s*РБК.*$', '', title)
-                if title and len(title) > 10:
-                    return title
-            
-            # Ищу в элементах с классом title
-            title_elem = soup.find(['h1', 'h2'], class_=lambda x: x and 'title' in str(x).lower())
-            if title_elem:
-                title = title_elem.get_text(strip=True)
-                if title and len(title) > 10:
-                    return title
-            
-            return ""
-            
+            doc = self.parse_document(html)
+            return RBCArticle(
+                title=self._extract_title(doc),
+                url=url,
+                text=self._extract_text(doc),
+                description=self._extract_meta(doc, 'og:description', 'description'),
+                published_at=self._extract_meta(doc, 'article:published_time'),
+            )
         except Exception as e:
-            logger.warning(f"Ошибка заголовка {url}: {e}")
-            return ""
+            logger.warning(f"Ошибка разбора статьи {url}: {e}")
+            return None
+
+    def _extract_meta(self, doc: HTMLNode, *names: str) -> str:
+        """
+        Возвращает content первого найденного meta тега (property или name)
+        """
+        for name in names:
+            meta = doc.css_first(f'meta[property="{name}"]') or doc.css_first(f'meta[name="{name}"]')
+            if meta and meta.attr('content'):
+                return meta.attr('content').strip()
+        return ""
     
-    def _extract_text_from_page(self, url: str) -> str:
+    def _extract_title(self, doc: HTMLNode) -> str:
         """
-        Извлекает текст новости со страницы статьи
+        Извлекает заголовок из разобранной страницы новости
         
         Args:
-            url: URL страницы новости
+            doc: Разобранный HTML страницы новости
             
         Returns:
-            Текст новости или пустая строка
+            Заголовок новости или пустая строка
         """
-        try:
-            response = self.session.get(url, timeout=10)
-            if response.status_code != 200:
-                return ""
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Ищу article тег
-            article = soup.find('article')
-            if article:
-                paragraphs = article.find_all('p')
-                if paragraphs:
-                    text_parts = [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
-                    text_parts = [p for p in text_parts if len(p) > 20]
-                    if text_parts:
-                        return ' '.join(text_parts)
-            
-            # Ищу div
-            content_divs = soup.find_all(['div', 'section'], class_=lambda x: x and any(
-                word in str(x).lower() for word in ['article', 'text', 'content', 'body', 'story']
-            ))
-            
-            for div in content_divs:
-                paragraphs = div.find_all('p')
-                if paragraphs:
-                    text_parts = [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
-                    text_parts = [p for p in text_parts if len(p) > 20]
-                    if text_parts:
-                        return ' '.join(text_parts)
+        # Ищу в h1
+        h1 = doc.css_first('h1')
+        if h1:
+            title = h1.text(strip=True)
+            if title and len(title) > 10:
+                return title
+        
+        # Ищу в meta og:title
+        meta_title = doc.css_first('meta[property="og:title"]')
+        if meta_title:
+            title = meta_title.attr('content', '').strip()
+            if title and len(title) > 10:
+                return title
+        
+        # Ищу в title теге
+        title_tag = doc.css_first('title')
+        if title_tag:
+            title = title_tag.text(strip=True)
+            title = re.sub(r'\s*::\s*РБК.*$', '', title)
+            if title and len(title) > 10:
+                return title
+        
+        # Ищу в элементах с классом title
+        title_elem = doc.css_first('h1[class*="title" i], h2[class*="title" i]')
+        if title_elem:
+            title = title_elem.text(strip=True)
+            if title and len(title) > 10:
+                return title
+        
+        return ""
+
+    def _extract_text(self, doc: HTMLNode) -> str:
+        """
+        Извлекает текст новости из разобранной страницы статьи
+        
+        Args:
+            doc: Разобранный HTML страницы новости
             
-            # Ищу все параграфы на странице
-            all_paragraphs = soup.find_all('p')
-            if all_paragraphs:
-                text_parts = []
-                skip_words = ['подписка', 'реклама', 'cookie', 'политика конфиденциальности', 
-                             'читайте также', 'подробнее', 'источник', 'фото:', 'фото']
-                for p in all_paragraphs:
-                    text = p.get_text(strip=True)
-                    if (len(text) > 50 and 
-                        not any(skip in text.lower() for skip in skip_words) and
-                        not text.startswith('©') and
-                        not re.match(r'^\d{1,2}:\d{2}', text)):
-                        text_parts.append(text)
-                
+        Returns:
+            Текст новости или пустая строка
+        """
+        # Ищу article тег
+        article = doc.css_first('article')
+        if article:
+            paragraphs = article.css('p')
+            if paragraphs:
+                text_parts = [p.text(strip=True) for p in paragraphs]
+                text_parts = [p for p in text_parts if len(p) > 20]
                 if text_parts:
-                    # Фильтрую параграфы
-                    filtered_parts = []
-                    skip_phrases = [
-                        'читайте рбк', 'реклама', 'подписка', 'cookie', 
-                        'политика конфиденциальности', 'какое вино подать',
-                        'как приготовить', 'чем занять детей', 'как легко завести разговор',
-                        'из каких сыров', 'что делать, если пролил', 'какие есть правила',
-                        'какие игры можно', 'как легко запомнить', 'попробуйте новую функцию',
-                        'гигачат', 'пао «сбербанк»', '18+'
-                    ]
-                    
-                    for p in text_parts:
-                        if len(p) < 50:
-                            continue
-                        if any(phrase in p.lower() for phrase in skip_phrases):
-                            continue
-                        if re.match(r'^(Фото|Видео|Фото:|Видео:)', p, re.I):
-                            continue
-                        filtered_parts.append(p)
-                    
-                    if filtered_parts:
-                        main_text = [p for p in filtered_parts if len(p) > 100]
-                        if main_text:
-                            return ' '.join(main_text[:15])
-                        else:
-                            return ' '.join(filtered_parts[:10])
-            
-            return ""
+                    return ' '.join(text_parts)
+        
+        # Ищу div
+        content_divs = doc.css(CONTENT_SELECTOR)
+        
+        for div in content_divs:
+            paragraphs = div.css('p')
+            if paragraphs:
+                text_parts = [p.text(strip=True) for p in paragraphs]
+                text_parts = [p for p in text_parts if len(p) > 20]
+                if text_parts:
+                    return ' '.join(text_parts)
+        
+        # Ищу все параграфы на странице
+        all_paragraphs = doc.css('p')
+        if all_paragraphs:
+            text_parts = []
+            skip_words = ['подписка', 'реклама', 'cookie', 'политика конфиденциальности', 
+                         'читайте также', 'подробнее', 'источник', 'фото:', 'фото']
+            for p in all_paragraphs:
+                text = p.text(strip=True)
+                if (len(text) > 50 and 
+                    not any(skip in text.lower() for skip in skip_words) and
+                    not text.startswith('©') and
+                    not re.match(r'^\d{1,2}:\d{2}', text)):
+                    text_parts.append(text)
             
-        except Exception as e:
-            logger.warning(f"Ошибка текста {url}: {e}")
-            return ""
+            if text_parts:
+                # Фильтрую параграфы
+                filtered_parts = []
+                skip_phrases = [
+                    'читайте рбк', 'реклама', 'подписка', 'cookie', 
+                    'политика конфиденциальности', 'какое вино подать',
+                    'как приготовить', 'чем занять детей', 'как легко завести разговор',
+                    'из каких сыров', 'что делать, если пролил', 'какие есть правила',
+                    'какие игры можно', 'как легко запомнить', 'попробуйте новую функцию',
+                    'гигачат', 'пао «сбербанк»', '18+'
+                ]
+                
+                for p in text_parts:
+                    if len(p) < 50:
+                        continue
+                    if any(phrase in p.lower() for phrase in skip_phrases):
+                        continue
+                    if re.match(r'^(Фото|Видео|Фото:|Видео:)', p, re.I):
+                        continue
+                    filtered_parts.append(p)
+                
+                if filtered_parts:
+                    main_text = [p for p in filtered_parts if len(p) > 100]
+                    if main_text:
+                        return ' '.join(main_text[:15])
+                    else:
+                        return ' '.join(filtered_parts[:10])
+        
+        return ""
 
     # Сохраняю в БД
-    def save_to_db(self, data: List[Dict]) -> None:
-        """Сохранение новостей в таблицу rbc_news через SQLAlchemy"""
+    def save_to_db(self, data: List[RBCArticle]) -> int:
+        """
+        Сохранение новостей в таблицу rbc_news через SQLAlchemy
+
+        Пачка отправляется одним запросом: URL регистрируются в rbc_news_urls
+        (INSERT ... ON CONFLICT DO NOTHING RETURNING url), в rbc_news
+        вставляются только статьи с действительно новыми URL.
+
+        Returns:
+            Количество действительно добавленных новостей
+        """
         if not data:
             logger.warning("Нет данных для сохранения в БД.")
-            return
+            return 0
 
         session = None
         try:
@@ -255,31 +484,51 @@ class RBCParser(BaseParser):
             source = self._get_source_by_name(session, "RBC")
             if not source:
                 logger.error("Ошибка: Источник 'RBC' не найден в таблице source.")
-                return
+                self.save_errors += 1
+                return 0
 
-            # Импортирую модель
-            from src.database import RBCNews
+            # Импортирую модели
+            from src.database import RBCNews, RBCNewsUrl
+            from sqlalchemy import Integer, Text, column, select, values
             from sqlalchemy.dialects.postgresql import insert
 
-            # Вставляю данные с обработкой конфликтов
-            for item in data:
-                stmt = insert(RBCNews).values(
-                    source_id=source.id,
-                    title=item.get("title"),
-                    url=item.get("url"),
-                    text=item.get("text")
+            # Повторы URL внутри пачки отбрасываю заранее
+            articles = list({item.url: item for item in data}.values())
+
+            # rbc_news секционирована, уникальность url держит rbc_news_urls
+            new_urls = (
+                insert(RBCNewsUrl)
+                .values([{"url": item.url} for item in articles])
+                .on_conflict_do_nothing(index_elements=['url'])
+                .returning(RBCNewsUrl.url)
+                .cte("new_urls")
+            )
+            rows = values(
+                column("source_id", Integer), column("title", Text),
+                column("url", Text), column("text", Text),
+                name="articles",
+            ).data([(source.id, item.title, item.url, item.text) for item in articles])
+            stmt = (
+                insert(RBCNews)
+                .from_select(
+                    ["source_id", "title", "url", "text"],
+                    select(rows).join(new_urls, rows.c.url == new_urls.c.url),
                 )
-                stmt = stmt.on_conflict_do_nothing(index_elements=['url'])
-                
-                session.execute(stmt)
+                .returning(RBCNews.id)
+                .add_cte(new_urls)
+            )
+            inserted = session.execute(stmt).scalars().all()
 
             session.commit()
-            logger.info(f"Успешно обработано {len(data)} новостей для БД.")
+            logger.info(f"Добавлено {len(inserted)} новых новостей из {len(data)}.")
+            return len(inserted)
 
         except Exception as e:
             logger.error(f"Ошибка при сохранении в БД: {e}", exc_info=True)
+            self.save_errors += 1
             if session:
                 session.rollback()
+            return 0
         finally:
             if session:
                 session.close()
@@ -293,19 +542,14 @@ def run_rbc_parser():
         parser = RBCParser()
         logger.info("Начинаем парсинг RBC...")
 
-        # Парсинг
-        news_list = parser.parse()
-
-        if news_list:
-            logger.info(f"Спарсено {len(news_list)} новостей.")
-
-            # Сохранение в БД
-            logger.info("Сохраняем в БД...")
-            parser.save_to_db(news_list)
+        # Парсинг (статьи загружаются параллельно) и сохранение в БД пачками по мере загрузки
+        saved = asyncio.run(parser.save_iter_async(parser.parse_iter_async()))
 
+        if saved:
+            logger.info(f"Сохранено {saved} новых новостей.")
             logger.info("Все операции завершены успешно.")
         else:
-            logger.warning("Список новостей пуст.")
+            logger.warning("Новых новостей нет.")
 
     except Exception as e:
         logger.error(f"Ошибка запуска RBC: {e}", exc_info=True)
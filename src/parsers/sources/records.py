@@ -0,0 +1,49 @@
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+from .convert import ZERO
+
+# Значение текстовой ячейки Smartlab, которой нет в строке таблицы
+NO_INFORMATION = "No information!"
+
+
+class SmartlabQuote(NamedTuple):
+    """Строка таблицы акций Smartlab (поля совпадают с колонками smartlab_stocks)"""
+
+    name: str = NO_INFORMATION
+    ticker: str = NO_INFORMATION
+    last_price_rub: Decimal = ZERO
+    price_change_percent: Decimal = ZERO
+    volume_mln_rub: Decimal = ZERO
+    change_week_percent: Decimal = ZERO
+    change_month_percent: Decimal = ZERO
+    change_ytd_percent: Decimal = ZERO
+    change_year_percent: Decimal = ZERO
+    capitalization_bln_rub: Decimal = ZERO
+    capitalization_bln_usd: Decimal = ZERO
+
+
+class DohodDividend(NamedTuple):
+    """Строка таблицы дивидендов Dohod (поля совпадают с колонками dohod_divs)"""
+
+    ticker: str
+    company_name: str
+    sector: str
+    period: str
+    payment_per_share: Decimal
+    currency: str
+    yield_percent: Decimal
+    record_date_estimate: Optional[date]
+    capitalization_mln_rub: Decimal
+    dsi: Decimal
+
+
+class RBCArticle(NamedTuple):
+    """Статья РБК"""
+
+    title: str
+    url: str
+    text: str
+    description: Optional[str] = None
+    published_at: Optional[str] = None
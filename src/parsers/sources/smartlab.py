@@ -1,201 +1,304 @@
-from .base_parser import BaseParser
-from bs4 import BeautifulSoup, Tag
+from .base_parser import BaseParser, batched
+from .html_backend import HTMLNode
+from .convert import ZERO, convert_column
+from .records import NO_INFORMATION, SmartlabQuote
+from .snapshot_store import SnapshotStore, get_snapshot_store
 import logging
-from typing import List, Dict
+import os
+import re
+import time
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 
 # Настройка логирования
 logger: logging.Logger = logging.getLogger(__name__)
 
 
-# Шаблон данных компании
-COMPANY_TEMPLATE: Dict[str, str] = {
-    "name": "No information!",
-    "ticker": "No information!",
-    "last price, rub": "No information!",
-    "price change": "No information!",
-    "volume, mln rub": "No information!",
-    "change in one week": "No information!",
-    "change in one month": "No information!",
-    "change in year to date": "No information!",
-    "change in twelve month": "No information!",
-    "capitalization, bln rub": "No information!",
-    "capitalization, bln usd": "No information!",
+# Начало контейнера таблицы акций (для разбора только этого участка страницы)
+MAIN_TABLE_RE = re.compile(
+    r"""<div\b[^>]*\bclass\s*=\s*["'][^"']*(?<![\w-])main__table(?![\w-])""", re.IGNORECASE
+)
+
+# Колонки таблицы: CSS класс ячейки -> (поле SmartlabQuote, брать текст ссылки)
+COLUMNS: Dict[str, Tuple[str, bool]] = {
+    "trades-table__name": ("name", True),
+    "trades-table__ticker": ("ticker", False),
+    "trades-table__price": ("last_price_rub", False),
+    "trades-table__change-per": ("price_change_percent", False),
+    "trades-table__volume": ("volume_mln_rub", False),
+    "trades-table__week": ("change_week_percent", False),
+    "trades-table__month": ("change_month_percent", False),
+    "trades-table__first": ("change_ytd_percent", False),
+    "trades-table__year": ("change_year_percent", False),
+    "trades-table__rub": ("capitalization_bln_rub", False),
+    "trades-table__usd": ("capitalization_bln_usd", False),
 }
 
+# CSS класс ячейки -> (позиция поля в SmartlabQuote, брать текст ссылки)
+_COLUMN_POSITIONS: Dict[str, Tuple[int, bool]] = {
+    css_class: (SmartlabQuote._fields.index(field), link_text)
+    for css_class, (field, link_text) in COLUMNS.items()
+}
+
+# Позиции числовых полей SmartlabQuote (все, кроме названия и тикера)
+_NUMERIC_POSITIONS: List[int] = [
+    position for position, field in enumerate(SmartlabQuote._fields) if field not in ("name", "ticker")
+]
+
+# Очистка числа за один вызов: пробелы, % и + удаляются, запятая -> точка
+_NUMBER_TRANSLATION = str.maketrans({" ": None, "%": None, "+": None, ",": "."})
+
+# Режим сохранения: changes - только изменившиеся строки, full - все строки каждого запуска
+STORE_MODE = os.getenv("SMARTLAB_STORE_MODE", "changes")
+# Как часто в режиме changes все равно сохранять полный снимок (для восстановления), минут
+FULL_SNAPSHOT_MINUTES = int(os.getenv("SMARTLAB_FULL_SNAPSHOT_MINUTES", "60"))
+
+
+@lru_cache(maxsize=None)
+def _column_quanta() -> Tuple[Optional[Decimal], ...]:
+    """Шаг округления каждого поля SmartlabQuote по scale колонки smartlab_latest (None - не число)"""
+    from src.database import SmartlabLatest
+
+    columns = SmartlabLatest.__table__.columns
+    return tuple(
+        Decimal(1).scaleb(-columns[field].type.scale)
+        if getattr(columns[field].type, "scale", None) is not None else None
+        for field in SmartlabQuote._fields
+    )
+
+
+def _fingerprint(values: Iterable) -> str:
+    """
+    Отпечаток значений записи для сравнения с последней сохраненной (250.50 == 250.5)
+
+    Числа округляются до scale колонок, как их округлит PostgreSQL:
+    иначе 0.01234 из разбора никогда не совпадет с 0.01 из smartlab_latest.
+    """
+    parts = []
+    for value, quantum in zip(values, _column_quanta()):
+        if isinstance(value, Decimal):
+            if quantum is not None:
+                value = value.quantize(quantum, rounding=ROUND_HALF_UP)
+            value = value.normalize()
+        parts.append(str(value))
+    return "|".join(parts)
+
 
 class SmartlabParser(BaseParser):
-    def __init__(self, url, headers=None) -> None:
+    def __init__(self, url, headers=None, snapshot_store: Optional[SnapshotStore] = None) -> None:
         super().__init__(url=url, headers=headers)
+        self.store_mode = STORE_MODE
+        self.snapshot_store = snapshot_store or get_snapshot_store("smartlab")
+        # Полный ли снимок пишет текущий запуск (решается в save_iter один раз на все пачки)
+        self.full_snapshot: Optional[bool] = None
 
-    def _extract_cell_text(
-        self,
-        row: Tag,
-        tag_name: str,
-        class_name: str | None = None,
-        link_text: bool = False,
-    ) -> str:
+    def _extract_row(self, row: HTMLNode) -> List[str]:
         """
-        Безопасное извлечение текста из ячейки таблицы
+        Тексты ячеек строки таблицы за один проход по ячейкам
+
+        Колонка определяется по классу trades-table__* ячейки через COLUMNS;
+        если колонка встречается несколько раз, берется первая ячейка.
 
         Args:
             row: Строка таблицы
-            tag_name: Название тега для поиска
-            class_name: Название класса для поиска (опционально)
-            link_text: Если True, ищет текст внутри ссылки в ячейке
 
         Returns:
-            Текст из ячейки или "No information!" если ячейка не найдена
+            Тексты в порядке полей SmartlabQuote; отсутствующие ячейки - "No information!"
         """
-        try:
-            cell: Tag | None = (
-                row.find(name=tag_name, class_=class_name)
-                if class_name
-                else row.find(name=tag_name)
-            )
-            if not cell:
-                return "No information!"
-
-            if link_text:
-                link: Tag | None = cell.find("a")
-                if link:
-                    return link.get_text(strip=True)
-                return "No information!"
-
-            return cell.get_text(strip=True)
-        except (AttributeError, TypeError) as e:
-            logger.warning(msg=f"Ошибка при извлечении текста из ячейки: {e}")
-            return "No information!"
-
-    def parse(self) -> List[Dict]:
+        values: List[str] = [NO_INFORMATION] * len(SmartlabQuote._fields)
+        seen = set()
+
+        for cell in row.css("td"):
+            for css_class in cell.classes:
+                column = _COLUMN_POSITIONS.get(css_class)
+                if column is None or css_class in seen:
+                    continue
+                seen.add(css_class)
+
+                position, link_text = column
+                if link_text:
+                    link: HTMLNode | None = cell.css_first("a")
+                    if link:
+                        values[position] = link.text(strip=True)
+                else:
+                    values[position] = cell.text(strip=True)
+
+        return values
+
+    def _to_records(self, rows: List[List[str]]) -> List[SmartlabQuote]:
+        """
+        Преобразует тексты ячеек в записи SmartlabQuote
+
+        Числовые колонки разбираются целиком, по колонке за раз, сразу в Decimal.
+
+        Args:
+            rows: Тексты ячеек строк (см. _extract_row)
+
+        Returns:
+            Список записей SmartlabQuote
+        """
+        if not rows:
+            return []
+
+        columns: List[List] = [list(column) for column in zip(*rows)]
+        for position in _NUMERIC_POSITIONS:
+            columns[position] = convert_column(columns[position], self._clean_number)
+
+        return [SmartlabQuote._make(values) for values in zip(*columns)]
+
+    def parse(self) -> List[SmartlabQuote]:
         """
         Парсинг таблицы акций со страницы Smartlab
 
         Returns:
-            Список словарей с данными компаний
+            Список записей SmartlabQuote
+        """
+        return list(self.parse_iter())
+
+    def parse_iter(self) -> Iterator[SmartlabQuote]:
         """
-        stocks: List[Dict[str, str]] = []
+        Потоковый парсинг таблицы акций
+
+        Строки разбираются пачками по self.batch_size, числа каждой
+        пачки преобразуются по колонкам (см. _to_records).
 
+        Yields:
+            Записи SmartlabQuote
+        """
         try:
             html: str | None = self.fetch_html()
             if not html:
-                logger.error(msg="Не удалось получить HTML содержимое")
-                return []
+                if self.not_modified:
+                    logger.info(msg="Страница не изменилась с прошлого запуска (304)")
+                else:
+                    logger.error(msg="Не удалось получить HTML содержимое")
+                return
 
-            soup = BeautifulSoup(markup=html, features="html.parser")
+            doc: HTMLNode = self.parse_region(html, MAIN_TABLE_RE, "div")
 
             # Поиск основной таблицы
-            main_table: Tag | None = soup.find("div", class_="main__table")
+            main_table: HTMLNode | None = doc.css_first("div.main__table")
             if not main_table:
                 logger.error(msg="Не найден контейнер таблицы (main__table)")
-                return []
+                return
 
             # Поиск самой таблицы
-            table: Tag | None = main_table.find("table")
+            table: HTMLNode | None = main_table.css_first("table")
             if not table:
                 logger.error(msg="Не найдена таблица внутри контейнера")
-                return []
+                return
 
             # Поиск строк таблицы
-            rows: List[Tag] = table.find_all("tr")
+            rows: List[HTMLNode] = table.css("tr")
             if not rows:
                 logger.warning(msg="Таблица пуста - не найдено строк")
-                return []
-
-            for row in rows[1:]:
-                try:
-                    company_data: Dict[str, str] = COMPANY_TEMPLATE.copy()
-
-                    # Название компании
-                    company_data["name"] = self._extract_cell_text(
-                        row=row,
-                        tag_name="td",
-                        class_name="trades-table__name",
-                        link_text=True,
-                    )
-
-                    # Тикер
-                    company_data["ticker"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__ticker"
-                    )
-
-                    # Цена, последняя
-                    company_data["last price, rub"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__price"
-                    )
-
-                    # Изменение цены, %
-                    company_data["price change"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__change-per"
-                    )
-
-                    # Объём, млн руб
-                    company_data["volume, mln rub"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__volume"
-                    )
-
-                    # 1 неделя, %
-                    company_data["change in one week"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__week"
-                    )
-
-                    # 1 месяц, %
-                    company_data["change in one month"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__month"
-                    )
-
-                    # Year to date, %
-                    company_data["change in year to date"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__first"
-                    )
-
-                    # 12 месяцев, %
-                    company_data["change in twelve month"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__year"
-                    )
-
-                    # Капитализация, млрд руб
-                    company_data["capitalization, bln rub"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__rub"
-                    )
-
-                    # Капитализация, млрд USD
-                    company_data["capitalization, bln usd"] = self._extract_cell_text(
-                        row=row, tag_name="td", class_name="trades-table__usd"
-                    )
-
-                    stocks.append(company_data)
-
-                except Exception as e:
-                    logger.warning(msg=f"Ошибка при обработке строки таблицы: {e}")
-                    continue
+                return
 
-            logger.info(msg=f"Успешно спарсено {len(stocks)} компаний")
-            return stocks
+            count = 0
+            for raw_rows in batched(self._iter_rows(rows[1:]), self.batch_size):
+                stocks: List[SmartlabQuote] = self._to_records(raw_rows)
+                count += len(stocks)
+                yield from stocks
+
+            logger.info(msg=f"Успешно спарсено {count} компаний")
 
         except Exception as e:
             logger.error(msg=f"Критическая ошибка в методе parse(): {e}", exc_info=True)
-            return []
 
-    def _clean_number(self, value: str) -> float:
+    def _iter_rows(self, rows: List[HTMLNode]) -> Iterator[List[str]]:
+        """Тексты ячеек строк таблицы; строки с ошибками пропускаются"""
+        for row in rows:
+            try:
+                yield self._extract_row(row)
+            except Exception as e:
+                logger.warning(msg=f"Ошибка при обработке строки таблицы: {e}")
+                continue
+
+    def _clean_number(self, value: str) -> Decimal:
         """
-        Очищает строку (удаляет пробелы, %, заменяет запятые) и возвращает float
+        Очищает строку (удаляет пробелы, %, +, заменяет запятые) и возвращает Decimal
+
+        Пустые и нечисловые значения превращаются в 0.
         """
-        if not value or value == "No information!":
-            return 0.0
+        if not value or value == NO_INFORMATION:
+            return ZERO
 
-        clean_val = value.replace(" ", "").replace("%", "").replace("+", "")
-        clean_val = clean_val.replace(",", ".")
+        try:
+            number = Decimal(value.translate(_NUMBER_TRANSLATION))
+        except InvalidOperation:
+            return ZERO
+        return number if number.is_finite() else ZERO
+
+    def _full_snapshot_due(self) -> bool:
+        """Пора ли сохранить полный снимок вместо одних изменений"""
+        if self.store_mode == "full":
+            return True
+        last = self.snapshot_store.last_full_snapshot()
+        return last is None or time.time() - last >= FULL_SNAPSHOT_MINUTES * 60
+
+    def save_iter(self, records: Iterable[SmartlabQuote], batch_size: Optional[int] = None) -> int:
+        """
+        Сохранение пачками (см. BaseParser.save_iter)
 
+        Полный это снимок или только изменения, решается один раз на запуск,
+        чтобы полный снимок не разрывался между пачками.
+        """
+        self.full_snapshot = self._full_snapshot_due()
         try:
-            return float(clean_val)
-        except ValueError:
-            return 0.0
+            return super().save_iter(records, batch_size)
+        finally:
+            self.full_snapshot = None
+
+    def _latest_from_db(self, session, tickers: List[str]) -> Dict[str, str]:
+        """
+        Отпечатки строк smartlab_latest для тикеров пачки
 
-    def save_to_db(self, data: List[Dict]) -> None:
-        """Сохранение данных в БД через SQLAlchemy"""
+        Строки блокируются до конца транзакции (FOR UPDATE): параллельное
+        сохранение тех же тикеров другим воркером ждет фиксации и сравнивает
+        уже с записанными значениями.
+        """
+        from src.database import SmartlabLatest
+        from sqlalchemy import select
+
+        rows = session.scalars(
+            select(SmartlabLatest).where(SmartlabLatest.ticker.in_(tickers)).with_for_update()
+        )
+        return {
+            row.ticker: _fingerprint(getattr(row, field) for field in SmartlabQuote._fields)
+            for row in rows
+        }
+
+    def _changed_records(self, session, data: List[SmartlabQuote]) -> List[SmartlabQuote]:
+        """
+        Записи, значения которых отличаются от последних сохраненных по тикеру
+
+        Сравнение идет с smartlab_latest в транзакции сохранения, а не
+        с отпечатками в памяти процесса: их не видят другие процессы
+        воркера, и после чужой записи они устаревают.
+        """
+        latest = self._latest_from_db(session, list({item.ticker for item in data}))
+        return [item for item in data if latest.get(item.ticker) != _fingerprint(item)]
+
+    def save_to_db(self, data: List[SmartlabQuote]) -> int:
+        """
+        Сохранение данных в БД через SQLAlchemy
+
+        В режиме changes пишутся только строки, изменившиеся с прошлой
+        записи по тикеру (сравнение с smartlab_latest), раз в
+        FULL_SNAPSHOT_MINUTES пишется полный снимок с is_full_snapshot.
+        Записанные строки заменяют строки тикеров в smartlab_latest,
+        все котировки попадают в часовые и дневные агрегаты smartlab_ohlc.
+
+        Returns:
+            Количество записанных строк
+        """
         if not data:
             logger.warning("Нет данных для сохранения в БД.")
-            return
+            return 0
+
+        full = self.full_snapshot if self.full_snapshot is not None else self._full_snapshot_due()
 
         session = None
         try:
@@ -204,37 +307,44 @@ class SmartlabParser(BaseParser):
             source = self._get_source_by_name(session, "SmartLab")
             if not source:
                 logger.error("Ошибка: Источник 'SmartLab' не найден в таблице source.")
-                return
-
-            # Импортирую модель
-            from src.database import SmartlabStock
-            from decimal import Decimal
-
-            # Вставляю данные
-            for item in data:
-                stock = SmartlabStock(
-                    source_id=source.id,
-                    name=item.get("name"),
-                    ticker=item.get("ticker"),
-                    last_price_rub=Decimal(str(self._clean_number(item.get("last price, rub")))),
-                    price_change_percent=Decimal(str(self._clean_number(item.get("price change")))),
-                    volume_mln_rub=Decimal(str(self._clean_number(item.get("volume, mln rub")))),
-                    change_week_percent=Decimal(str(self._clean_number(item.get("change in one week")))),
-                    change_month_percent=Decimal(str(self._clean_number(item.get("change in one month")))),
-                    change_ytd_percent=Decimal(str(self._clean_number(item.get("change in year to date")))),
-                    change_year_percent=Decimal(str(self._clean_number(item.get("change in twelve month")))),
-                    capitalization_bln_rub=Decimal(str(self._clean_number(item.get("capitalization, bln rub")))),
-                    capitalization_bln_usd=Decimal(str(self._clean_number(item.get("capitalization, bln usd")))),
-                )
-                session.add(stock)
+                self.save_errors += 1
+                return 0
+
+            # Импортирую модели
+            from src.database import SmartlabStock, SmartlabLatest, upsert_rows, upsert_ohlc
+            from src.database.rollups import ohlc_rows
+
+            # Вставляю данные одним executemany
+            parsed_at = datetime.utcnow()
+            rows = data if full else self._changed_records(session, data)
+            if rows:
+                self._bulk_insert(session, SmartlabStock, source.id, rows,
+                                  is_full_snapshot=full, parsed_at=parsed_at)
+                # Последние значения по тикерам обновляю в той же транзакции
+                latest = {item.ticker: item for item in rows}
+                upsert_rows(session, SmartlabLatest, [
+                    {"source_id": source.id, "parsed_at": parsed_at, **item._asdict()}
+                    for item in latest.values()
+                ], key=["ticker"])
+            # Агрегаты OHLC получают каждое наблюдение, в том числе без изменений
+            upsert_ohlc(session, ohlc_rows(data, parsed_at))
 
             session.commit()
-            logger.info(f"Успешно обработано {len(data)} записей для БД.")
+
+            # Время полного снимка отмечаю только после фиксации транзакции
+            if full:
+                self.snapshot_store.mark_full_snapshot(time.time())
+
+            mode = "полный снимок" if full else "только изменения"
+            logger.info(f"Успешно обработано {len(data)} записей для БД, записано {len(rows)} ({mode}).")
+            return len(rows)
 
         except Exception as e:
             logger.error(f"Ошибка при сохранении в БД: {e}")
+            self.save_errors += 1
             if session:
                 session.rollback()
+            return 0
         finally:
             if session:
                 session.close()
@@ -257,18 +367,14 @@ def run_smartlab_parser():
     try:
         parser: SmartlabParser = SmartlabParser(url=URL, headers=HEADERS)
 
-        # Парсинг
+        # Парсинг и сохранение в БД пачками по мере разбора
         logger.info("Начинаем парсинг...")
-        data_list = parser.parse()
-
-        if data_list:
-            # Сохранение в БД
-            logger.info("Сохраняем данные в БД...")
-            parser.save_to_db(data_list)
+        saved = parser.save_iter(parser.parse_iter())
 
-            logger.info("Все операции завершены успешно.")
+        if saved:
+            logger.info(f"Все операции завершены успешно, обработано {saved} записей.")
         else:
-            logger.warning("Нет данных для сохранения (парсинг вернул пустой список).")
+            logger.warning("Нет данных для сохранения (парсинг пуст или котировки не изменились).")
 
     except Exception as e:
         logger.error(f"Ошибка при запуске парсера: {e}", exc_info=True)
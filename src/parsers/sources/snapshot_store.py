@@ -0,0 +1,77 @@
+import os
+from typing import Dict, Optional
+
+# Где хранится время последнего полного снимка: memory (в процессе) | redis
+SNAPSHOT_STORE = os.getenv("PARSER_SNAPSHOT_STORE", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class SnapshotStore:
+    """
+    Время последнего полного снимка источника
+
+    Изменения строк сравниваются с smartlab_latest в транзакции
+    сохранения, здесь хранится только момент полного снимка.
+    """
+
+    def last_full_snapshot(self) -> Optional[float]:
+        """Время последнего полного снимка (unix time) или None"""
+        raise NotImplementedError
+
+    def mark_full_snapshot(self, timestamp: float) -> None:
+        """Запоминает время полного снимка"""
+        raise NotImplementedError
+
+
+class MemorySnapshotStore(SnapshotStore):
+    """Время в памяти процесса (живет, пока жив воркер)"""
+
+    def __init__(self) -> None:
+        self._full_snapshot_at: Optional[float] = None
+
+    def last_full_snapshot(self) -> Optional[float]:
+        return self._full_snapshot_at
+
+    def mark_full_snapshot(self, timestamp: float) -> None:
+        self._full_snapshot_at = timestamp
+
+
+class RedisSnapshotStore(SnapshotStore):
+    """Время в Redis (общее для всех воркеров), ключ <namespace>:full_snapshot_at"""
+
+    def __init__(self, namespace: str, client=None, url: Optional[str] = None) -> None:
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or REDIS_URL, decode_responses=True)
+        self.client = client
+        self.full_snapshot_key = f"{namespace}:full_snapshot_at"
+
+    def last_full_snapshot(self) -> Optional[float]:
+        value = self.client.get(self.full_snapshot_key)
+        return float(value) if value is not None else None
+
+    def mark_full_snapshot(self, timestamp: float) -> None:
+        self.client.set(self.full_snapshot_key, timestamp)
+
+
+# Хранилища в памяти общие для всех экземпляров парсера в процессе
+_MEMORY_STORES: Dict[str, MemorySnapshotStore] = {}
+
+
+def get_snapshot_store(namespace: str, name: Optional[str] = None) -> SnapshotStore:
+    """
+    Хранилище времени полного снимка источника
+
+    Args:
+        namespace: Имя источника (префикс ключа)
+        name: memory | redis (по умолчанию PARSER_SNAPSHOT_STORE)
+
+    Returns:
+        Экземпляр хранилища
+    """
+    name = name or SNAPSHOT_STORE
+    if name == "memory":
+        return _MEMORY_STORES.setdefault(namespace, MemorySnapshotStore())
+    if name == "redis":
+        return RedisSnapshotStore(namespace)
+    raise ValueError(f"Неизвестное хранилище снимков '{name}'. Доступны: memory, redis")
@@ -4,10 +4,12 @@ from src.tasks.parser_tasks import (
     task_parse_rbc,
     task_parse_dohod,
 )
+from src.tasks.maintenance_tasks import task_maintain_partitions
 
 __all__ = [
     "celery",
     "task_parse_smartlab",
     "task_parse_rbc",
     "task_parse_dohod",
+    "task_maintain_partitions",
 ]
@@ -1,5 +1,14 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 redis_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 celery = Celery("tasks", broker=redis_url, backend=redis_url)
+
+# Ежедневное обслуживание секций (запускается celery beat)
+celery.conf.beat_schedule = {
+    "maintain-partitions": {
+        "task": "maintain_partitions",
+        "schedule": crontab(hour=0, minute=15),
+    },
+}
@@ -1,6 +1,9 @@
+import logging
 from datetime import datetime
 from src import get_sync_session, Source, Log
+from src.tasks.status_board import get_status_board, status_entry
 
+logger = logging.getLogger(__name__)
 
 
 def _get_source_by_name(session, source_name: str) -> Source:
@@ -11,6 +14,14 @@ def _get_source_by_name(session, source_name: str) -> Source:
     return source
 
 
+def _publish_status(entry: dict) -> None:
+    """Update the status board; a board failure must not fail the task"""
+    try:
+        get_status_board().set(entry)
+    except Exception as e:
+        logger.warning(f"Status board update failed: {e}")
+
+
 def _log_started(source_name: str, celery_task_id: str) -> int:
     """Log task"""
     session = get_sync_session()
@@ -24,8 +35,10 @@ def _log_started(source_name: str, celery_task_id: str) -> int:
             started_at=datetime.utcnow(),
         )
         session.add(log)
+        entry = status_entry(source, log)
         session.commit()
         session.refresh(log)
+        _publish_status(entry)
         return log.id
     except Exception:
         session.rollback()
@@ -52,7 +65,9 @@ def _log_finished(log_id: int, status: str, error_message: str | None = None, it
             duration = (log.finished_at - log.started_at).total_seconds()
             log.duration_seconds = int(duration)
         
+        entry = status_entry(log.source, log)
         session.commit()
+        _publish_status(entry)
     except Exception:
         session.rollback()
         raise
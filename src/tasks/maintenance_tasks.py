@@ -0,0 +1,23 @@
+from celery.signals import worker_ready
+from celery.utils.log import get_task_logger
+
+from src.tasks.celery_app import celery
+from src.database import get_sync_engine, ensure_partitions, drop_old_partitions
+
+logger = get_task_logger(__name__)
+
+
+@celery.task(name="maintain_partitions")
+def task_maintain_partitions():
+    """Task to create future monthly partitions and drop expired ones"""
+    with get_sync_engine().begin() as connection:
+        created = ensure_partitions(connection)
+        detached = drop_old_partitions(connection)
+    logger.info(f"Partitions created: {created}, detached: {detached}")
+    return {"created": created, "detached": detached}
+
+
+@worker_ready.connect
+def _maintain_partitions_on_startup(sender, **kwargs):
+    """Create partitions right after the worker starts, without waiting for beat"""
+    task_maintain_partitions.delay()
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, select, true
+from sqlalchemy.orm import aliased
+
+from src.database import Log, Source
+
+# Где хранится табло статусов: redis (общее для API и воркеров) | memory (один процесс)
+STATUS_BOARD = os.getenv("STATUS_BOARD", "redis")
+REDIS_URL = os.getenv("REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+
+# Поле хэша, которое пишет только replace(): без него табло считается неполным
+_COMPLETE_FIELD = "complete"
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _is_not_older(entry: Dict[str, Any], stored: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether the entry may replace the stored one
+
+    Events of different runs can arrive out of order: the finish of an
+    older run must not overwrite the STARTED entry of a newer one.
+    """
+    if stored is None or stored.get("started_at") is None:
+        return True
+    if entry.get("started_at") is None:
+        return False
+    return datetime.fromisoformat(entry["started_at"]) >= datetime.fromisoformat(stored["started_at"])
+
+
+def status_entry(source: Source, log: Optional[Log]) -> Dict[str, Any]:
+    """Status board entry (the /api/status item) for a source and its latest run"""
+    return {
+        "source_id": source.id,
+        "name": source.name,
+        "url": source.url,
+        "status": log.status if log else "NO_RUNS",
+        "started_at": _iso(log.started_at) if log else None,
+        "finished_at": _iso(log.finished_at) if log else None,
+        "duration_seconds": log.duration_seconds if log else None,
+        "error_message": log.error_message if log else None,
+    }
+
+
+def latest_runs_query() -> Select:
+    """
+    Every source with its latest run in one query
+
+    LEFT JOIN LATERAL takes one row per source from the
+    (source_id, started_at, id) index instead of a query per source.
+    """
+    latest = (
+        select(Log)
+        .where(Log.source_id == Source.id)
+        .order_by(Log.started_at.desc(), Log.id.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    latest_log = aliased(Log, latest)
+    return select(Source, latest_log).outerjoin(latest_log, true()).order_by(Source.id)
+
+
+def entries_from_rows(rows) -> List[Dict[str, Any]]:
+    """Board entries from latest_runs_query() rows (source, log or None)"""
+    return [status_entry(source, log) for source, log in rows]
+
+
+class StatusBoard:
+    """
+    Latest run state per source, kept outside PostgreSQL
+
+    Updated by task start / finish events, /api/status reads it
+    without querying the database.
+    """
+
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Entries ordered by source_id
+
+        None when the board was not built by replace() or was lost since:
+        set() alone may leave it without some sources.
+        """
+        raise NotImplementedError
+
+    def set(self, entry: Dict[str, Any]) -> None:
+        """Stores the entry of one source unless the stored run is newer"""
+        raise NotImplementedError
+
+    def replace(self, entries: List[Dict[str, Any]]) -> None:
+        """Replaces the whole board (rebuild from the database) and marks it complete"""
+        raise NotImplementedError
+
+
+class MemoryStatusBoard(StatusBoard):
+    """Board in process memory (events and API in one process)"""
+
+    def __init__(self) -> None:
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._complete = False
+        self._lock = threading.Lock()
+
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            if not self._complete:
+                return None
+            return [dict(self._entries[source_id]) for source_id in sorted(self._entries)]
+
+    def set(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            if _is_not_older(entry, self._entries.get(entry["source_id"])):
+                self._entries[entry["source_id"]] = dict(entry)
+
+    def replace(self, entries: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries = {entry["source_id"]: dict(entry) for entry in entries}
+            self._complete = True
+
+
+class RedisStatusBoard(StatusBoard):
+    """
+    Board in a Redis hash: source_id -> JSON entry
+
+    The complete marker is a field of the same hash, so it disappears
+    together with the entries (eviction, FLUSHDB).
+    """
+
+    def __init__(self, key: str = "status_board", client=None, url: Optional[str] = None) -> None:
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or REDIS_URL, decode_responses=True)
+        self.client = client
+        self.key = key
+
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        values = self.client.hgetall(self.key)
+        if values.pop(_COMPLETE_FIELD, None) is None:
+            return None
+        return [json.loads(values[source_id]) for source_id in sorted(values, key=int)]
+
+    def set(self, entry: Dict[str, Any]) -> None:
+        from redis.exceptions import WatchError
+
+        field = str(entry["source_id"])
+        with self.client.pipeline(transaction=True) as pipeline:
+            while True:
+                try:
+                    # Сравнение и запись под WATCH: параллельное событие приведет к повтору
+                    pipeline.watch(self.key)
+                    stored = pipeline.hget(self.key, field)
+                    if not _is_not_older(entry, json.loads(stored) if stored else None):
+                        pipeline.unwatch()
+                        return
+                    pipeline.multi()
+                    pipeline.hset(self.key, mapping={field: json.dumps(entry)})
+                    pipeline.execute()
+                    return
+                except WatchError:
+                    continue
+
+    def replace(self, entries: List[Dict[str, Any]]) -> None:
+        mapping = {str(entry["source_id"]): json.dumps(entry) for entry in entries}
+        mapping[_COMPLETE_FIELD] = "1"
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.delete(self.key)
+        pipeline.hset(self.key, mapping=mapping)
+        pipeline.execute()
+
+
+# Табло в памяти общее для процесса
+_MEMORY_BOARD = MemoryStatusBoard()
+
+
+def get_status_board(name: Optional[str] = None) -> StatusBoard:
+    """
+    Status board of the process
+
+    Args:
+        name: redis | memory (STATUS_BOARD by default)
+    """
+    name = name or STATUS_BOARD
+    if name == "memory":
+        return _MEMORY_BOARD
+    if name == "redis":
+        return RedisStatusBoard()
+    raise ValueError(f"Unknown status board '{name}'. Available: memory, redis")
@@ -1,8 +1,9 @@
 """Утилиты и помощники приложения"""
 
-from src.utils.api_client import get_json, post_json
+from src.utils.api_client import get_json, get_items, post_json
 
 __all__ = [
     "get_json",
+    "get_items",
     "post_json",
 ]
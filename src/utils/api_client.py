@@ -11,6 +11,24 @@ def get_json(path: str, timeout: int = 30):
     return r.json()
 
 
+def get_items(path: str, max_items: int, page_size: int = 500, timeout: int = 30):
+    """GET list endpoint page by page (next_cursor) until max_items rows are read"""
+    items = []
+    cursor = None
+    while len(items) < max_items:
+        params = {"limit": min(page_size, max_items - len(items))}
+        if cursor:
+            params["cursor"] = cursor
+        r = requests.get(f"{API_BASE}{path}", params=params, timeout=timeout)
+        r.raise_for_status()
+        page = r.json()
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    return items
+
+
 def post_json(path: str, timeout: int = 30):
     """POST request to API"""
     r = requests.post(f"{API_BASE}{path}", timeout=timeout)
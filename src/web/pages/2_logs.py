@@ -1,12 +1,12 @@
 import streamlit as st
 import pandas as pd
-from src.utils import get_json
+from src.utils import get_items
 
 
 st.set_page_config(page_title="Logs", layout="wide")
 st.title("Logs")
 
-logs = get_json("/api/logs?limit=2000")
+logs = get_items("/api/logs", 2000)
 df = pd.DataFrame(logs)
 
 if df.empty:
@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-from src.utils import get_json
+from src.utils import get_items
 st.set_page_config(page_title="Dohod Divs", layout="wide")
 
 st.title("Дивиденды")
 
-data = get_json("/api/data/dohod?limit=2000")
+data = get_items("/api/data/dohod", 2000)
 df = pd.DataFrame(data)
 
 if df.empty:
@@ -1,13 +1,13 @@
 import streamlit as st
 import pandas as pd
-from src.utils import get_json
+from src.utils import get_items, get_json
 
 
 st.set_page_config(page_title="RBC News", layout="wide")
 
 st.title("RBC Новости")
 
-data = get_json("/api/data/rbc?limit=500")
+data = get_items("/api/data/rbc", 500)
 df = pd.DataFrame(data)
 
 if df.empty:
@@ -4,12 +4,15 @@ import plotly.graph_objects as go
 from src.utils import get_json
 
 
+# Больше точек на графике шириной в экран все равно не различить
+MAX_CHART_POINTS = 1500
+
 st.set_page_config(page_title="SmartLab Stocks", layout="wide")
 
 st.title("SmartLab Акции")
 
-# Табличные данные
-data = get_json("/api/data/smartlab?limit=2000")
+# Табличные данные: последняя котировка по каждому тикеру
+data = get_json("/api/data/smartlab/latest")
 df = pd.DataFrame(data)
 
 if df.empty:
@@ -67,9 +70,16 @@ if not filtered_tickers:
     st.stop()
 
 selected_ticker = st.selectbox("Выберите акцию для графика:", filtered_tickers)
+resolution = st.radio(
+    "Интервал:", ["1h", "1d", "raw"], horizontal=True,
+    format_func={"1h": "1 час", "1d": "1 день", "raw": "Все котировки"}.get,
+)
 
-# История по тикеру
-history = get_json(f"/api/data/smartlab/history?ticker={selected_ticker}&limit=50000")
+# История по тикеру (для 1h / 1d - агрегаты OHLC, цена - close интервала)
+history = get_json(
+    f"/api/data/smartlab/history?ticker={selected_ticker}&resolution={resolution}"
+    f"&limit=50000&max_points={MAX_CHART_POINTS}"
+)
 ticker_data = pd.DataFrame(history)
 
 if ticker_data.empty:
@@ -0,0 +1,81 @@
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.api.downsample import downsample, lttb_indices
+
+
+def _reference_lttb(points, max_points):
+    """Построчная реализация LTTB для сверки"""
+    n = len(points)
+    bucket_size = (n - 2) / (max_points - 2)
+    selected = [0]
+    previous = 0
+    for bucket in range(max_points - 2):
+        start = int(math.floor(bucket * bucket_size)) + 1
+        end = int(math.floor((bucket + 1) * bucket_size)) + 1
+        next_end = min(int(math.floor((bucket + 2) * bucket_size)) + 1, n)
+        if bucket == max_points - 3:
+            avg_x, avg_y = points[-1]
+        else:
+            following = points[end:next_end]
+            avg_x = sum(p[0] for p in following) / len(following)
+            avg_y = sum(p[1] for p in following) / len(following)
+
+        px, py = points[previous]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((px - avg_x) * (y - py) - (px - x) * (avg_y - py))
+            if area > best_area:
+                best, best_area = index, area
+        selected.append(best)
+        previous = best
+    selected.append(n - 1)
+    return selected
+
+
+def test_lttb_matches_reference():
+    """Тест совпадения векторной реализации с построчной"""
+    rng = np.random.default_rng(7)
+    x = np.arange(1000, dtype=float)
+    y = np.cumsum(rng.normal(size=1000))
+
+    indices = lttb_indices(x, y, 50)
+
+    assert indices.tolist() == _reference_lttb(list(zip(x, y)), 50)
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """Тест, что сохраняются крайние точки и выбросы"""
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[250] = 100.0
+
+    indices = lttb_indices(x, y, 20)
+
+    assert len(indices) == 20
+    assert indices[0] == 0 and indices[-1] == 499
+    assert 250 in indices
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_short_series_and_bad_threshold():
+    """Тест коротких рядов и слишком малого max_points"""
+    assert lttb_indices(np.arange(5.0), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        lttb_indices(np.arange(5.0), np.arange(5.0), 2)
+
+
+def test_downsample_returns_items():
+    """Тест прореживания строк истории"""
+    start = datetime(2025, 1, 1)
+    rows = [(start + timedelta(minutes=i), float(i % 7)) for i in range(100)]
+
+    result = downsample(rows, 10, time=lambda row: row[0], value=lambda row: row[1])
+
+    assert len(result) == 10
+    assert result[0] == rows[0] and result[-1] == rows[-1]
+    assert downsample(rows, None, time=lambda row: row[0], value=lambda row: row[1]) == rows
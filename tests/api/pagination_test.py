@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.api.pagination import decode_cursor, encode_cursor, keyset_page, page_response
+from src.database import Base, Source, RBCNews
+
+
+def test_cursor_round_trip():
+    """Тест кодирования и разбора курсора"""
+    moment = datetime(2025, 3, 5, 14, 37, 12, 345)
+    cursor = encode_cursor(moment, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (moment, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "garbage!", encode_cursor(datetime(2025, 1, 1), 1)[:-3]])
+def test_decode_cursor_rejects_garbage(cursor):
+    """Тест отказа на поврежденных курсорах"""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_keyset_page_rejects_bad_limit():
+    """Тест проверки размера страницы"""
+    with pytest.raises(ValueError):
+        keyset_page(select(RBCNews), RBCNews.parsed_at, RBCNews.id, 0, None)
+
+
+@pytest.fixture
+def news_session(tmp_path):
+    """sqlite с 25 новостями, по 5 с одинаковым parsed_at"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    with Session(engine) as session:
+        session.add(Source(id=1, url="https://www.rbc.ru", name="RBC"))
+        session.add_all(
+            RBCNews(id=i, source_id=1, title=f"Новость {i}", url=f"https://www.rbc.ru/{i}",
+                    parsed_at=start + timedelta(minutes=i // 5))
+            for i in range(1, 26)
+        )
+        session.commit()
+        yield session
+
+
+def _read_all(session, limit):
+    pages, cursor = [], None
+    while True:
+        stmt = keyset_page(select(RBCNews), RBCNews.parsed_at, RBCNews.id, limit, cursor)
+        page = page_response(
+            session.scalars(stmt).all(), limit,
+            position=lambda item: (item.parsed_at, item.id), serialize=lambda item: item.id,
+        )
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_all_rows_once(news_session):
+    """Тест: страницы идут от новых к старым без пропусков и повторов при равном времени"""
+    pages = _read_all(news_session, limit=7)
+
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert [item for page in pages for item in page] == list(range(25, 0, -1))
+
+
+def test_keyset_last_full_page_has_no_cursor(news_session):
+    """Тест: если строк ровно на страницу, next_cursor пустой"""
+    pages = _read_all(news_session, limit=25)
+
+    assert len(pages) == 1 and len(pages[0]) == 25
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from src.database import Base, TableRowCount
+from src.database.counters import COUNTED_TABLES, row_counts_query
+
+
+def test_exact_counts_read_counter_table():
+    """Тест точного режима: счетчики из table_row_counts без count(*)"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[TableRowCount.__table__])
+
+    with Session(engine) as session:
+        session.add_all([
+            TableRowCount(table_name="smartlab_stocks", row_count=1_000_000),
+            TableRowCount(table_name="rbc_news", row_count=50),
+            TableRowCount(table_name="other", row_count=7),
+        ])
+        session.commit()
+
+        assert dict(session.execute(row_counts_query("exact")).all()) == {"smartlab_stocks": 1_000_000, "rbc_news": 50}
+
+    sql = str(row_counts_query("exact").compile(dialect=postgresql.dialect()))
+    assert "count(" not in sql
+
+
+def test_approximate_counts_use_planner_estimates():
+    """Тест приблизительного режима: сумма reltuples секций"""
+    sql = str(row_counts_query("approximate"))
+
+    assert "reltuples" in sql and "pg_inherits" in sql
+    assert "count(" not in sql
+    for table in COUNTED_TABLES:
+        assert f"to_regclass('{table}')" in sql
+
+
+def test_unknown_mode():
+    """Тест неизвестного режима подсчета"""
+    with pytest.raises(ValueError):
+        row_counts_query("fast")
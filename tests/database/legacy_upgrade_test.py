@@ -0,0 +1,202 @@
+"""
+Перевод базы исходной схемы (init.sql до миграций) миграциями
+
+Нужна тестовая БД PostgreSQL (TEST_DATABASE_URL), исходная схема
+создается в отдельной схеме и удаляется после теста.
+"""
+import asyncio
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.database.migrate import apply_migrations, split_statements
+from src.database.partitions import ensure_partitions
+from src.parsers.sources.dohod import content_hash
+from src.parsers.sources.records import DohodDividend
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+SCHEMA = "legacy_upgrade_test"
+
+# init.sql исходной версии проекта
+BASELINE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS source (
+    id SERIAL PRIMARY KEY,
+    url VARCHAR(255) UNIQUE NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS logs (
+    id SERIAL PRIMARY KEY,
+    source_id INT NOT NULL,
+    celery_task_id VARCHAR(255),
+    status VARCHAR(20),
+    error_code VARCHAR(50),
+    error_message TEXT,
+    items_parsed INT DEFAULT 0,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    duration_seconds INT,
+    FOREIGN KEY (source_id) REFERENCES source(id)
+);
+CREATE TABLE IF NOT EXISTS dohod_divs (
+    id SERIAL PRIMARY KEY,
+    source_id INT NOT NULL,
+    ticker VARCHAR(20),
+    company_name VARCHAR(255),
+    sector VARCHAR(100),
+    period VARCHAR(100),
+    payment_per_share DECIMAL(10, 4),
+    currency VARCHAR(10),
+    yield_percent DECIMAL(10, 2),
+    record_date_estimate DATE,
+    capitalization_mln_rub DECIMAL(20, 2),
+    dsi DECIMAL(10, 2),
+    parsed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (source_id) REFERENCES source(id)
+);
+CREATE TABLE IF NOT EXISTS rbc_news (
+    id SERIAL PRIMARY KEY,
+    source_id INT NOT NULL,
+    title TEXT,
+    url TEXT UNIQUE,
+    text TEXT,
+    parsed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (source_id) REFERENCES source(id)
+);
+CREATE TABLE IF NOT EXISTS smartlab_stocks (
+    id SERIAL PRIMARY KEY,
+    source_id INT NOT NULL,
+    name VARCHAR(255),
+    ticker VARCHAR(20),
+    last_price_rub DECIMAL(10, 2),
+    price_change_percent DECIMAL(10, 2),
+    volume_mln_rub DECIMAL(20, 2),
+    change_week_percent DECIMAL(10, 2),
+    change_month_percent DECIMAL(10, 2),
+    change_ytd_percent DECIMAL(10, 2),
+    change_year_percent DECIMAL(10, 2),
+    capitalization_bln_rub DECIMAL(20, 2),
+    capitalization_bln_usd DECIMAL(20, 2),
+    parsed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (source_id) REFERENCES source(id)
+);
+CREATE INDEX idx_logs_source_id ON logs(source_id);
+CREATE INDEX idx_dohod_ticker ON dohod_divs(ticker);
+CREATE INDEX idx_rbc_url ON rbc_news(url);
+CREATE INDEX idx_smartlab_ticker ON smartlab_stocks(ticker);
+INSERT INTO source (url, name) VALUES
+    ('https://www.rbc.ru/quote', 'RBC'),
+    ('https://smart-lab.ru/q/shares/', 'SmartLab'),
+    ('https://www.dohod.ru/ik/analytics/share', 'Dohod')
+ON CONFLICT (url) DO NOTHING;
+"""
+
+BASELINE_ROWS = [
+    "INSERT INTO logs (source_id, status, started_at) VALUES (1, 'SUCCESS', '2025-01-10 10:00'), (2, 'FAIL', NULL)",
+    "INSERT INTO rbc_news (source_id, title, url, parsed_at) VALUES "
+    "(1, 'A', 'https://www.rbc.ru/a', '2025-01-10 10:00'), (1, 'B', 'https://www.rbc.ru/b', '2025-02-10 10:00')",
+    "INSERT INTO smartlab_stocks (source_id, ticker, last_price_rub, parsed_at) VALUES "
+    "(2, 'SBER', 300, '2025-01-10 10:00'), (2, 'SBER', 301, '2025-01-10 11:00')",
+    # Один и тот же дивиденд в двух запусках и один новый во втором
+    "INSERT INTO dohod_divs (source_id, ticker, period, payment_per_share, record_date_estimate, parsed_at) VALUES "
+    "(3, 'SBER', '2024', 34.8400, '2025-07-18', '2025-01-10 10:00'), "
+    "(3, 'SBER', '2024', 34.8400, '2025-07-18', '2025-01-11 10:00'), "
+    "(3, 'GAZP', '2024', 0, NULL, '2025-01-11 10:00')",
+]
+
+
+def _engine():
+    url = make_url(TEST_DATABASE_URL).set(drivername="postgresql+asyncpg")
+    return create_async_engine(
+        url, poolclass=NullPool, connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+
+
+def _upgrade(connection):
+    for statement in split_statements(BASELINE_SCHEMA) + BASELINE_ROWS:
+        connection.exec_driver_sql(statement)
+    applied = apply_migrations(connection)
+    ensure_partitions(connection, months_ahead=0)
+    return applied
+
+
+def _query(connection, sql):
+    return connection.execute(text(sql)).all()
+
+
+def test_baseline_database_is_converted():
+    """Тест: база исходной схемы переводится на секции без потери строк"""
+
+    def check(connection):
+        assert _upgrade(connection)[0] == 1
+
+        kinds = dict(_query(connection, (
+            "SELECT relname, relkind FROM pg_class WHERE oid IN (to_regclass('logs'), "
+            "to_regclass('dohod_divs'), to_regclass('rbc_news'), to_regclass('smartlab_stocks'))"
+        )))
+        assert kinds == {"logs": "p", "dohod_divs": "p", "rbc_news": "p", "smartlab_stocks": "p"}
+        assert _query(connection, "SELECT to_regclass('logs_legacy')") == [(None,)]
+
+        assert [row[0] for row in _query(connection, "SELECT id FROM logs ORDER BY id")] == [1, 2]
+        assert _query(connection, "SELECT count(*) FROM logs WHERE started_at IS NULL") == [(0,)]
+        assert _query(connection, "SELECT count(*) FROM rbc_news") == [(2,)]
+        # Уже сохраненные новости не считаются новыми
+        assert _query(connection, "SELECT url, first_seen_at FROM rbc_news_urls ORDER BY url") == [
+            ("https://www.rbc.ru/a", datetime(2025, 1, 10, 10)), ("https://www.rbc.ru/b", datetime(2025, 2, 10, 10)),
+        ]
+        assert _query(connection, "SELECT count(*) FROM smartlab_stocks WHERE is_full_snapshot") == [(2,)]
+        # История легла в месячные секции своих месяцев, а не в DEFAULT
+        assert _query(connection, "SELECT count(*) FROM smartlab_stocks_p202501") == [(2,)]
+        assert _query(connection, "SELECT count(*) FROM rbc_news_p202502") == [(1,)]
+        assert _query(connection, "SELECT count(*) FROM dohod_divs_p202501") == [(3,)]
+        for table in ("logs", "dohod_divs", "rbc_news", "smartlab_stocks"):
+            assert _query(connection, f"SELECT count(*) FROM {table}_default") == [(0,)], table
+        # Запуск без started_at получает текущее время и секцию текущего месяца
+        current = f"logs_p{date.today():%Y%m}"
+        assert _query(connection, f"SELECT count(*) FROM {current} WHERE id = 2") == [(1,)]
+        assert _query(connection, "SELECT ticker, last_price_rub FROM smartlab_latest") == [("SBER", Decimal("301.00"))]
+
+        # Новые строки получают id после скопированных
+        new_id = connection.execute(text(
+            "INSERT INTO logs (source_id, status) VALUES (1, 'STARTED') RETURNING id"
+        )).scalar()
+        assert new_id == 3
+
+        sber = content_hash(DohodDividend(
+            "SBER", "", "", "2024", Decimal("34.84"), "", Decimal("0"), date(2025, 7, 18), Decimal("0"), Decimal("0"),
+        ))
+        versions = _query(connection, (
+            "SELECT ticker, content_hash, valid_from, valid_to FROM dohod_divs ORDER BY ticker, parsed_at"
+        ))
+        assert [(row.ticker, row.valid_to) for row in versions] == [
+            ("GAZP", None), ("SBER", datetime(2025, 1, 11, 10)), ("SBER", None),
+        ]
+        assert versions[1].content_hash == versions[2].content_hash == sber
+        assert versions[1].valid_from == datetime(2025, 1, 10, 10)
+
+        counts = dict(_query(connection, "SELECT table_name, row_count FROM table_row_counts"))
+        assert counts == {"smartlab_stocks": 2, "rbc_news": 2, "dohod_divs": 3}
+
+    async def run():
+        engine = _engine()
+        try:
+            async with engine.begin() as connection:
+                await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            async with engine.begin() as connection:
+                await connection.run_sync(check)
+        finally:
+            async with engine.begin() as connection:
+                await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from src.database import Base, Source, DohodDiv, SmartlabLatest, bulk_load, upsert_rows
+from src.database import loader
+
+
+def _rows():
+    return [
+        {"source_id": 1, "ticker": "SBER", "company_name": "Сбер\tбанк", "payment_per_share": Decimal("34.84"),
+         "record_date_estimate": date(2025, 7, 17)},
+        {"source_id": 1, "ticker": "GAZP", "company_name": "Газпром\\", "payment_per_share": Decimal("0"),
+         "record_date_estimate": None},
+    ]
+
+
+def _postgres_session():
+    """Сессия-заглушка с диалектом PostgreSQL и курсором драйвера"""
+    session = MagicMock()
+    session.get_bind.return_value.dialect = postgresql.dialect()
+    session.get_bind.return_value.url = make_url("postgresql+pg8000://user:secret@db:5432/scraper_db")
+    cursor = Mock(spec=["execute", "close"])
+    session.connection.return_value.connection.driver_connection.cursor.return_value = cursor
+    return session, cursor
+
+
+def test_bulk_load_unknown_method():
+    """Тест неизвестного способа загрузки"""
+    with pytest.raises(ValueError):
+        bulk_load(MagicMock(), DohodDiv, _rows(), method="csv")
+
+
+def test_bulk_load_empty_rows():
+    """Тест, что пустой список ничего не загружает"""
+    session = MagicMock()
+    bulk_load(session, DohodDiv, [], method="copy")
+    session.execute.assert_not_called()
+
+
+def test_bulk_load_falls_back_to_executemany(tmp_path):
+    """Тест, что вне PostgreSQL COPY заменяется на executemany"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(Source(id=1, url="https://www.dohod.ru", name="Dohod"))
+        bulk_load(session, DohodDiv, _rows(), method="copy")
+        session.commit()
+        tickers = session.scalars(select(DohodDiv.ticker).order_by(DohodDiv.id)).all()
+
+    assert tickers == ["SBER", "GAZP"]
+
+
+def test_upsert_rows_replaces_by_key(tmp_path):
+    """Тест, что upsert_rows обновляет строки с существующим ключом"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(Source(id=1, url="https://smart-lab.ru", name="SmartLab"))
+        upsert_rows(session, SmartlabLatest, [
+            {"ticker": "SBER", "source_id": 1, "last_price_rub": Decimal("300")},
+            {"ticker": "GAZP", "source_id": 1, "last_price_rub": Decimal("100")},
+        ], key=["ticker"])
+        upsert_rows(session, SmartlabLatest, [
+            {"ticker": "SBER", "source_id": 1, "last_price_rub": Decimal("301")},
+        ], key=["ticker"])
+        session.commit()
+        prices = dict(session.execute(select(SmartlabLatest.ticker, SmartlabLatest.last_price_rub)).all())
+
+    assert prices == {"SBER": Decimal("301"), "GAZP": Decimal("100")}
+
+
+def test_with_defaults_adds_python_defaults():
+    """Тест, что Python-умолчания колонок добавляются в строки для COPY"""
+    rows = _rows()
+    columns = loader._with_defaults(DohodDiv.__table__, rows)
+
+    assert columns == ["source_id", "ticker", "company_name", "payment_per_share", "record_date_estimate", "valid_from", "parsed_at"]
+    assert isinstance(rows[0]["parsed_at"], datetime)
+    assert rows[0]["parsed_at"] == rows[1]["parsed_at"]
+
+
+def test_copy_text_escapes_values():
+    """Тест текстового формата COPY: экранирование и NULL"""
+    text = loader._copy_text(_rows(), ["ticker", "company_name", "payment_per_share", "record_date_estimate"])
+    assert text == (
+        "SBER\tСбер\\tбанк\t34.84\t2025-07-17\n"
+        "GAZP\tГазпром\\\\\t0\t\\N\n"
+    )
+
+
+def test_bulk_load_copy_uses_driver_stream():
+    """Тест загрузки через COPY FROM STDIN соединением сессии (pg8000)"""
+    session, cursor = _postgres_session()
+
+    bulk_load(session, DohodDiv, _rows(), method="copy")
+
+    sql = cursor.execute.call_args.args[0]
+    stream = cursor.execute.call_args.kwargs["stream"]
+    assert sql.startswith("COPY dohod_divs (source_id, ticker, company_name, payment_per_share, record_date_estimate, valid_from, parsed_at) FROM STDIN")
+    assert stream.getvalue().startswith("1\tSBER\tСбер\\tбанк\t34.84\t2025-07-17\t")
+    cursor.close.assert_called_once()
+    session.execute.assert_not_called()
+
+
+def test_bulk_load_asyncpg_copies_records_on_session_connection():
+    """Тест загрузки через asyncpg copy_records_to_table соединением сессии (в ее транзакции)"""
+    session, _ = _postgres_session()
+    session.get_bind.return_value.dialect = postgresql.asyncpg.dialect()
+    connection = AsyncMock()
+    session.connection.return_value.connection.driver_connection = connection
+
+    with patch("asyncpg.connect") as connect:
+        asyncio.run(_in_greenlet(bulk_load, session, DohodDiv, _rows(), method="asyncpg"))
+
+    connect.assert_not_called()
+    kwargs = connection.copy_records_to_table.call_args.kwargs
+    assert connection.copy_records_to_table.call_args.args == ("dohod_divs",)
+    assert kwargs["columns"][-1] == "parsed_at"
+    assert kwargs["records"][1][:5] == (1, "GAZP", "Газпром\\", Decimal("0"), None)
+    connection.close.assert_not_called()
+    session.commit.assert_not_called()
+
+
+async def _in_greenlet(function, *args, **kwargs):
+    """Вызов синхронной функции так же, как его делает AsyncSession.run_sync"""
+    from sqlalchemy.util import greenlet_spawn
+    return await greenlet_spawn(function, *args, **kwargs)
+
+
+def test_bulk_load_asyncpg_rejects_other_drivers():
+    """Тест: asyncpg не открывает отдельное соединение для сессии на другом драйвере"""
+    session, cursor = _postgres_session()
+
+    with patch("asyncpg.connect") as connect, pytest.raises(ValueError):
+        bulk_load(session, DohodDiv, _rows(), method="asyncpg")
+
+    connect.assert_not_called()
+    cursor.execute.assert_not_called()
@@ -0,0 +1,128 @@
+import re
+
+import pytest
+from unittest.mock import MagicMock
+
+from src.database import migrate
+from src.database.migrate import apply_migrations, load_migrations, split_statements
+
+
+def test_load_migrations_in_version_order():
+    """Тест порядка миграций проекта"""
+    migrations = load_migrations()
+
+    assert [m.version for m in migrations] == sorted(m.version for m in migrations)
+    assert migrations[0].name == "initial"
+    assert any(m.name == "query_indexes" for m in migrations)
+
+
+def test_load_migrations_rejects_bad_names(tmp_path):
+    """Тест проверки имен и номеров файлов миграций"""
+    (tmp_path / "0001_a.sql").write_text("SELECT 1;")
+    (tmp_path / "0001_b.sql").write_text("SELECT 1;")
+    with pytest.raises(ValueError):
+        load_migrations(tmp_path)
+
+    (tmp_path / "0001_b.sql").unlink()
+    (tmp_path / "add_column.sql").write_text("SELECT 1;")
+    with pytest.raises(ValueError):
+        load_migrations(tmp_path)
+
+
+def test_split_statements():
+    """Тест разбиения миграции на запросы"""
+    sql = """
+-- комментарий; не запрос
+CREATE TABLE t (
+    id INT
+);
+CREATE INDEX idx ON t(id);
+
+INSERT INTO t VALUES (1)
+"""
+    assert split_statements(sql) == [
+        "CREATE TABLE t (\n    id INT\n)",
+        "CREATE INDEX idx ON t(id)",
+        "INSERT INTO t VALUES (1)",
+    ]
+
+
+def test_project_migrations_split_cleanly():
+    """Тест, что в миграциях проекта нет пустых и склеенных запросов"""
+    for migration in load_migrations():
+        for statement in split_statements(migration.path.read_text(encoding="utf-8")):
+            # ';' допустим только в теле функции
+            assert ";" not in re.sub(r"\$\$.*?\$\$", "", statement, flags=re.DOTALL), migration.path.name
+
+
+def test_split_statements_keeps_function_bodies():
+    """Тест, что ';' внутри $$ ... $$ не разбивает функцию"""
+    sql = """
+CREATE FUNCTION f() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    -- комментарий в теле
+    UPDATE t SET n = n + 1;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER t_count AFTER INSERT ON t FOR EACH STATEMENT EXECUTE FUNCTION f();
+"""
+    assert split_statements(sql) == [
+        "CREATE FUNCTION f() RETURNS trigger LANGUAGE plpgsql AS $$\nBEGIN\n    -- комментарий в теле\n"
+        "    UPDATE t SET n = n + 1;\n    RETURN NULL;\nEND\n$$",
+        "CREATE TRIGGER t_count AFTER INSERT ON t FOR EACH STATEMENT EXECUTE FUNCTION f()",
+    ]
+
+
+def test_apply_migrations_skips_applied(tmp_path):
+    """Тест, что применяются только новые миграции и записываются их версии"""
+    (tmp_path / "0001_first.sql").write_text("CREATE TABLE a (id INT);")
+    (tmp_path / "0002_second.sql").write_text("CREATE TABLE b (id INT);\nCREATE INDEX idx_b ON b(id);")
+
+    connection = MagicMock()
+    connection.execute.return_value.scalars.return_value = [1]
+
+    assert apply_migrations(connection, tmp_path) == [2]
+
+    executed = [call.args[0] for call in connection.exec_driver_sql.call_args_list]
+    assert executed == ["CREATE TABLE b (id INT)", "CREATE INDEX idx_b ON b(id)"]
+
+    sql = [str(call.args[0]) for call in connection.execute.call_args_list]
+    assert sql[0].startswith("SELECT pg_advisory_xact_lock")
+    assert connection.execute.call_args.args[1] == {"version": 2, "name": "second"}
+
+
+def test_apply_migrations_converts_legacy_tables_around_initial(tmp_path, monkeypatch):
+    """Тест: таблицы исходной схемы переименовываются до 0001 и копируются сразу после нее"""
+    (tmp_path / "0001_initial.sql").write_text("CREATE TABLE logs (id INT);")
+    (tmp_path / "0002_indexes.sql").write_text("CREATE INDEX idx ON logs(id);")
+
+    calls = []
+    monkeypatch.setattr(migrate, "find_legacy_tables", lambda connection: ["logs"])
+    monkeypatch.setattr(migrate, "rename_legacy_tables", lambda connection, tables: calls.append(("rename", tables)))
+    monkeypatch.setattr(migrate, "copy_legacy_tables", lambda connection, tables: calls.append(("copy", tables)))
+
+    connection = MagicMock()
+    connection.execute.return_value.scalars.return_value = []
+    connection.exec_driver_sql.side_effect = lambda statement: calls.append(("sql", statement))
+
+    assert apply_migrations(connection, tmp_path) == [1, 2]
+    assert calls == [
+        ("rename", ["logs"]),
+        ("sql", "CREATE TABLE logs (id INT)"),
+        ("copy", ["logs"]),
+        ("sql", "CREATE INDEX idx ON logs(id)"),
+    ]
+
+
+def test_apply_migrations_skips_legacy_check_after_initial(tmp_path, monkeypatch):
+    """Тест: после применения 0001 старая схема не ищется"""
+    (tmp_path / "0001_initial.sql").write_text("CREATE TABLE logs (id INT);")
+    find = MagicMock(return_value=["logs"])
+    monkeypatch.setattr(migrate, "find_legacy_tables", find)
+
+    connection = MagicMock()
+    connection.execute.return_value.scalars.return_value = [1]
+
+    assert apply_migrations(connection, tmp_path) == []
+    find.assert_not_called()
@@ -0,0 +1,137 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+from src.database import partitions
+from src.database.partitions import (
+    PARTITIONED_TABLES, add_months, create_partitions, drop_old_partitions, ensure_partitions, month_start,
+    partition_name,
+)
+
+
+def _connection(existing=(), children=(), keep=()):
+    """
+    Соединение-заглушка: to_regclass находит existing, pg_inherits
+    возвращает children, EXISTS(keep_if) истинно для секций из keep
+    """
+    connection = MagicMock()
+    statements = []
+
+    def execute(statement, params=None):
+        sql = str(statement)
+        statements.append((sql, params))
+        result = MagicMock()
+        if "to_regclass" in sql:
+            result.scalar.return_value = params["name"] if params["name"] in existing else None
+        elif "pg_inherits" in sql:
+            result.scalars.return_value.all.return_value = [
+                name for name in children if name.startswith(params["table"] + "_")
+            ]
+        elif sql.startswith("SELECT EXISTS"):
+            result.scalar.return_value = any(f"FROM {name} " in sql for name in keep)
+        return result
+
+    connection.execute.side_effect = execute
+    return connection, statements
+
+
+def _ddl(statements):
+    return [sql for sql, _ in statements if not sql.startswith("SELECT")]
+
+
+def test_month_helpers():
+    """Тест вычисления месяцев и имен секций"""
+    assert month_start(date(2025, 3, 17)) == date(2025, 3, 1)
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_name("rbc_news", date(2025, 2, 1)) == "rbc_news_p202502"
+
+
+def test_ensure_partitions_creates_missing_months():
+    """Тест создания секций на текущий и следующие месяцы"""
+    existing = {"smartlab_stocks_p202512", "smartlab_stocks_default"}
+    connection, statements = _connection(existing=existing)
+
+    created = ensure_partitions(connection, months_ahead=1, today=date(2025, 12, 20))
+
+    assert len(created) == 2 * len(partitions.PARTITIONED_TABLES) - 1
+    assert "smartlab_stocks_p202512" not in created
+    assert "smartlab_stocks_p202601" in created
+    assert "logs_p202512" in created
+
+    ddl = _ddl(statements)
+    assert "CREATE TABLE smartlab_stocks_p202601 (LIKE smartlab_stocks INCLUDING DEFAULTS INCLUDING CONSTRAINTS)" in ddl
+    assert ("ALTER TABLE smartlab_stocks ATTACH PARTITION smartlab_stocks_p202601 "
+            "FOR VALUES FROM ('2026-01-01') TO ('2026-02-01')") in ddl
+
+
+def test_ensure_partitions_moves_rows_from_default():
+    """Тест переноса строк месяца из секции DEFAULT перед ATTACH"""
+    connection, statements = _connection(existing={"logs_default"})
+
+    ensure_partitions(connection, months_ahead=0, today=date(2025, 5, 2))
+
+    moves = [(sql, params) for sql, params in statements if sql.startswith("WITH moved")]
+    assert len(moves) == 1
+    sql, params = moves[0]
+    assert "DELETE FROM logs_default WHERE started_at >= :start AND started_at < :end" in sql
+    assert "INSERT INTO logs_p202505 SELECT * FROM moved" in sql
+    assert params == {"start": date(2025, 5, 1), "end": date(2025, 6, 1)}
+
+    ddl = _ddl(statements)
+    assert ddl.index(sql) < ddl.index(
+        "ALTER TABLE logs ATTACH PARTITION logs_p202505 FOR VALUES FROM ('2025-05-01') TO ('2025-06-01')"
+    )
+
+
+def test_create_partitions_covers_month_range():
+    """Тест создания секций за диапазон месяцев (история при переводе старой схемы)"""
+    rbc_news = next(table for table in PARTITIONED_TABLES if table.name == "rbc_news")
+    connection, _ = _connection(existing={"rbc_news_p202412"})
+
+    created = create_partitions(connection, rbc_news, date(2024, 11, 15), date(2025, 2, 3))
+
+    assert created == ["rbc_news_p202411", "rbc_news_p202501", "rbc_news_p202502"]
+
+
+def test_drop_old_partitions_disabled_by_default():
+    """Тест, что без срока хранения секции не трогаются"""
+    connection, statements = _connection(children=["rbc_news_p202001"])
+
+    assert drop_old_partitions(connection, retention_months=0) == []
+    assert statements == []
+
+
+def test_drop_old_partitions_detaches_and_drops():
+    """Тест удаления секций старше срока хранения"""
+    children = ["rbc_news_p202501", "rbc_news_p202502", "rbc_news_p202503", "rbc_news_default"]
+    connection, statements = _connection(children=children)
+
+    dropped = drop_old_partitions(connection, retention_months=2, archive_schema="", today=date(2025, 4, 10))
+
+    assert dropped == ["rbc_news_p202501"]
+    ddl = _ddl(statements)
+    assert ddl == [
+        "UPDATE table_row_counts SET row_count = row_count - (SELECT count(*) FROM rbc_news_p202501), "
+        "updated_at = LOCALTIMESTAMP WHERE table_name = :table",
+        "ALTER TABLE rbc_news DETACH PARTITION rbc_news_p202501",
+        "DROP TABLE rbc_news_p202501",
+    ]
+    assert [params for sql, params in statements if sql.startswith("UPDATE")] == [{"table": "rbc_news"}]
+
+
+def test_drop_old_partitions_archives_and_keeps_current_versions():
+    """Тест переноса в архив и сохранения секций с текущими версиями Dohod"""
+    children = ["dohod_divs_p202401", "dohod_divs_p202402"]
+    connection, statements = _connection(children=children, keep={"dohod_divs_p202401"})
+
+    archived = drop_old_partitions(connection, retention_months=12, archive_schema="archive", today=date(2025, 6, 1))
+
+    assert archived == ["dohod_divs_p202402"]
+    ddl = _ddl(statements)
+    assert ddl == [
+        "CREATE SCHEMA IF NOT EXISTS archive",
+        "UPDATE table_row_counts SET row_count = row_count - (SELECT count(*) FROM dohod_divs_p202402), "
+        "updated_at = LOCALTIMESTAMP WHERE table_name = :table",
+        "ALTER TABLE dohod_divs DETACH PARTITION dohod_divs_p202402",
+        "ALTER TABLE dohod_divs_p202402 SET SCHEMA archive",
+    ]
@@ -0,0 +1,193 @@
+"""
+Регрессионная проверка планов запросов API
+
+На большом наборе данных каждый запрос эндпоинта прогоняется через
+EXPLAIN, тест падает, если в плане есть Seq Scan по большой таблице.
+Нужна тестовая БД PostgreSQL (TEST_DATABASE_URL), данные создаются
+в отдельной схеме и удаляются после тестов.
+"""
+import asyncio
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.api.pagination import encode_cursor
+from src.database.migrate import apply_migrations
+from src.database.partitions import add_months, ensure_partitions, month_start
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+SCHEMA = "query_plans_test"
+# Seq Scan допустим только по маленьким таблицам (source, пустые секции)
+SEQ_SCAN_MAX_ROWS = 1000
+
+SEED = [
+    # ~70 дней котировок, 200 тикеров
+    "INSERT INTO smartlab_stocks (source_id, name, ticker, last_price_rub, is_full_snapshot, parsed_at) "
+    "SELECT 2, 'Company ' || (g % 200), 'T' || (g % 200), g % 1000, g % 10 = 0, "
+    "LOCALTIMESTAMP - g * INTERVAL '30 seconds' FROM generate_series(1, 200000) g",
+    "INSERT INTO rbc_news (source_id, title, url, text, parsed_at) "
+    "SELECT 1, 'Новость ' || g, 'https://www.rbc.ru/news/' || g, 'Текст', "
+    "LOCALTIMESTAMP - g * INTERVAL '1 minute' FROM generate_series(1, 50000) g",
+    # Текущая только каждая десятая версия
+    "INSERT INTO dohod_divs (source_id, ticker, period, content_hash, valid_from, valid_to, parsed_at) "
+    "SELECT 3, 'T' || (g % 300), '2025', md5(g::text), LOCALTIMESTAMP - g * INTERVAL '1 minute', "
+    "CASE WHEN g % 10 = 0 THEN NULL ELSE LOCALTIMESTAMP END, "
+    "LOCALTIMESTAMP - g * INTERVAL '1 minute' FROM generate_series(1, 50000) g",
+    "INSERT INTO logs (source_id, celery_task_id, status, started_at, finished_at) "
+    "SELECT g % 3 + 1, 'task-' || g, 'SUCCESS', LOCALTIMESTAMP - g * INTERVAL '30 seconds', "
+    "LOCALTIMESTAMP - g * INTERVAL '30 seconds' + INTERVAL '10 seconds' FROM generate_series(1, 100000) g",
+    # Часовые бары: 200 тикеров за ~500 часов
+    "INSERT INTO smartlab_ohlc (ticker, resolution, bucket, open, high, low, close, samples) "
+    "SELECT 'T' || (g % 200), '1h', date_trunc('hour', LOCALTIMESTAMP) - (g / 200) * INTERVAL '1 hour', "
+    "100, 101, 99, 100, 1 FROM generate_series(0, 99999) g",
+    "ANALYZE",
+]
+
+
+def _engine():
+    url = make_url(TEST_DATABASE_URL).set(drivername="postgresql+asyncpg")
+    return create_async_engine(
+        url, poolclass=NullPool, connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+
+
+def _setup(connection):
+    apply_migrations(connection)
+    # Секции на три месяца назад - туда попадают засеянные данные
+    ensure_partitions(connection, months_ahead=4, today=add_months(month_start(date.today()), -3))
+
+
+@pytest.fixture(scope="module")
+def engine():
+    async def create():
+        engine = _engine()
+        async with engine.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await connection.run_sync(_setup)
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in SEED:
+                await connection.execute(text(statement))
+        return engine
+
+    async def drop(engine):
+        async with engine.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+    engine = asyncio.run(create())
+    yield engine
+    asyncio.run(drop(engine))
+
+
+def _seq_scans(plan):
+    """Имена таблиц, которые план читает последовательно"""
+    relations = []
+    if plan.get("Node Type") == "Seq Scan":
+        relations.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations.extend(_seq_scans(child))
+    return relations
+
+
+async def _explain_endpoint(engine, call):
+    """Выполняет эндпоинт и возвращает Seq Scan по большим таблицам в его запросах"""
+    from src.api import main
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("EXPLAIN"):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(engine) as session:
+            await call(main, session)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    assert statements
+    problems = []
+    async with engine.connect() as connection:
+        for statement, parameters in statements:
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            for relation in _seq_scans(plan[0]["Plan"]):
+                rows = await connection.scalar(
+                    text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": relation}
+                )
+                if rows > SEQ_SCAN_MAX_ROWS:
+                    problems.append(f"Seq Scan {relation} ({rows:.0f} строк): {statement}")
+    return problems
+
+
+# Курсор глубокой страницы: месяц назад
+DEEP_CURSOR = encode_cursor(datetime.now() - timedelta(days=30), 2 ** 31 - 1)
+
+ENDPOINTS = {
+    "smartlab_data": lambda main, session: main.smartlab_data(limit=200, session=session),
+    "smartlab_latest": lambda main, session: main.smartlab_latest(session=session),
+    "rbc_data": lambda main, session: main.rbc_data(limit=200, session=session),
+    "dohod_data": lambda main, session: main.dohod_data(limit=200, history=False, session=session),
+    "dohod_data_history": lambda main, session: main.dohod_data(limit=200, history=True, session=session),
+    "api_logs": lambda main, session: main.api_logs(limit=200, session=session),
+    "smartlab_data_deep": lambda main, session: main.smartlab_data(limit=200, cursor=DEEP_CURSOR, session=session),
+    "rbc_data_deep": lambda main, session: main.rbc_data(limit=200, cursor=DEEP_CURSOR, session=session),
+    "dohod_data_deep": lambda main, session: main.dohod_data(
+        limit=200, history=True, cursor=DEEP_CURSOR, session=session
+    ),
+    "api_logs_deep": lambda main, session: main.api_logs(limit=200, cursor=DEEP_CURSOR, session=session),
+    # Табло может ответить без SQL, проверяется запрос его пересборки
+    "api_status": lambda main, session: main._rebuild_status_board(session),
+    "stats": lambda main, session: main.stats(mode="exact", session=session),
+    "stats_approximate": lambda main, session: main.stats(mode="approximate", session=session),
+    "rbc_news_one": lambda main, session: main.rbc_news_one(news_id=100, session=session),
+    "smartlab_history": lambda main, session: main.smartlab_history(
+        ticker="T7", limit=50000, since=None, resolution="raw", session=session
+    ),
+    "smartlab_history_1h": lambda main, session: main.smartlab_history(
+        ticker="T7", limit=50000, since=None, resolution="1h", session=session
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(ENDPOINTS))
+def test_endpoint_queries_use_indexes(engine, name):
+    """Тест, что запросы эндпоинта не читают большие таблицы целиком"""
+    problems = asyncio.run(_explain_endpoint(engine, ENDPOINTS[name]))
+    assert not problems, "\n".join(problems)
+
+
+def test_row_counters_match_tables(engine):
+    """Тест, что счетчики, обновляемые триггерами, совпадают с count(*)"""
+    from src.api import main
+
+    async def compare():
+        async with AsyncSession(engine) as session:
+            counters = await main.stats(mode="exact", session=session)
+            counts = {
+                table: await session.scalar(text(f"SELECT count(*) FROM {table}"))
+                for table in ("smartlab_stocks", "rbc_news", "dohod_divs")
+            }
+            approximate = await main.stats(mode="approximate", session=session)
+        return counters, counts, approximate
+
+    counters, counts, approximate = asyncio.run(compare())
+
+    assert counters["smartlab_total"] == counts["smartlab_stocks"] == 200000
+    assert counters["rbc_total"] == counts["rbc_news"]
+    assert counters["dohod_total"] == counts["dohod_divs"]
+    # После ANALYZE оценка близка к точному числу
+    assert abs(approximate["smartlab_total"] - counts["smartlab_stocks"]) < counts["smartlab_stocks"] * 0.1
@@ -0,0 +1,60 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.database import Base, SmartlabOHLC, upsert_ohlc
+from src.database.rollups import bucket_start, ohlc_rows
+from src.parsers.sources.records import SmartlabQuote
+
+
+def _quote(ticker, price, volume="10"):
+    return SmartlabQuote(ticker=ticker, last_price_rub=Decimal(price), volume_mln_rub=Decimal(volume))
+
+
+def test_bucket_start():
+    """Тест начала часового и дневного интервалов"""
+    moment = datetime(2025, 3, 5, 14, 37, 12, 500)
+    assert bucket_start(moment, "1h") == datetime(2025, 3, 5, 14)
+    assert bucket_start(moment, "1d") == datetime(2025, 3, 5)
+
+
+def test_ohlc_rows_merges_duplicates_and_skips_empty_prices():
+    """Тест сворачивания повторов тикера и пропуска котировок без цены"""
+    rows = ohlc_rows([_quote("SBER", "300"), _quote("SBER", "305"), _quote("GAZP", "0")],
+                     datetime(2025, 3, 5, 14, 37))
+
+    assert len(rows) == 2
+    hourly = next(row for row in rows if row["resolution"] == "1h")
+    assert hourly["bucket"] == datetime(2025, 3, 5, 14)
+    assert (hourly["open"], hourly["high"], hourly["low"], hourly["close"], hourly["samples"]) == (
+        Decimal("300"), Decimal("305"), Decimal("300"), Decimal("305"), 2
+    )
+
+
+def test_upsert_ohlc_accumulates_bars(tmp_path):
+    """Тест инкрементального обновления OHLC по наблюдениям"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+
+    observations = [
+        (datetime(2025, 3, 5, 10, 5), "100"),
+        (datetime(2025, 3, 5, 10, 35), "104"),
+        (datetime(2025, 3, 5, 10, 55), "99"),
+        (datetime(2025, 3, 5, 11, 5), "101"),
+    ]
+    with Session(engine) as session:
+        for moment, price in observations:
+            upsert_ohlc(session, ohlc_rows([_quote("SBER", price, volume=price)], moment))
+        session.commit()
+        bars = {
+            (bar.resolution, bar.bucket): (bar.open, bar.high, bar.low, bar.close, bar.volume_mln_rub, bar.samples)
+            for bar in session.scalars(select(SmartlabOHLC))
+        }
+
+    assert bars == {
+        ("1h", datetime(2025, 3, 5, 10)): (Decimal("100"), Decimal("104"), Decimal("99"), Decimal("99"), Decimal("99"), 3),
+        ("1h", datetime(2025, 3, 5, 11)): (Decimal("101"), Decimal("101"), Decimal("101"), Decimal("101"), Decimal("101"), 1),
+        ("1d", datetime(2025, 3, 5)): (Decimal("100"), Decimal("104"), Decimal("99"), Decimal("101"), Decimal("101"), 4),
+    }
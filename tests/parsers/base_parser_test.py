@@ -1,6 +1,13 @@
+import asyncio
+import re
 import pytest
+import aiohttp
 from unittest.mock import MagicMock, patch, Mock
-from src.parsers.sources import BaseParser
+from datetime import date
+from decimal import Decimal
+from src.parsers.sources import BaseParser, DohodDividend, RBCArticle, SmartlabQuote
+from src.parsers.sources.base_parser import batched
+from src.parsers.sources.http_cache import HTTPCache
 
 
 # Тесты инициализации
@@ -92,6 +99,35 @@ def test_to_json_unicode():
     assert "Значение" in json_str
 
 
+def test_to_json_records():
+    """Тест сериализации записей NamedTuple с датами и Decimal"""
+    import json
+    parser = BaseParser("https://example.com")
+    data = [
+        DohodDividend("SBER", "Сбербанк", "Финансы", "2025", Decimal("34.84"), "RUB", Decimal("11.4"), date(2025, 7, 17), Decimal("100"), Decimal("0.93")),
+        SmartlabQuote(ticker="GAZP", last_price_rub=Decimal("123.45")),
+        RBCArticle(title="Заголовок", url="https://www.rbc.ru/test", text="Текст"),
+    ]
+
+    parsed = json.loads(parser.to_json(data))
+
+    assert parsed[0]["ticker"] == "SBER"
+    assert parsed[0]["record_date_estimate"] == "2025-07-17"
+    assert parsed[1]["last_price_rub"] == "123.45"
+    assert parsed[1]["name"] == "No information!"
+    assert parsed[2] == {
+        "title": "Заголовок", "url": "https://www.rbc.ru/test", "text": "Текст",
+        "description": None, "published_at": None,
+    }
+
+
+def test_to_json_unsupported_type():
+    """Тест значения, которое нельзя сериализовать"""
+    parser = BaseParser("https://example.com")
+    with pytest.raises(TypeError):
+        parser.to_json([{"value": object()}])
+
+
 # Тесты NotImplementedError
 def test_parse_not_implemented():
     """Тест, что parse() выбрасывает NotImplementedError"""
@@ -151,3 +187,375 @@ def test_get_source_by_name():
         assert source == mock_source
         mock_session.query.assert_called_once()
 
+
+# Тесты асинхронного движка
+class _FakeResponse:
+    """Минимальная замена ответа aiohttp"""
+
+    def __init__(self, text="", error=None, status=200, headers=None):
+        self._text = text
+        self._error = error
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self._error:
+            raise self._error
+
+    async def text(self):
+        return self._text
+
+
+class _FakeSession:
+    """Минимальная замена aiohttp.ClientSession"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+        self.sent_headers = []
+
+    def get(self, url, headers=None):
+        self.requested.append(url)
+        self.sent_headers.append(headers or {})
+        page = self.pages.get(url)
+        if isinstance(page, Exception):
+            return _FakeResponse(error=page)
+        if isinstance(page, _FakeResponse):
+            return page
+        return _FakeResponse(text=page)
+
+
+def test_init_max_connections():
+    """Тест настройки размера пула соединений"""
+    parser = BaseParser("https://example.com", max_connections=5)
+    assert parser.max_connections == 5
+
+
+def test_create_async_session_bounded_pool():
+    """Тест ограничения пула соединений aiohttp сессии"""
+    parser = BaseParser("https://example.com", max_connections=7)
+
+    async def check():
+        session = parser._create_async_session()
+        try:
+            assert session.connector.limit == 7
+        finally:
+            await session.close()
+
+    asyncio.run(check())
+
+
+def test_fetch_html_async_success():
+    """Тест успешного асинхронного получения HTML"""
+    parser = BaseParser("https://example.com")
+    session = _FakeSession({"https://example.com": "<html>Test</html>"})
+
+    html = asyncio.run(parser.fetch_html_async(session=session))
+    assert html == "<html>Test</html>"
+    assert session.requested == ["https://example.com"]
+
+
+def test_fetch_html_async_client_error():
+    """Тест обработки ошибки aiohttp"""
+    parser = BaseParser("https://example.com")
+    session = _FakeSession({"https://example.com": aiohttp.ClientError("boom")})
+
+    html = asyncio.run(parser.fetch_html_async(session=session))
+    assert html is None
+
+
+def test_fetch_many_async():
+    """Тест параллельной загрузки нескольких страниц"""
+    parser = BaseParser("https://example.com")
+    session = _FakeSession({
+        "https://example.com/a": "A",
+        "https://example.com/b": aiohttp.ClientError("boom"),
+    })
+
+    pages = asyncio.run(parser.fetch_many_async(
+        ["https://example.com/a", "https://example.com/b"], session
+    ))
+    assert pages == {"https://example.com/a": "A", "https://example.com/b": None}
+
+
+def test_parse_async_default_uses_parse():
+    """Тест, что parse_async() по умолчанию вызывает parse()"""
+    parser = BaseParser("https://example.com")
+
+    with patch.object(parser, 'parse', return_value=[{"name": "Test"}]):
+        result = asyncio.run(parser.parse_async())
+        assert result == [{"name": "Test"}]
+
+
+# Тесты потокового разбора и сохранения пачками
+def test_batched():
+    """Тест разбиения потока на пачки"""
+    assert list(batched(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+
+def test_parse_iter_default_uses_parse():
+    """Тест, что parse_iter() по умолчанию выдает результат parse()"""
+    parser = BaseParser("https://example.com")
+
+    with patch.object(parser, "parse", return_value=[1, 2]):
+        assert list(parser.parse_iter()) == [1, 2]
+
+
+def test_parse_iter_async_default_uses_parse_async():
+    """Тест, что parse_iter_async() по умолчанию выдает результат parse_async()"""
+    parser = BaseParser("https://example.com")
+
+    async def collect():
+        return [item async for item in parser.parse_iter_async()]
+
+    with patch.object(parser, "parse", return_value=[1, 2]):
+        assert asyncio.run(collect()) == [1, 2]
+
+
+def test_save_iter_saves_in_batches():
+    """Тест сохранения записей пачками по мере поступления"""
+    parser = BaseParser("https://example.com")
+
+    with patch.object(parser, "save_to_db", side_effect=len) as mock_save:
+        saved = parser.save_iter(iter(range(5)), batch_size=2)
+
+    assert saved == 5
+    assert [c.args[0] for c in mock_save.call_args_list] == [[0, 1], [2, 3], [4]]
+
+
+def test_save_iter_keeps_saved_batches_on_error():
+    """Тест, что ошибка в конце разбора не отменяет сохраненные пачки"""
+    parser = BaseParser("https://example.com")
+
+    def records():
+        yield from range(3)
+        raise RuntimeError("boom")
+
+    with patch.object(parser, "save_to_db", side_effect=len) as mock_save:
+        with pytest.raises(RuntimeError):
+            parser.save_iter(records(), batch_size=2)
+
+    mock_save.assert_called_once_with([0, 1])
+
+
+def test_save_iter_async_saves_in_batches():
+    """Тест асинхронного сохранения пачками"""
+    parser = BaseParser("https://example.com")
+
+    async def records():
+        for item in range(3):
+            yield item
+
+    with patch.object(parser, "save_to_db", side_effect=len) as mock_save:
+        saved = asyncio.run(parser.save_iter_async(records(), batch_size=2))
+
+    assert saved == 3
+    assert [c.args[0] for c in mock_save.call_args_list] == [[0, 1], [2]]
+
+
+def test_save_to_db_not_implemented():
+    """Тест, что save_to_db() должен быть реализован в дочернем классе"""
+    parser = BaseParser("https://example.com")
+    with pytest.raises(NotImplementedError):
+        parser.save_to_db([])
+
+
+# Тесты HTTP кэша условных запросов
+def test_fetch_html_sends_validators_and_stores(tmp_path):
+    """Тест отправки валидаторов из кэша и сохранения нового ответа"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com", '"v1"', None)
+    parser = BaseParser("https://example.com", cache=cache)
+
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.text = "<new>"
+    mock_response.headers = {"ETag": '"v2"'}
+
+    with patch.object(parser.session, 'get', return_value=mock_response) as mock_get:
+        html = parser.fetch_html()
+
+    assert html == "<new>"
+    assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    # Новые валидаторы попадают в кэш только после сохранения данных
+    assert cache.get("https://example.com")["etag"] == '"v1"'
+    parser.commit_validators("https://example.com")
+    assert cache.get("https://example.com")["etag"] == '"v2"'
+    assert parser.not_modified is False
+
+
+def test_fetch_html_not_modified(tmp_path):
+    """Тест, что ответ 304 возвращает None и выставляет not_modified"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com", None, "Mon, 01 Dec 2025 10:00:00 GMT")
+    parser = BaseParser("https://example.com", cache=cache)
+
+    mock_response = Mock()
+    mock_response.status_code = 304
+
+    with patch.object(parser.session, 'get', return_value=mock_response) as mock_get:
+        html = parser.fetch_html()
+
+    assert html is None
+    assert parser.not_modified is True
+    assert mock_get.call_args.kwargs["headers"]["If-Modified-Since"] == "Mon, 01 Dec 2025 10:00:00 GMT"
+    mock_response.raise_for_status.assert_not_called()
+
+
+def test_fetch_html_async_not_modified(tmp_path):
+    """Тест асинхронного условного запроса с ответом 304"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com/a", '"v1"', None)
+    parser = BaseParser("https://example.com", cache=cache)
+    session = _FakeSession({"https://example.com/a": _FakeResponse(status=304)})
+
+    html = asyncio.run(parser.fetch_html_async("https://example.com/a", session))
+
+    assert html is None
+    assert session.sent_headers[0]["If-None-Match"] == '"v1"'
+    # 304 для статьи не помечает основную страницу как неизменившуюся
+    assert parser.not_modified is False
+
+
+def test_fetch_html_async_stores_validators(tmp_path):
+    """Тест сохранения валидаторов асинхронного ответа"""
+    cache = HTTPCache(str(tmp_path))
+    parser = BaseParser("https://example.com", cache=cache)
+    session = _FakeSession({
+        "https://example.com": _FakeResponse(text="<html>", headers={"ETag": '"abc"'}),
+    })
+
+    html = asyncio.run(parser.fetch_html_async(session=session))
+
+    assert html == "<html>"
+    assert cache.validators("https://example.com") == {}
+    parser.commit_validators()
+    assert cache.validators("https://example.com") == {"If-None-Match": '"abc"'}
+
+
+def test_fetch_html_async_unconditional(tmp_path):
+    """Тест запроса без валидаторов: ответ не попадает в кэш"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com/a", '"v1"', None)
+    parser = BaseParser("https://example.com", cache=cache)
+    session = _FakeSession({"https://example.com/a": _FakeResponse(text="<new>", headers={"ETag": '"v2"'})})
+
+    html = asyncio.run(parser.fetch_html_async("https://example.com/a", session, conditional=False))
+
+    assert html == "<new>"
+    assert "If-None-Match" not in session.sent_headers[0]
+    parser.commit_validators()
+    assert cache.get("https://example.com/a")["etag"] == '"v1"'
+
+
+def _fetched_parser(tmp_path):
+    """Парсер с загруженной, но еще не сохраненной страницей"""
+    cache = HTTPCache(str(tmp_path))
+    parser = BaseParser("https://example.com", cache=cache)
+    parser._remember_response("https://example.com", {"ETag": '"v1"'})
+    return parser, cache
+
+
+def test_save_iter_commits_validators_after_save(tmp_path):
+    """Тест: валидаторы записываются в кэш после сохранения всех пачек"""
+    parser, cache = _fetched_parser(tmp_path)
+
+    with patch.object(parser, "save_to_db", side_effect=len):
+        assert parser.save_iter(range(3), batch_size=2) == 3
+
+    assert cache.validators("https://example.com") == {"If-None-Match": '"v1"'}
+
+
+def test_save_iter_keeps_validators_out_of_cache_on_failure(tmp_path):
+    """Тест: после неудачного сохранения страница будет загружена заново, а не получит 304"""
+    parser, cache = _fetched_parser(tmp_path)
+
+    def save(batch):
+        parser.save_errors += 1
+        return 0
+
+    with patch.object(parser, "save_to_db", side_effect=save):
+        asyncio.run(parser.save_iter_async(_async_items(range(3)), batch_size=2))
+
+    assert parser.save_errors == 2
+    assert cache.get("https://example.com") is None
+    parser.commit_validators()
+    assert cache.get("https://example.com") is None
+
+
+async def _async_items(items):
+    for item in items:
+        yield item
+
+
+def test_parse_region_builds_only_fragment():
+    """Тест разбора только нужного участка страницы"""
+    parser = BaseParser("https://example.com")
+    html = '<nav><a href="/1">1</a></nav><table id="data"><tr><td>1</td></tr></table><footer>2</footer>'
+
+    with patch.object(parser, "parse_document", wraps=parser.parse_document) as parse_document:
+        doc = parser.parse_region(html, re.compile(r'<table id="data"'), "table")
+
+    parse_document.assert_called_once_with('<table id="data"><tr><td>1</td></tr></table>')
+    assert doc.css_first("td").text() == "1"
+    assert doc.css_first("nav") is None
+
+
+def test_parse_region_fallback_to_full_document():
+    """Тест разбора всей страницы, если участок не найден"""
+    parser = BaseParser("https://example.com")
+    html = "<div><table><tr><td>1</td></tr></table></div>"
+
+    with patch.object(parser, "parse_document", wraps=parser.parse_document) as parse_document:
+        parser.parse_region(html, re.compile(r'<table id="data"'), "table")
+
+    parse_document.assert_called_once_with(html)
+
+
+def test_parse_region_disabled():
+    """Тест выключенного режима разбора участка"""
+    parser = BaseParser("https://example.com")
+    parser.region_parsing = False
+    html = '<nav></nav><table id="data"></table>'
+
+    with patch.object(parser, "parse_document", wraps=parser.parse_document) as parse_document:
+        parser.parse_region(html, re.compile(r'<table id="data"'), "table")
+
+    parse_document.assert_called_once_with(html)
+
+
+# Тесты вставки записей в БД
+def test_bulk_insert_rows(tmp_path):
+    """Тест вставки записей одним executemany в реальную БД (sqlite)"""
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import Session
+    from src.database import Base, Source, DohodDiv
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    parser = BaseParser("https://example.com")
+    data = [
+        DohodDividend("SBER", "Сбербанк", "Финансы", "2025", Decimal("34.84"), "RUB",
+                      Decimal("11.4"), date(2025, 7, 17), Decimal("100"), Decimal("0.93")),
+        DohodDividend("GAZP", "Газпром", "Нефть и газ", "2025", Decimal("0"), "RUB",
+                      Decimal("0"), None, Decimal("200"), Decimal("0.5")),
+    ]
+
+    with Session(engine) as session:
+        session.add(Source(id=1, url="https://www.dohod.ru", name="Dohod"))
+        parser._bulk_insert(session, DohodDiv, 1, data)
+        session.commit()
+
+        rows = session.scalars(select(DohodDiv).order_by(DohodDiv.id)).all()
+
+    assert [row.ticker for row in rows] == ["SBER", "GAZP"]
+    assert rows[0].record_date_estimate == date(2025, 7, 17)
+    assert rows[1].record_date_estimate is None
+    assert all(row.source_id == 1 and row.parsed_at is not None for row in rows)
@@ -1,7 +1,9 @@
 import pytest
+from decimal import Decimal
 from unittest.mock import MagicMock, patch
 from datetime import date
-from src.parsers.sources import DohodParser
+from src.parsers.sources import DohodParser, DohodDividend
+from src.parsers.sources.dohod import content_hash
 
 
 # Фикстура для парсера
@@ -12,19 +14,19 @@ def parser():
 
 
 # Тесты вспомогательных методов
-def test_parse_float(parser):
-    assert parser._parse_float("123,45") == 123.45
-    assert parser._parse_float("1 234,56") == 1234.56
-    assert parser._parse_float("-50.5") == -50.5
-    assert parser._parse_float("abc") == 0.0
-    assert parser._parse_float("") == 0.0
+def test_parse_decimal(parser):
+    assert parser._parse_decimal("123,45") == Decimal("123.45")
+    assert parser._parse_decimal("1 234,56") == Decimal("1234.56")
+    assert parser._parse_decimal("-50.5") == Decimal("-50.5")
+    assert parser._parse_decimal("abc") == Decimal("0")
+    assert parser._parse_decimal("") == Decimal("0")
 
 
 def test_parse_percent(parser):
-    assert parser._parse_percent("15,5%") == 15.5
-    assert parser._parse_percent("20 %") == 20.0
-    assert parser._parse_percent("0") == 0.0
-    assert parser._parse_percent("-") == 0.0
+    assert parser._parse_percent("15,5%") == Decimal("15.5")
+    assert parser._parse_percent("20 %") == Decimal("20")
+    assert parser._parse_percent("0") == Decimal("0")
+    assert parser._parse_percent("-") == Decimal("0")
 
 
 def test_parse_date(parser):
@@ -78,14 +80,34 @@ def test_parse_success(parser):
         assert len(result) == 1
         item = result[0]
 
-        assert item["ticker"] == "LKOH"
-        assert item["company_name"] == "ЛУКОЙЛ"
-        assert item["sector"] == "Нефтегаз"
-        assert item["payment_per_share"] == 500.5
-        assert item["yield_percent"] == 10.5
-        assert item["record_date_estimate"] == date(2025, 12, 20)
-        assert item["capitalization_mln_rub"] == 1000000.0
-        assert item["dsi"] == 0.85
+        assert item.ticker == "LKOH"
+        assert item.company_name == "ЛУКОЙЛ"
+        assert item.sector == "Нефтегаз"
+        assert item.payment_per_share == Decimal("500.5")
+        assert item.yield_percent == 10.5
+        assert item.record_date_estimate == date(2025, 12, 20)
+        assert item.capitalization_mln_rub == Decimal("1000000")
+        assert item.dsi == Decimal("0.85")
+
+
+def test_parse_only_table_region(parser):
+    """Тест разбора только таблицы дивидендов, без остальной страницы"""
+    table = (
+        '<table class="content-table" id="table-dividend"><tbody><tr>'
+        '<td><a href="/dividend/sber">Сбербанк</a></td><td>Сбербанк</td><td>Финансы</td>'
+        '<td>2025</td><td>34,84</td><td>RUB</td><td>11,4%</td><td>-</td>'
+        '<td>17.07.2025</td><td>100</td><td>0,93</td>'
+        '</tr></tbody></table>'
+    )
+    mock_html = f"<html><body><table><tr><td>меню</td></tr></table>{table}<p>подвал</p></body></html>"
+
+    with patch.object(parser, "fetch_html", return_value=mock_html), \
+         patch.object(parser, "parse_document", wraps=parser.parse_document) as parse_document:
+        result = parser.parse()
+
+    parse_document.assert_called_once_with(table)
+    assert len(result) == 1
+    assert result[0].ticker == "SBER"
 
 
 def test_parse_no_table(parser):
@@ -114,7 +136,7 @@ def test_parse_bad_row(parser):
     with patch.object(parser, "fetch_html", return_value=mock_html):
         result = parser.parse()
         assert len(result) == 1
-        assert result[0]["ticker"] == "TEST"
+        assert result[0].ticker == "TEST"
 
 
 # Тест сохранения в БД
@@ -122,18 +144,18 @@ def test_save_to_db(parser):
     """Проверяем, что метод использует SQLAlchemy для сохранения в БД"""
 
     # Фейковые данные
-    fake_data = [{
-        "ticker": "TEST",
-        "company_name": "Test Co",
-        "sector": "IT",
-        "period": "Q1",
-        "payment_per_share": 10.0,
-        "currency": "RUB",
-        "yield_percent": 5.0,
-        "record_date_estimate": date(2025, 1, 1),
-        "capitalization_mln_rub": 100.0,
-        "dsi": 1.0
-    }]
+    fake_data = [DohodDividend(
+        ticker="TEST",
+        company_name="Test Co",
+        sector="IT",
+        period="Q1",
+        payment_per_share=10.0,
+        currency="RUB",
+        yield_percent=5.0,
+        record_date_estimate=date(2025, 1, 1),
+        capitalization_mln_rub=100.0,
+        dsi=1.0
+    )]
 
     # Моки для сессии
     mock_session = MagicMock()
@@ -151,7 +173,7 @@ def test_save_to_db(parser):
 
         mock_session.query.assert_called()
 
-        assert mock_session.add.called
+        assert mock_session.execute.called
 
         mock_session.commit.assert_called_once()
         mock_session.close.assert_called_once()
@@ -183,7 +205,7 @@ def test_parse_fallback_table_search(parser):
     with patch.object(parser, 'fetch_html', return_value=mock_html):
         result = parser.parse()
         assert len(result) == 1
-        assert result[0]['ticker'] == "TEST"
+        assert result[0].ticker == "TEST"
 
 
 def test_save_to_db_source_not_found(parser):
@@ -194,19 +216,19 @@ def test_save_to_db_source_not_found(parser):
     mock_session.query.return_value = mock_query
 
     with patch.object(parser, '_get_db_session', return_value=mock_session):
-        parser.save_to_db([{"ticker": "TEST", "company_name": "T", "sector": "S", "period": "P",
-                           "payment_per_share": 1, "currency": "R", "yield_percent": 1,
-                           "record_date_estimate": date.today(), "capitalization_mln_rub": 1, "dsi": 1}])
+        parser.save_to_db([DohodDividend(ticker="TEST", company_name="T", sector="S", period="P",
+                                         payment_per_share=1, currency="R", yield_percent=1,
+                                         record_date_estimate=date.today(), capitalization_mln_rub=1, dsi=1)])
 
         mock_session.query.assert_called()
-        mock_session.add.assert_not_called()
+        mock_session.execute.assert_not_called()
 
 
 def test_save_to_db_rollback(parser):
     """Тест отката транзакции при ошибке вставки"""
-    data = [{"ticker": "TEST", "company_name": "T", "sector": "S", "period": "P",
-             "payment_per_share": 1, "currency": "R", "yield_percent": 1,
-             "record_date_estimate": date.today(), "capitalization_mln_rub": 1, "dsi": 1}]
+    data = [DohodDividend(ticker="TEST", company_name="T", sector="S", period="P",
+                          payment_per_share=1, currency="R", yield_percent=1,
+                          record_date_estimate=date.today(), capitalization_mln_rub=1, dsi=1)]
 
     mock_session = MagicMock()
     mock_source = MagicMock()
@@ -214,7 +236,7 @@ def test_save_to_db_rollback(parser):
     mock_query = MagicMock()
     mock_query.filter.return_value.first.return_value = mock_source
     mock_session.query.return_value = mock_query
-    mock_session.add.side_effect = Exception("DB Error")
+    mock_session.execute.side_effect = Exception("DB Error")
 
     with patch.object(parser, '_get_db_session', return_value=mock_session):
         parser.save_to_db(data)
@@ -230,16 +252,16 @@ def test_run_dohod_parser_success():
         dohod, "DohodParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.return_value = [{"ticker": "OK"}]
-        parser_instance.save_to_db.return_value = None
+        parser_instance.parse_iter.return_value = iter([{"ticker": "OK"}])
+        parser_instance.save_iter.return_value = 1
         mock_cls.return_value = parser_instance
         
         dohod.run_dohod_parser()
         
         mock_logging.basicConfig.assert_called_once()
         mock_cls.assert_called_once()
-        parser_instance.parse.assert_called_once()
-        parser_instance.save_to_db.assert_called_once()
+        parser_instance.parse_iter.assert_called_once()
+        parser_instance.save_iter.assert_called_once_with(parser_instance.parse_iter.return_value)
 
 
 def test_run_dohod_parser_empty_data():
@@ -250,7 +272,7 @@ def test_run_dohod_parser_empty_data():
         dohod, "DohodParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.return_value = []
+        parser_instance.save_iter.return_value = 0
         mock_cls.return_value = parser_instance
         
         with patch.object(dohod.logger, "warning") as mock_warning:
@@ -266,7 +288,7 @@ def test_run_dohod_parser_handles_exception():
         dohod, "DohodParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.side_effect = RuntimeError("boom")
+        parser_instance.parse_iter.side_effect = RuntimeError("boom")
         mock_cls.return_value = parser_instance
         
         with patch.object(dohod.logger, "error") as mock_error:
@@ -277,12 +299,12 @@ def test_run_dohod_parser_handles_exception():
 def test_save_to_db_multiple_items(parser):
     """Тест сохранения нескольких записей"""
     fake_data = [
-        {"ticker": "TEST1", "company_name": "T1", "sector": "S", "period": "P",
-         "payment_per_share": 1, "currency": "R", "yield_percent": 1,
-         "record_date_estimate": date.today(), "capitalization_mln_rub": 1, "dsi": 1},
-        {"ticker": "TEST2", "company_name": "T2", "sector": "S", "period": "P",
-         "payment_per_share": 2, "currency": "R", "yield_percent": 2,
-         "record_date_estimate": date.today(), "capitalization_mln_rub": 2, "dsi": 2},
+        DohodDividend(ticker="TEST1", company_name="T1", sector="S", period="P",
+                      payment_per_share=1, currency="R", yield_percent=1,
+                      record_date_estimate=date.today(), capitalization_mln_rub=1, dsi=1),
+        DohodDividend(ticker="TEST2", company_name="T2", sector="S", period="P",
+                      payment_per_share=2, currency="R", yield_percent=2,
+                      record_date_estimate=date.today(), capitalization_mln_rub=2, dsi=2),
     ]
     
     mock_session = MagicMock()
@@ -293,27 +315,33 @@ def test_save_to_db_multiple_items(parser):
     mock_session.query.return_value = mock_query
     
     with patch.object(parser, '_get_db_session', return_value=mock_session):
-        parser.save_to_db(fake_data)
-
-        assert mock_session.add.call_count == 2
+        assert parser.save_to_db(fake_data) == 2
+
+        # новые версии вставляются одним executemany
+        inserts = [c for c in mock_session.execute.call_args_list if len(c.args) == 2]
+        assert len(inserts) == 1
+        rows = inserts[0].args[1]
+        assert [row["ticker"] for row in rows] == [item.ticker for item in fake_data]
+        assert all(row["source_id"] == 1 and len(row["content_hash"]) == 64 for row in rows)
         mock_session.commit.assert_called_once()
 
 
 def test_save_to_db_connection_error(parser):
     """Тест обработки ошибки подключения к БД"""
-    fake_data = [{"ticker": "TEST", "company_name": "T", "sector": "S", "period": "P",
-                  "payment_per_share": 1, "currency": "R", "yield_percent": 1,
-                  "record_date_estimate": date.today(), "capitalization_mln_rub": 1, "dsi": 1}]
+    fake_data = [DohodDividend(ticker="TEST", company_name="T", sector="S", period="P",
+                               payment_per_share=1, currency="R", yield_percent=1,
+                               record_date_estimate=date.today(), capitalization_mln_rub=1, dsi=1)]
     
     with patch.object(parser, '_get_db_session', side_effect=Exception("Connection error")):
-        parser.save_to_db(fake_data)
+        assert parser.save_to_db(fake_data) == 0
+    assert parser.save_errors == 1
 
 
 def test_save_to_db_close_error(parser):
     """Тест обработки ошибки при закрытии соединения"""
-    fake_data = [{"ticker": "TEST", "company_name": "T", "sector": "S", "period": "P",
-                  "payment_per_share": 1, "currency": "R", "yield_percent": 1,
-                  "record_date_estimate": date.today(), "capitalization_mln_rub": 1, "dsi": 1}]
+    fake_data = [DohodDividend(ticker="TEST", company_name="T", sector="S", period="P",
+                               payment_per_share=1, currency="R", yield_percent=1,
+                               record_date_estimate=date.today(), capitalization_mln_rub=1, dsi=1)]
     
     mock_session = MagicMock()
     mock_source = MagicMock()
@@ -331,3 +359,140 @@ def test_save_to_db_close_error(parser):
 
         mock_session.commit.assert_called_once()
 
+
+
+# Тесты версионного хранения (SCD type 2)
+def _dividend(ticker, payment, yield_percent="10", record_date=date(2025, 7, 17)):
+    return DohodDividend(ticker, ticker.title(), "Финансы", "2025", Decimal(payment), "RUB",
+                         Decimal(yield_percent), record_date, Decimal("100"), Decimal("0.5"))
+
+
+@pytest.fixture
+def dohod_db(tmp_path):
+    """sqlite база со схемой проекта и источником Dohod"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from src.database import Base, Source
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Source(id=1, url="https://www.dohod.ru", name="Dohod"))
+        session.commit()
+    return engine
+
+
+def _versions(engine):
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from src.database import DohodDiv
+
+    with Session(engine) as session:
+        return [
+            (row.ticker, row.payment_per_share, row.yield_percent, row.valid_to is None)
+            for row in session.scalars(select(DohodDiv).order_by(DohodDiv.id))
+        ]
+
+
+def _run(parser, engine, data):
+    from sqlalchemy.orm import Session
+    with patch.object(parser, "_get_db_session", side_effect=lambda: Session(engine)):
+        return parser.save_iter(iter(data), batch_size=1)
+
+
+def test_content_hash_key_fields():
+    """Тест хэша версии: только тикер, период, выплата и дата реестра"""
+    base = _dividend("SBER", "34.84")
+    assert content_hash(base) == content_hash(_dividend("SBER", "34.840", yield_percent="12"))
+    assert content_hash(base) != content_hash(_dividend("SBER", "35"))
+    assert content_hash(base) != content_hash(_dividend("SBER", "34.84", record_date=None))
+
+
+def test_scd_unchanged_run_writes_nothing(parser, dohod_db):
+    """Тест: повторный запуск без изменений не создает версий"""
+    assert _run(parser, dohod_db, [_dividend("SBER", "34.84"), _dividend("GAZP", "0")]) == 2
+    assert _run(parser, dohod_db, [_dividend("SBER", "34.84"), _dividend("GAZP", "0")]) == 0
+    assert len(_versions(dohod_db)) == 2
+
+
+def test_scd_changed_payment_closes_and_opens(parser, dohod_db):
+    """Тест: изменение выплаты закрывает старую версию и открывает новую"""
+    _run(parser, dohod_db, [_dividend("SBER", "34.84"), _dividend("GAZP", "0")])
+    assert _run(parser, dohod_db, [_dividend("SBER", "35"), _dividend("GAZP", "0")]) == 1
+
+    assert _versions(dohod_db) == [
+        ("SBER", Decimal("34.84"), Decimal("10"), False),
+        ("GAZP", Decimal("0"), Decimal("10"), True),
+        ("SBER", Decimal("35"), Decimal("10"), True),
+    ]
+
+
+def test_scd_updates_type1_fields_in_place(parser, dohod_db):
+    """Тест: доходность обновляется в текущей версии без новой версии"""
+    _run(parser, dohod_db, [_dividend("SBER", "34.84")])
+    assert _run(parser, dohod_db, [_dividend("SBER", "34.84", yield_percent="11.5")]) == 0
+
+    assert _versions(dohod_db) == [("SBER", Decimal("34.84"), Decimal("11.5"), True)]
+
+
+def test_scd_closes_missing_versions(parser, dohod_db):
+    """Тест: выплата, пропавшая со страницы, закрывается в конце запуска"""
+    _run(parser, dohod_db, [_dividend("SBER", "34.84"), _dividend("GAZP", "0")])
+    _run(parser, dohod_db, [_dividend("SBER", "34.84")])
+
+    assert [(v[0], v[3]) for v in _versions(dohod_db)] == [("SBER", True), ("GAZP", False)]
+
+
+def test_scd_empty_run_keeps_versions(parser, dohod_db):
+    """Тест: пустой результат парсинга (например, 304) ничего не закрывает"""
+    _run(parser, dohod_db, [_dividend("SBER", "34.84")])
+    assert _run(parser, dohod_db, []) == 0
+    assert _versions(dohod_db)[0][3] is True
+
+
+def test_scd_failed_batch_keeps_current_versions(parser, dohod_db):
+    """Тест: после неудачной пачки старые версии не закрываются и ее хэши не считаются встреченными"""
+    from sqlalchemy.orm import Session
+    _run(parser, dohod_db, [_dividend("SBER", "34.84"), _dividend("GAZP", "0")])
+
+    sessions = iter([Session(dohod_db), Exception("DB down")])
+
+    def session():
+        value = next(sessions, None) or Session(dohod_db)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    close = MagicMock(wraps=parser._close_versions)
+    with patch.object(parser, "_get_db_session", side_effect=session), \
+            patch.object(parser, "_close_versions", close):
+        # Вторая пачка (новая выплата SBER) не сохраняется
+        assert parser.save_iter(iter([_dividend("GAZP", "0"), _dividend("SBER", "35")]), batch_size=1) == 0
+
+    assert parser.save_errors == 1
+    close.assert_not_called()
+    assert [(v[0], v[1], v[3]) for v in _versions(dohod_db)] == [
+        ("SBER", Decimal("34.84"), True), ("GAZP", Decimal("0"), True),
+    ]
+
+
+def test_scd_seen_hashes_only_after_commit(parser, dohod_db):
+    """Тест: хэши пачки попадают во встреченные только после фиксации"""
+    from sqlalchemy.orm import Session
+    parser._seen_hashes = set()
+    session = Session(dohod_db)
+    with patch.object(parser, "_get_db_session", return_value=session), \
+            patch.object(session, "commit", side_effect=Exception("commit failed")):
+        assert parser.save_to_db([_dividend("SBER", "34.84")]) == 0
+
+    assert parser._seen_hashes == set()
+
+
+def test_scd_save_to_db_alone_is_full_run(parser, dohod_db):
+    """Тест: save_to_db вне save_iter считает данные всей таблицей"""
+    from sqlalchemy.orm import Session
+    with patch.object(parser, "_get_db_session", side_effect=lambda: Session(dohod_db)):
+        parser.save_to_db([_dividend("SBER", "34.84"), _dividend("GAZP", "0")])
+        parser.save_to_db([_dividend("GAZP", "0")])
+
+    assert [(v[0], v[3]) for v in _versions(dohod_db)] == [("SBER", False), ("GAZP", True)]
@@ -0,0 +1,177 @@
+import pytest
+from unittest.mock import patch
+from src.parsers.sources import SmartlabParser, DohodParser, RBCParser
+import re
+from decimal import Decimal
+from src.parsers.sources.html_backend import BACKENDS, BS4Backend, get_backend, slice_element
+
+
+ARTICLE_HTML = """
+<html>
+<head>
+    <title>Заголовок статьи :: РБК</title>
+    <meta property="og:description" content="Описание статьи">
+</head>
+<body>
+    <h2 class="Article__Title">Заголовок статьи для проверки</h2>
+    <div class="article-content">
+        <p>  Первый параграф новости с достаточным количеством текста.  </p>
+        <p>Второй параграф <b>новости</b> с достаточным количеством текста.</p>
+    </div>
+</body>
+</html>
+"""
+
+SMARTLAB_HTML = """
+<div class="main__table"><table>
+<tr><th>Название</th></tr>
+<tr>
+    <td class="trades-table__name"><a href="/forum/SBER">Сбербанк</a></td>
+    <td class="trades-table__ticker">SBER</td>
+    <td class="trades-table__price">304.76</td>
+</tr>
+</table></div>
+"""
+
+DOHOD_HTML = """
+<table id="table-dividend">
+<thead><tr><th>Ticker</th></tr></thead>
+<tbody>
+<tr class="filter-row"><td>фильтр</td></tr>
+<tr>
+    <td><a href="/ik/analytics/dividend/sber">SBER</a></td>
+    <td>Сбербанк</td><td>Финансы</td><td>2025</td><td>34,84</td><td>RUB</td>
+    <td>11,4%</td><td>-</td><td>17.07.2025</td><td>6 881 980</td><td>0,93</td>
+</tr>
+</tbody>
+</table>
+"""
+
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request):
+    """Все доступные HTML бэкенды"""
+    return request.param
+
+
+# Тесты выбора бэкенда
+def test_get_backend_default():
+    """Тест бэкенда по умолчанию"""
+    assert get_backend().name == "bs4"
+
+
+def test_get_backend_unknown():
+    """Тест неизвестного имени бэкенда"""
+    with pytest.raises(ValueError):
+        get_backend("unknown")
+
+
+def test_get_backend_lxml_builder():
+    """Тест BeautifulSoup с tree builder'ом lxml"""
+    backend = get_backend("bs4-lxml")
+    assert isinstance(backend, BS4Backend)
+    assert backend.features == "lxml"
+
+
+def test_parser_uses_configured_backend():
+    """Тест выбора бэкенда через аргумент парсера"""
+    parser = SmartlabParser("https://smart-lab.ru/q/shares/")
+    assert parser.html_backend.name == "bs4"
+
+    from src.parsers.sources import BaseParser
+    assert BaseParser("https://example.com", html_backend="selectolax").html_backend.name == "selectolax"
+
+
+# Тесты вырезания участка страницы
+def test_slice_element_nested():
+    """Тест вырезания элемента с вложенными тегами того же имени"""
+    html = (
+        '<div class="menu"><div>меню</div></div>'
+        '<div class="main__table"><div><table><tr><td>1</td></tr></table></div></div>'
+        '<div class="footer">подвал</div>'
+    )
+
+    fragment = slice_element(html, re.compile(r'<div class="main__table"'), "div")
+
+    assert fragment == '<div class="main__table"><div><table><tr><td>1</td></tr></table></div></div>'
+
+
+def test_slice_element_case_insensitive_tags():
+    """Тест тегов в разном регистре"""
+    html = "<p>до</p><TABLE id=t><tr><td>1</td></tr></Table><p>после</p>"
+
+    assert slice_element(html, re.compile(r"<table id=t", re.I), "table") == (
+        "<TABLE id=t><tr><td>1</td></tr></Table>"
+    )
+
+
+def test_slice_element_not_found():
+    """Тест отсутствующего элемента"""
+    assert slice_element("<div>текст</div>", re.compile(r"<table"), "table") is None
+
+
+def test_slice_element_not_closed():
+    """Тест незакрытого элемента (обрезанная страница)"""
+    html = '<div class="main__table"><table><tr><td>1</td></tr></table>'
+
+    assert slice_element(html, re.compile(r'<div class="main__table"'), "div") is None
+
+
+# Тесты общего интерфейса узлов
+def test_node_api(backend):
+    """Тест css/css_first/text/attr/classes на каждом бэкенде"""
+    doc = get_backend(backend).parse(ARTICLE_HTML)
+
+    title = doc.css_first('h1[class*="title" i], h2[class*="title" i]')
+    assert title.tag == "h2"
+    assert title.classes == ["Article__Title"]
+    assert doc.css_first('meta[property="og:description"]').attr("content") == "Описание статьи"
+    assert doc.css_first("meta[name=missing]") is None
+
+    paragraphs = doc.css("div.article-content p")
+    assert [p.text(strip=True) for p in paragraphs] == [
+        "Первый параграф новости с достаточным количеством текста.",
+        "Второй параграфновостис достаточным количеством текста.",
+    ]
+    assert paragraphs[1].text(" ", strip=True) == "Второй параграф новости с достаточным количеством текста."
+    assert paragraphs[0].attr("class", "нет") == "нет"
+
+
+# Тесты одинакового результата парсеров на всех бэкендах
+def test_rbc_article_same_on_all_backends(backend):
+    """Тест извлечения статьи РБК"""
+    parser = RBCParser()
+    parser.html_backend = get_backend(backend)
+
+    article = parser._extract_article(ARTICLE_HTML, "https://www.rbc.ru/test")
+    assert article.title == "Заголовок статьи"
+    assert article.description == "Описание статьи"
+    assert "Первый параграф" in article.text
+
+
+def test_smartlab_same_on_all_backends(backend):
+    """Тест разбора таблицы Smartlab"""
+    parser = SmartlabParser("https://smart-lab.ru/q/shares/")
+    parser.html_backend = get_backend(backend)
+
+    with patch.object(parser, "fetch_html", return_value=SMARTLAB_HTML):
+        result = parser.parse()
+
+    assert len(result) == 1
+    assert result[0].name == "Сбербанк"
+    assert result[0].ticker == "SBER"
+    assert result[0].last_price_rub == Decimal("304.76")
+
+
+def test_dohod_same_on_all_backends(backend):
+    """Тест разбора таблицы дивидендов"""
+    parser = DohodParser()
+    parser.html_backend = get_backend(backend)
+
+    with patch.object(parser, "fetch_html", return_value=DOHOD_HTML):
+        result = parser.parse()
+
+    assert len(result) == 1
+    assert result[0].ticker == "SBER"
+    assert result[0].company_name == "Сбербанк"
+    assert result[0].payment_per_share == Decimal("34.84")
@@ -0,0 +1,65 @@
+import os
+from src.parsers.sources.http_cache import HTTPCache
+
+
+def test_store_and_get(tmp_path):
+    """Тест сохранения и чтения записи кэша (только валидаторы, без тела ответа)"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com", '"etag"', "Mon, 01 Dec 2025 10:00:00 GMT")
+
+    assert cache.get("https://example.com") == {
+        "url": "https://example.com", "etag": '"etag"', "last_modified": "Mon, 01 Dec 2025 10:00:00 GMT",
+    }
+
+
+def test_get_missing(tmp_path):
+    """Тест отсутствующей записи"""
+    cache = HTTPCache(str(tmp_path))
+    assert cache.get("https://example.com") is None
+    assert cache.validators("https://example.com") == {}
+
+
+def test_store_without_validators_skipped(tmp_path):
+    """Тест, что ответы без ETag/Last-Modified не кэшируются"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com", None, None)
+    assert cache.get("https://example.com") is None
+
+
+def test_validators(tmp_path):
+    """Тест заголовков условного запроса"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com", '"v1"', "Mon, 01 Dec 2025 10:00:00 GMT")
+
+    assert cache.validators("https://example.com") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Dec 2025 10:00:00 GMT",
+    }
+
+
+def test_corrupted_entry(tmp_path):
+    """Тест, что поврежденный файл кэша игнорируется"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com", '"v1"', None)
+    with open(cache._path("https://example.com"), "w") as f:
+        f.write("{not json")
+
+    assert cache.get("https://example.com") is None
+
+
+def test_eviction_removes_least_recent(tmp_path):
+    """Тест вытеснения давно не использованных записей при превышении размера"""
+    cache = HTTPCache(str(tmp_path))
+    cache.store("https://example.com/1", '"1"', None)
+    # Кэш вмещает две записи (все записи одного размера)
+    cache.max_bytes = 2 * os.path.getsize(cache._path("https://example.com/1"))
+    cache.store("https://example.com/2", '"2"', None)
+    os.utime(cache._path("https://example.com/1"), (1, 1))
+    os.utime(cache._path("https://example.com/2"), (2, 2))
+    cache.touch("https://example.com/1")
+
+    cache.store("https://example.com/3", '"3"', None)
+
+    assert cache.get("https://example.com/1") is not None
+    assert cache.get("https://example.com/2") is None
+    assert cache.get("https://example.com/3") is not None
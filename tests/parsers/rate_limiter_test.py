@@ -0,0 +1,76 @@
+import asyncio
+import time
+import pytest
+from src.parsers.sources.rate_limiter import TokenBucket, HostRateLimiter
+
+
+# Тесты TokenBucket
+def test_token_bucket_invalid_rate():
+    """Тест запрета нулевой скорости"""
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_token_bucket_burst_without_wait():
+    """Тест, что запросы в пределах корзины проходят без ожидания"""
+    bucket = TokenBucket(rate=1, capacity=5)
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 0.05
+
+
+def test_token_bucket_limits_rate():
+    """Тест, что сверх корзины запросы идут со скоростью rate"""
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 1 токен сразу, еще 5 по 1/50 секунды
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_token_bucket_reused_across_event_loops():
+    """Тест: корзина парсера работает в следующем asyncio.run (parse() повторно)"""
+    bucket = TokenBucket(rate=200, capacity=1)
+
+    async def run():
+        # Одновременные запросы ждут на блокировке корзины
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+
+    asyncio.run(run())
+    asyncio.run(run())
+
+
+# Тесты HostRateLimiter
+def test_host_rate_limiter_bucket_per_host():
+    """Тест, что у каждого хоста своя корзина"""
+    limiter = HostRateLimiter(rate=2)
+    a = limiter.bucket_for("https://www.rbc.ru/news/1")
+    b = limiter.bucket_for("https://WWW.RBC.RU/news/2")
+    c = limiter.bucket_for("https://style.rbc.ru/news/3")
+
+    assert a is b
+    assert a is not c
+
+
+def test_host_rate_limiter_hosts_independent():
+    """Тест, что лимит одного хоста не задерживает другой"""
+    limiter = HostRateLimiter(rate=1, capacity=1)
+
+    async def run():
+        started = time.monotonic()
+        await limiter.acquire("https://www.rbc.ru/a")
+        await limiter.acquire("https://pro.rbc.ru/b")
+        await limiter.acquire("https://style.rbc.ru/c")
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 0.05
@@ -1,13 +1,28 @@
 import pytest
-from unittest.mock import MagicMock, patch, Mock
-from src.parsers.sources import RBCParser
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+import random
+import re
+import threading
+from src.parsers.sources import RBCParser, RBCArticle
+from src.parsers.sources.rbc import (
+    classify_link, LINK_ARTICLE, LINK_PAGE, LINK_SECTION, LINK_IGNORE,
+)
 
 
 # Фикстура для парсера
 @pytest.fixture
 def parser():
-    """Создает экземпляр парсера для каждого теста"""
-    return RBCParser()
+    """Создает экземпляр парсера для каждого теста (без проверки сохраненных URL в БД)"""
+    parser = RBCParser()
+    parser._filter_new_urls = lambda urls: list(urls)
+    return parser
+
+
+def fetch_article(parser, html, url):
+    """Загружает статью асинхронным путем с подмененной загрузкой страницы"""
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=html)):
+        return asyncio.run(parser._fetch_article_async(url, session=None))
 
 
 # Тесты извлечения заголовков
@@ -21,13 +36,8 @@ def test_extract_title_from_h1(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("https://www.rbc.ru/test")
-        assert title == "Тестовый заголовок новости"
+    title = fetch_article(parser, mock_html, "https://www.rbc.ru/test").title
+    assert title == "Тестовый заголовок новости"
 
 
 def test_extract_title_from_meta_og(parser):
@@ -41,13 +51,8 @@ def test_extract_title_from_meta_og(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("https://www.rbc.ru/test")
-        assert title == "Заголовок из meta тега"
+    title = fetch_article(parser, mock_html, "https://www.rbc.ru/test").title
+    assert title == "Заголовок из meta тега"
 
 
 def test_extract_title_from_title_tag(parser):
@@ -61,14 +66,9 @@ def test_extract_title_from_title_tag(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("https://www.rbc.ru/test")
-        assert title == "Заголовок новости"
-        assert "РБК" not in title
+    title = fetch_article(parser, mock_html, "https://www.rbc.ru/test").title
+    assert title == "Заголовок новости"
+    assert "РБК" not in title
 
 
 def test_extract_title_short_title(parser):
@@ -81,23 +81,14 @@ def test_extract_title_short_title(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("https://www.rbc.ru/test")
-        assert title == ""
+    title = fetch_article(parser, mock_html, "https://www.rbc.ru/test").title
+    assert title == ""
 
 
 def test_extract_title_404_error(parser):
     """Тест обработки ошибки 404"""
-    mock_response = Mock()
-    mock_response.status_code = 404
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("https://www.rbc.ru/test")
-        assert title == ""
+    article = fetch_article(parser, None, "https://www.rbc.ru/test")
+    assert article is None
 
 
 # Тесты извлечения текста
@@ -115,15 +106,10 @@ def test_extract_text_from_article(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert "Первый параграф" in text
-        assert "Второй параграф" in text
-        assert "Короткий" not in text
+    text = fetch_article(parser, mock_html, "https://www.rbc.ru/test").text
+    assert "Первый параграф" in text
+    assert "Второй параграф" in text
+    assert "Короткий" not in text
 
 
 def test_extract_text_from_content_div(parser):
@@ -139,14 +125,9 @@ def test_extract_text_from_content_div(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert "Текст новости" in text
-        assert "Еще один параграф" in text
+    text = fetch_article(parser, mock_html, "https://www.rbc.ru/test").text
+    assert "Текст новости" in text
+    assert "Еще один параграф" in text
 
 
 def test_extract_text_filters_advertising(parser):
@@ -164,15 +145,10 @@ def test_extract_text_filters_advertising(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert "Основной текст" in text
-        assert "Еще один параграф" in text
-        assert len(text) > 50
+    text = fetch_article(parser, mock_html, "https://www.rbc.ru/test").text
+    assert "Основной текст" in text
+    assert "Еще один параграф" in text
+    assert len(text) > 50
 
 
 def test_extract_text_filters_photo_video(parser):
@@ -190,19 +166,19 @@ def test_extract_text_filters_photo_video(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert "Основной текст" in text
-        assert "Еще один параграф" in text
-        assert "Фото:" not in text
-        assert "Видео:" not in text
+    text = fetch_article(parser, mock_html, "https://www.rbc.ru/test").text
+    assert "Основной текст" in text
+    assert "Еще один параграф" in text
+    assert "Фото:" not in text
+    assert "Видео:" not in text
 
 
 # Тесты основной логики парсинга
+async def fake_article(url, session):
+    """Статья-заглушка вместо загрузки страницы"""
+    return RBCArticle(title="Заголовок", url=url, text="Текст", description="", published_at="")
+
+
 def test_parse_finds_news_urls(parser):
     """Тест поиска URL новостей на главной странице"""
     mock_html = """
@@ -216,15 +192,13 @@ def test_parse_finds_news_urls(parser):
     </html>
     """
 
-    with patch.object(parser, 'fetch_html', return_value=mock_html):
-        with patch.object(parser, '_extract_title_from_page', return_value="Заголовок"):
-            with patch.object(parser, '_extract_text_from_page', return_value="Текст"):
-                result = parser.parse()
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=mock_html)):
+        with patch.object(parser, '_fetch_article_async', side_effect=fake_article):
+            result = parser.parse()
 
-                assert len(result) == 2
-                assert all('title' in item for item in result)
-                assert all('url' in item for item in result)
-                assert all('text' in item for item in result)
+            assert len(result) == 2
+            assert all(isinstance(item, RBCArticle) for item in result)
+            assert all(item.title and item.url and item.text for item in result)
 
 
 def test_parse_filters_sections(parser):
@@ -239,32 +213,31 @@ def test_parse_filters_sections(parser):
     </html>
     """
     
-    with patch.object(parser, 'fetch_html', return_value=mock_html):
-        with patch.object(parser, '_extract_title_from_page', return_value="Заголовок"):
-            with patch.object(parser, '_extract_text_from_page', return_value="Текст"):
-                result = parser.parse()
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=mock_html)):
+        with patch.object(parser, '_fetch_article_async', side_effect=fake_article):
+            result = parser.parse()
 
-                assert len(result) == 1
-                assert "politics/07/12/2025" in result[0]['url']
+            assert len(result) == 1
+            assert "politics/07/12/2025" in result[0].url
 
 
 def test_parse_no_html(parser):
     """Тест обработки случая, когда HTML не получен"""
-    with patch.object(parser, 'fetch_html', return_value=None):
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=None)):
         result = parser.parse()
         assert result == []
 
 
 def test_parse_empty_html(parser):
     """Тест обработки пустого HTML"""
-    with patch.object(parser, 'fetch_html', return_value=""):
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value="")):
         result = parser.parse()
         assert result == []
 
 
 def test_parse_handles_exception(parser):
     """Тест обработки исключений при парсинге"""
-    with patch.object(parser, 'fetch_html', side_effect=Exception("Ошибка")):
+    with patch.object(parser, 'fetch_html_async', AsyncMock(side_effect=Exception("Ошибка"))):
         try:
             result = parser.parse()
             assert result == []
@@ -275,11 +248,11 @@ def test_parse_handles_exception(parser):
 # Тесты сохранения в БД 
 def test_save_to_db(parser):
     """Тест сохранения новостей в БД через SQLAlchemy"""
-    fake_data = [{
-        "title": "Тестовая новость",
-        "url": "https://www.rbc.ru/test",
-        "text": "Текст тестовой новости"
-    }]
+    fake_data = [RBCArticle(
+        title="Тестовая новость",
+        url="https://www.rbc.ru/test",
+        text="Текст тестовой новости"
+    )]
     
     mock_session = MagicMock()
     mock_source = MagicMock()
@@ -312,7 +285,7 @@ def test_save_to_db_no_data(parser):
 
 def test_save_to_db_source_not_found(parser):
     """Тест случая, когда источник не найден в БД"""
-    fake_data = [{"title": "Тест", "url": "https://test.ru", "text": "Текст"}]
+    fake_data = [RBCArticle(title="Тест", url="https://test.ru", text="Текст")]
     
     mock_session = MagicMock()
     mock_query = MagicMock()
@@ -330,7 +303,7 @@ def test_save_to_db_source_not_found(parser):
 
 def test_save_to_db_rollback_on_error(parser):
     """Тест отката транзакции при ошибке"""
-    fake_data = [{"title": "Тест", "url": "https://test.ru", "text": "Текст"}]
+    fake_data = [RBCArticle(title="Тест", url="https://test.ru", text="Текст")]
     
     mock_session = MagicMock()
     mock_source = MagicMock()
@@ -344,6 +317,7 @@ def test_save_to_db_rollback_on_error(parser):
         parser.save_to_db(fake_data)
 
         mock_session.rollback.assert_called_once()
+    assert parser.save_errors == 1
 
 
 def test_extract_title_with_full_url(parser):
@@ -356,13 +330,8 @@ def test_extract_title_with_full_url(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("https://www.rbc.ru/test")
-        assert title == "Заголовок новости"
+    title = fetch_article(parser, mock_html, "https://www.rbc.ru/test").title
+    assert title == "Заголовок новости"
 
 
 def test_extract_title_with_relative_url(parser):
@@ -375,26 +344,15 @@ def test_extract_title_with_relative_url(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("/politics/07/12/2025/693599919a7947c64d803191")
-        assert title == "Заголовок новости"
+    title = fetch_article(parser, mock_html, "/politics/07/12/2025/693599919a7947c64d803191").title
+    assert title == "Заголовок новости"
 
 
 def test_extract_title_exception_handling(parser):
     """Тест обработки исключения при извлечении заголовка"""
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = "<html><body></body></html>"
-    mock_response.get.side_effect = Exception("Error")
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        with patch('src.parsers.sources.rbc.BeautifulSoup', side_effect=Exception("Parse error")):
-            title = parser._extract_title_from_page("https://www.rbc.ru/test")
-            assert title == ""
+    with patch.object(parser, 'parse_document', side_effect=Exception("Parse error")):
+        article = fetch_article(parser, "<html><body></body></html>", "https://www.rbc.ru/test")
+        assert article is None
 
 
 def test_extract_title_with_class_title(parser):
@@ -407,23 +365,14 @@ def test_extract_title_with_class_title(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        title = parser._extract_title_from_page("https://www.rbc.ru/test")
-        assert "Заголовок из класса title" in title
+    title = fetch_article(parser, mock_html, "https://www.rbc.ru/test").title
+    assert "Заголовок из класса title" in title
 
 
 def test_extract_text_status_not_200(parser):
     """Тест обработки статуса не 200"""
-    mock_response = Mock()
-    mock_response.status_code = 404
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert text == ""
+    article = fetch_article(parser, None, "https://www.rbc.ru/test")
+    assert article is None
 
 
 def test_extract_text_from_all_paragraphs(parser):
@@ -440,17 +389,12 @@ def test_extract_text_from_all_paragraphs(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert "Первый параграф" in text
-        assert "Второй параграф" in text
-        assert "Короткий" not in text
-        assert "©" not in text
-        assert "12:30" not in text
+    text = fetch_article(parser, mock_html, "https://www.rbc.ru/test").text
+    assert "Первый параграф" in text
+    assert "Второй параграф" in text
+    assert "Короткий" not in text
+    assert "©" not in text
+    assert "12:30" not in text
 
 
 def test_extract_text_filters_skip_phrases(parser):
@@ -466,16 +410,11 @@ def test_extract_text_filters_skip_phrases(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert "Основной текст" in text
-        assert "Читайте РБК" not in text
-        assert "Реклама" not in text
-        assert "Гигачат" not in text
+    text = fetch_article(parser, mock_html, "https://www.rbc.ru/test").text
+    assert "Основной текст" in text
+    assert "Читайте РБК" not in text
+    assert "Реклама" not in text
+    assert "Гигачат" not in text
 
 
 def test_extract_text_filters_photo_video_start(parser):
@@ -491,27 +430,17 @@ def test_extract_text_filters_photo_video_start(parser):
     </html>
     """
     
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = mock_html
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        text = parser._extract_text_from_page("https://www.rbc.ru/test")
-        assert "Основной текст" in text
-        assert "Фото:" not in text
-        assert "Видео:" not in text
+    text = fetch_article(parser, mock_html, "https://www.rbc.ru/test").text
+    assert "Основной текст" in text
+    assert "Фото:" not in text
+    assert "Видео:" not in text
 
 
 def test_extract_text_exception_handling(parser):
     """Тест обработки исключения при извлечении текста"""
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.text = "<html><body></body></html>"
-    
-    with patch.object(parser.session, 'get', return_value=mock_response):
-        with patch('src.parsers.sources.rbc.BeautifulSoup', side_effect=Exception("Parse error")):
-            text = parser._extract_text_from_page("https://www.rbc.ru/test")
-            assert text == ""
+    with patch.object(parser, 'parse_document', side_effect=Exception("Parse error")):
+        article = fetch_article(parser, "<html><body></body></html>", "https://www.rbc.ru/test")
+        assert article is None
 
 
 def test_parse_with_exception_in_extraction(parser):
@@ -524,18 +453,17 @@ def test_parse_with_exception_in_extraction(parser):
     </html>
     """
     
-    with patch.object(parser, 'fetch_html', return_value=mock_html):
-        with patch.object(parser, '_extract_title_from_page', side_effect=Exception("Error")):
-            with patch.object(parser, '_extract_text_from_page', return_value=""):
-                result = parser.parse()
-                assert isinstance(result, list)
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=mock_html)):
+        with patch.object(parser, '_fetch_article_async', side_effect=Exception("Error")):
+            result = parser.parse()
+            assert isinstance(result, list)
 
 
 def test_save_to_db_multiple_items(parser):
     """Тест сохранения нескольких новостей"""
     fake_data = [
-        {"title": "Новость 1", "url": "https://www.rbc.ru/test1", "text": "Текст 1"},
-        {"title": "Новость 2", "url": "https://www.rbc.ru/test2", "text": "Текст 2"},
+        RBCArticle(title="Новость 1", url="https://www.rbc.ru/test1", text="Текст 1"),
+        RBCArticle(title="Новость 2", url="https://www.rbc.ru/test2", text="Текст 2"),
     ]
     
     mock_session = MagicMock()
@@ -545,16 +473,50 @@ def test_save_to_db_multiple_items(parser):
     mock_query.filter.return_value.first.return_value = mock_source
     mock_session.query.return_value = mock_query
     
+    mock_session.execute.return_value.scalars.return_value.all.return_value = [10]
+    
     with patch.object(parser, '_get_db_session', return_value=mock_session):
-        parser.save_to_db(fake_data)
+        inserted = parser.save_to_db(fake_data)
 
-        assert mock_session.execute.call_count == 2
+        # одна пачка - один запрос
+        mock_session.execute.assert_called_once()
         mock_session.commit.assert_called_once()
 
+    # вторая статья уже была в БД
+    assert inserted == 1
+
+    from sqlalchemy.dialects import postgresql
+    sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH new_urls AS")
+    assert "INSERT INTO rbc_news_urls (url" in sql
+    assert sql.count("::INTEGER") == 2
+    assert "ON CONFLICT (url) DO NOTHING RETURNING rbc_news_urls.url" in sql
+    assert "JOIN new_urls ON" in sql
+    assert sql.endswith("RETURNING rbc_news.id")
+
+
+def test_save_to_db_skips_duplicate_urls_in_batch(parser):
+    """Повтор URL внутри пачки не дает двух строк в rbc_news"""
+    fake_data = [
+        RBCArticle(title="Новость", url="https://www.rbc.ru/test1", text="Текст"),
+        RBCArticle(title="Новость", url="https://www.rbc.ru/test1", text="Текст"),
+    ]
+
+    mock_session = MagicMock()
+    mock_session.query.return_value.filter.return_value.first.return_value = MagicMock(id=1)
+    mock_session.execute.return_value.scalars.return_value.all.return_value = [10]
+
+    with patch.object(parser, '_get_db_session', return_value=mock_session):
+        assert parser.save_to_db(fake_data) == 1
+
+    from sqlalchemy.dialects import postgresql
+    sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.count("::INTEGER") == 1
+
 
 def test_save_to_db_connection_error(parser):
     """Тест обработки ошибки подключения к БД"""
-    fake_data = [{"title": "Тест", "url": "https://test.ru", "text": "Текст"}]
+    fake_data = [RBCArticle(title="Тест", url="https://test.ru", text="Текст")]
     
     with patch.object(parser, '_get_db_session', side_effect=Exception("Connection error")):
         parser.save_to_db(fake_data)
@@ -562,7 +524,7 @@ def test_save_to_db_connection_error(parser):
 
 def test_save_to_db_close_error(parser):
     """Тест обработки ошибки при закрытии соединения"""
-    fake_data = [{"title": "Тест", "url": "https://test.ru", "text": "Текст"}]
+    fake_data = [RBCArticle(title="Тест", url="https://test.ru", text="Текст")]
     
     mock_session = MagicMock()
     mock_source = MagicMock()
@@ -589,16 +551,15 @@ def test_run_rbc_parser_success():
         rbc, "RBCParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.return_value = [{"title": "OK", "url": "https://test.ru", "text": "Text"}]
-        parser_instance.save_to_db.return_value = None
+        parser_instance.save_iter_async = AsyncMock(return_value=1)
         mock_cls.return_value = parser_instance
         
         rbc.run_rbc_parser()
         
         mock_logging.basicConfig.assert_called_once()
         mock_cls.assert_called_once()
-        parser_instance.parse.assert_called_once()
-        parser_instance.save_to_db.assert_called_once()
+        parser_instance.parse_iter_async.assert_called_once()
+        parser_instance.save_iter_async.assert_awaited_once_with(parser_instance.parse_iter_async.return_value)
 
 
 def test_run_rbc_parser_empty_data():
@@ -609,7 +570,7 @@ def test_run_rbc_parser_empty_data():
         rbc, "RBCParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.return_value = []
+        parser_instance.save_iter_async = AsyncMock(return_value=0)
         mock_cls.return_value = parser_instance
         
         with patch.object(rbc.logger, "warning") as mock_warning:
@@ -625,9 +586,302 @@ def test_run_rbc_parser_handles_exception():
         rbc, "RBCParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.side_effect = RuntimeError("boom")
+        parser_instance.save_iter_async = AsyncMock(side_effect=RuntimeError("boom"))
         mock_cls.return_value = parser_instance
         
         with patch.object(rbc.logger, "error") as mock_error:
             rbc.run_rbc_parser()
             mock_error.assert_called()
+
+
+# Тесты асинхронного парсинга
+def test_parse_async_fetches_articles_concurrently(parser):
+    """Тест асинхронного парсинга: главная страница и статьи через общий пул"""
+    homepage = """
+    <html>
+    <body>
+        <a href="/politics/07/12/2025/693599919a7947c64d803191">Новость 1</a>
+        <a href="/society/07/12/2025/6935af0d9a79475a0f2b2694">Новость 2</a>
+    </body>
+    </html>
+    """
+    article = "<html><body><h1>Заголовок тестовой статьи</h1></body></html>"
+
+    async def fake_fetch(url=None, session=None, conditional=True):
+        return homepage if url is None else article
+
+    with patch.object(parser, "fetch_html_async", side_effect=fake_fetch) as mock_fetch:
+        result = asyncio.run(parser.parse_async())
+
+    assert len(result) == 2
+    assert all(item.title == "Заголовок тестовой статьи" for item in result)
+    assert mock_fetch.call_count == 3
+    # Несохраненные статьи запрашиваются без валидаторов кэша
+    assert [c.kwargs.get("conditional", True) for c in mock_fetch.call_args_list[1:]] == [False, False]
+
+
+def test_parse_iter_async_saves_while_crawling(parser):
+    """Тест потокового обхода: статьи сохраняются пачками, пока обход еще идет"""
+    homepage = "\n".join(
+        f'<a href="/politics/07/12/2025/{i:024x}">Новость {i}</a>' for i in range(4)
+    )
+    parser.workers = 1
+    events = []
+
+    async def article(url, session):
+        await asyncio.sleep(0.02)
+        events.append(("fetch", url))
+        return RBCArticle(title="Заголовок", url=url, text="")
+
+    def save(batch):
+        events.append(("save", [item.url for item in batch]))
+        return len(batch)
+
+    with patch.object(parser, "fetch_html_async", AsyncMock(return_value=homepage)), \
+         patch.object(parser, "_fetch_article_async", side_effect=article), \
+         patch.object(parser, "save_to_db", side_effect=save):
+        saved = asyncio.run(parser.save_iter_async(parser.parse_iter_async(), batch_size=2))
+
+    urls = parser._find_news_urls(homepage)
+    assert saved == 4
+    assert [e for e in events if e[0] == "save"] == [("save", urls[:2]), ("save", urls[2:])]
+    # первая пачка сохранена до загрузки последней статьи
+    assert events.index(("save", urls[:2])) < events.index(("fetch", urls[3]))
+
+
+def test_parse_async_no_html(parser):
+    """Тест асинхронного парсинга без HTML главной страницы"""
+    with patch.object(parser, "fetch_html_async", AsyncMock(return_value=None)):
+        result = asyncio.run(parser.parse_async())
+        assert result == []
+
+
+def test_parse_async_skips_failed_articles(parser):
+    """Тест пропуска статей, которые не удалось загрузить"""
+    homepage = '<a href="/politics/07/12/2025/693599919a7947c64d803191">Новость 1</a>'
+
+    async def fake_fetch(url=None, session=None, conditional=True):
+        return homepage if url is None else None
+
+    with patch.object(parser, "fetch_html_async", side_effect=fake_fetch):
+        result = asyncio.run(parser.parse_async())
+        assert result == []
+
+
+def test_find_news_urls_deduplicates(parser):
+    """Тест дедупликации URL без учета параметров"""
+    html = """
+    <a href="/politics/07/12/2025/693599919a7947c64d803191">Новость 1</a>
+    <a href="/politics/07/12/2025/693599919a7947c64d803191?from=main">Новость 1</a>
+    """
+    urls = parser._find_news_urls(html)
+    assert urls == ["https://www.rbc.ru/politics/07/12/2025/693599919a7947c64d803191"]
+
+
+# Тесты классификатора ссылок
+@pytest.mark.parametrize("href, kind", [
+    ("/politics/07/12/2025/693599919a7947c64d803191", LINK_ARTICLE),
+    ("https://www.rbc.ru/rbcfreenews/693599919a7947c64d803191", LINK_ARTICLE),
+    ("https://style.rbc.ru/life/693599919a7947c64d803191?from=main", LINK_ARTICLE),
+    ("/story/693599919a7947c64d803191", LINK_ARTICLE),
+    ("/economics/07/12/2025/abc/books/", LINK_ARTICLE),
+    ("https://pro.rbc.ru/demo/65f1", LINK_PAGE),
+    ("/business/", LINK_PAGE),
+    ("/finance/?utm_source=topline", LINK_SECTION),
+    ("/news/693599919a7947c64d803191?utm_source=main", LINK_SECTION),
+    ("/story/68822f889a79475439ba67bb", LINK_SECTION),
+    ("https://www.rbc.ru/quote/ticker/8", LINK_IGNORE),
+    ("https://example.com/news/693599919a7947c64d803191", LINK_IGNORE),
+    ("/politics", LINK_IGNORE),
+    ("", LINK_IGNORE),
+])
+def test_classify_link(href, kind):
+    """Тест типов ссылок главной страницы"""
+    assert classify_link(href) == kind
+
+
+def _reference_is_news(href, text):
+    """Отбор ссылок проверками подстрок (эталон для классификатора)"""
+    news_patterns = [
+        '/article/', '/news/', '/story/', '/politics/', '/economics/', '/business/',
+        '/society/', '/technology/', '/finance/', '/rbcfreenews/', '/life/', '/style/',
+        '/books/', '/person/', '/designs/', 'pro.rbc.ru/demo/', 'pro.rbc.ru/books/', 'style.rbc.ru/',
+    ]
+    excludes = [
+        '/politics/?', '/economics/?', '/business/?', '/society/?', '/technology/?', '/finance/?',
+        '?utm_source=', 'story/68822f889a79475439ba67bb',
+    ]
+    is_news_link = any(pattern in href for pattern in news_patterns)
+    is_rbc_link = 'rbc.ru' in href or href.startswith('/')
+    is_section = any(exclude in href for exclude in excludes)
+    has_article_id = bool(re.search(r'/\d{2}/\d{2}/\d{4}/[a-f0-9]+', href)) or bool(re.search(r'/[a-f0-9]{24}', href))
+    return is_news_link and is_rbc_link and not is_section and (has_article_id or len(text) > 15)
+
+
+def test_classify_link_matches_substring_checks():
+    """Тест совпадения отбора с проверками подстрок на случайных ссылках"""
+    parts = [
+        "/", "?", "https://", "www.", "rbc.ru", "style.rbc.ru", "pro.rbc.ru", "example.com",
+        "/politics", "/finance", "/story", "/news", "/life", "/books", "/demo", "/person",
+        "story/68822f889a79475439ba67bb", "utm_source=", "from=main", "/07/12/2025",
+        "/693599919a7947c64d803191", "abc", "12", "rbcfreenews", "style", "s", "p", "r", ".",
+    ]
+    rng = random.Random(42)
+
+    for _ in range(5000):
+        href = "".join(rng.choice(parts) for _ in range(rng.randint(1, 7)))
+        for text in ("коротко", "Достаточно длинный текст ссылки"):
+            kind = classify_link(href)
+            selected = kind == LINK_ARTICLE or (kind == LINK_PAGE and len(text) > 15)
+            assert selected == _reference_is_news(href, text), href
+
+
+def test_fetch_article_single_request(parser):
+    """Тест, что статья загружается и разбирается за один запрос"""
+    mock_html = """
+    <html>
+    <head>
+        <meta property="og:description" content="Краткое описание">
+        <meta property="article:published_time" content="2025-12-07T10:00:00+03:00">
+    </head>
+    <body>
+        <h1>Заголовок тестовой новости</h1>
+        <article>
+            <p>Текст новости с достаточным количеством символов для извлечения.</p>
+        </article>
+    </body>
+    </html>
+    """
+
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=mock_html)) as mock_fetch:
+        with patch.object(parser, 'parse_document', wraps=parser.parse_document) as mock_soup:
+            article = asyncio.run(parser._fetch_article_async("https://www.rbc.ru/test", session=None))
+
+    mock_fetch.assert_awaited_once()
+    mock_soup.assert_called_once()
+
+    assert article.title == "Заголовок тестовой новости"
+    assert "Текст новости" in article.text
+    assert article.url == "https://www.rbc.ru/test"
+    assert article.description == "Краткое описание"
+    assert article.published_at == "2025-12-07T10:00:00+03:00"
+
+
+def test_extract_article_without_metadata(parser):
+    """Тест извлечения статьи без meta тегов"""
+    article = parser._extract_article("<h1>Заголовок без метаданных</h1>", "https://www.rbc.ru/test")
+    assert article.title == "Заголовок без метаданных"
+    assert article.description == ""
+    assert article.published_at == ""
+
+
+def test_parse_crawls_with_limited_workers(parser):
+    """Тест, что одновременно загружается не больше self.workers статей"""
+    homepage = "\n".join(
+        f'<a href="/politics/07/12/2025/{i:024x}">Новость {i}</a>' for i in range(10)
+    )
+    parser.workers = 3
+    state = {"active": 0, "peak": 0}
+
+    async def slow_article(url, session):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return RBCArticle(title="Заголовок", url=url, text="", description="", published_at="")
+
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=homepage)):
+        with patch.object(parser, '_fetch_article_async', side_effect=slow_article):
+            result = parser.parse()
+
+    assert len(result) == 10
+    assert state["peak"] == 3
+    assert [item.url for item in result] == parser._find_news_urls(homepage)
+
+
+def test_fetch_article_async_uses_rate_limiter(parser):
+    """Тест, что перед загрузкой статьи берется токен лимитера хоста"""
+    with patch.object(parser.rate_limiter, 'acquire', AsyncMock()) as mock_acquire:
+        fetch_article(parser, "<h1>Заголовок тестовой новости</h1>", "https://www.rbc.ru/test")
+        mock_acquire.assert_awaited_once_with("https://www.rbc.ru/test")
+
+
+def test_init_crawl_settings():
+    """Тест настройки количества загрузчиков и лимита хоста"""
+    parser = RBCParser(workers=2, rate_per_host=1.5, rate_burst=3)
+    assert parser.workers == 2
+    assert parser.rate_limiter.rate == 1.5
+    assert parser.rate_limiter.capacity == 3
+
+
+# Тесты отбора новых статей
+def test_filter_new_urls_single_query():
+    """Тест отбрасывания уже сохраненных статей одним запросом"""
+    parser = RBCParser()
+    urls = ["https://www.rbc.ru/a", "https://www.rbc.ru/b", "https://www.rbc.ru/c"]
+
+    mock_session = MagicMock()
+    mock_session.scalars.return_value = ["https://www.rbc.ru/b"]
+
+    with patch.object(parser, '_get_db_session', return_value=mock_session):
+        result = parser._filter_new_urls(urls)
+
+    assert result == ["https://www.rbc.ru/a", "https://www.rbc.ru/c"]
+    mock_session.scalars.assert_called_once()
+    mock_session.close.assert_called_once()
+
+
+def test_filter_new_urls_db_error():
+    """Тест, что при недоступной БД обходятся все URL"""
+    parser = RBCParser()
+    urls = ["https://www.rbc.ru/a"]
+
+    with patch.object(parser, '_get_db_session', side_effect=Exception("DB down")):
+        assert parser._filter_new_urls(urls) == urls
+
+
+def test_filter_new_urls_empty():
+    """Тест пустого списка без обращения к БД"""
+    parser = RBCParser()
+    with patch.object(parser, '_get_db_session') as mock_session:
+        assert parser._filter_new_urls([]) == []
+        mock_session.assert_not_called()
+
+
+def test_filter_new_urls_runs_off_event_loop(parser):
+    """Тест: проверка сохраненных статей (синхронный запрос к БД) идет не в потоке цикла событий"""
+    homepage = '<a href="/politics/07/12/2025/693599919a7947c64d803191">Новость 1</a>'
+    threads = []
+
+    def filter_new_urls(urls):
+        threads.append(threading.get_ident())
+        return list(urls)
+
+    parser._filter_new_urls = filter_new_urls
+
+    async def run():
+        with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=homepage)):
+            urls = await parser._news_urls_async(MagicMock())
+        return urls, threading.get_ident()
+
+    urls, loop_thread = asyncio.run(run())
+
+    assert urls == ["https://www.rbc.ru/politics/07/12/2025/693599919a7947c64d803191"]
+    assert threads and threads[0] != loop_thread
+
+
+def test_parse_skips_stored_articles(parser):
+    """Тест, что сохраненные статьи не загружаются"""
+    homepage = """
+    <a href="/politics/07/12/2025/693599919a7947c64d803191">Новость 1</a>
+    <a href="/society/07/12/2025/6935af0d9a79475a0f2b2694">Новость 2</a>
+    """
+    stored = "https://www.rbc.ru/politics/07/12/2025/693599919a7947c64d803191"
+    parser._filter_new_urls = lambda urls: [url for url in urls if url != stored]
+
+    with patch.object(parser, 'fetch_html_async', AsyncMock(return_value=homepage)):
+        with patch.object(parser, '_fetch_article_async', side_effect=fake_article) as mock_fetch:
+            result = parser.parse()
+
+    assert [item.url for item in result] == ["https://www.rbc.ru/society/07/12/2025/6935af0d9a79475a0f2b2694"]
+    assert mock_fetch.call_count == 1
@@ -1,93 +1,141 @@
 import pytest
+from decimal import Decimal
 from unittest.mock import MagicMock, patch
-from bs4 import BeautifulSoup
-from src.parsers.sources import SmartlabParser
+from src.parsers.sources import SmartlabParser, SmartlabQuote
+from src.parsers.sources.smartlab import COLUMNS
+from src.parsers.sources.html_backend import BS4Node
+from src.parsers.sources.snapshot_store import MemorySnapshotStore
 
 
 # Фикстура для парсера
 @pytest.fixture
 def parser():
     """Создает экземпляр парсера для каждого теста"""
-    return SmartlabParser("https://smart-lab.ru/q/shares/")
+    return SmartlabParser("https://smart-lab.ru/q/shares/", snapshot_store=MemorySnapshotStore())
 
 
 # Тесты вспомогательных методов
-def test_extract_cell_text_simple(parser):
+def _row(parser, cells):
+    """Строка таблицы из HTML ячеек"""
+    return parser.parse_document(f"<table><tr>{cells}</tr></table>").css_first("tr")
+
+
+def _cells(parser, row):
+    """Тексты ячеек строки по именам полей SmartlabQuote"""
+    return dict(zip(SmartlabQuote._fields, parser._extract_row(row)))
+
+
+def test_extract_row_simple(parser):
     """Тест извлечения текста из простой ячейки"""
-    html = "<tr><td class='test'>Текст ячейки</td></tr>"
-    soup = BeautifulSoup(html, "html.parser")
-    row = soup.find("tr")
+    row = _row(parser, "<td class='trades-table__ticker'> GAZP </td>")
+
+    data = _cells(parser, row)
+    assert data["ticker"] == "GAZP"
+    assert data["last_price_rub"] == "No information!"
+    assert list(data) == list(SmartlabQuote._fields)
+
+
+def test_extract_row_with_link(parser):
+    """Тест извлечения названия из ссылки в ячейке"""
+    row = _row(parser, "<td class='trades-table__name'><a href='/test'>Газпром</a></td>")
+
+    assert _cells(parser, row)["name"] == "Газпром"
+
+
+def test_extract_row_no_link(parser):
+    """Тест ячейки названия без ссылки"""
+    row = _row(parser, "<td class='trades-table__name'>Текст без ссылки</td>")
 
-    text = parser._extract_cell_text(row, "td", "test")
-    assert text == "Текст ячейки"
+    assert _cells(parser, row)["name"] == "No information!"
 
 
-def test_extract_cell_text_with_link(parser):
-    """Тест извлечения текста из ссылки в ячейке"""
-    html = "<tr><td class='test'><a href='/test'>Текст ссылки</a></td></tr>"
-    soup = BeautifulSoup(html, "html.parser")
-    row = soup.find("tr")
+def test_extract_row_ignores_unknown_cells(parser):
+    """Тест ячеек без класса и с посторонними классами"""
+    row = _row(parser, "<td>1</td><td class='trades-table__num'>2</td><td class='other trades-table__price'>250.5</td>")
 
-    text = parser._extract_cell_text(row, "td", "test", link_text=True)
-    assert text == "Текст ссылки"
+    data = _cells(parser, row)
+    assert data["last_price_rub"] == "250.5"
+    assert sum(value != "No information!" for value in data.values()) == 1
 
 
-def test_extract_cell_text_no_cell(parser):
-    """Тест обработки отсутствующей ячейки"""
-    html = "<tr><td class='other'>Другая ячейка</td></tr>"
-    soup = BeautifulSoup(html, "html.parser")
-    row = soup.find("tr")
+def test_extract_row_first_cell_wins(parser):
+    """Тест повторяющейся колонки - берется первая ячейка"""
+    row = _row(parser, "<td class='trades-table__ticker'>FIRST</td><td class='trades-table__ticker'>SECOND</td>")
 
-    text = parser._extract_cell_text(row, "td", "test")
-    assert text == "No information!"
+    assert _cells(parser, row)["ticker"] == "FIRST"
 
 
-def test_extract_cell_text_no_link(parser):
-    """Тест обработки отсутствующей ссылки при link_text=True"""
-    html = "<tr><td class='test'>Текст без ссылки</td></tr>"
-    soup = BeautifulSoup(html, "html.parser")
-    row = soup.find("tr")
+def test_extract_row_all_columns(parser):
+    """Тест всех колонок таблицы"""
+    cells = "".join(
+        f"<td class='{css_class}'><a href='#'>{field}</a></td>" if link else f"<td class='{css_class}'>{field}</td>"
+        for css_class, (field, link) in COLUMNS.items()
+    )
+
+    assert parser._extract_row(_row(parser, cells)) == list(SmartlabQuote._fields)
+
+
+def test_to_records_converts_numeric_columns(parser):
+    """Тест преобразования числовых колонок в Decimal"""
+    rows = [
+        ["Газпром", "GAZP", "250,50", "+5.2%", "1 000 000"] + ["0"] * 6,
+        ["Сбербанк", "SBER", "No information!", "-0.1%", "2 000"] + ["0"] * 6,
+    ]
 
-    text = parser._extract_cell_text(row, "td", "test", link_text=True)
-    assert text == "No information!"
+    records = parser._to_records(rows)
+
+    assert records[0] == SmartlabQuote(
+        name="Газпром", ticker="GAZP", last_price_rub=Decimal("250.50"),
+        price_change_percent=Decimal("5.2"), volume_mln_rub=Decimal("1000000"),
+    )
+    assert records[1].last_price_rub == Decimal("0")
+    assert records[1].price_change_percent == Decimal("-0.1")
+    assert all(isinstance(value, Decimal) for value in records[1][2:])
 
 
-def test_extract_cell_text_handles_attribute_error(parser):
-    """Тест обработки некорректной строки (None)"""
-    text = parser._extract_cell_text(None, "td", "test")
-    assert text == "No information!"
+def test_to_records_empty(parser):
+    """Тест пустого списка строк"""
+    assert parser._to_records([]) == []
 
 
 def test_clean_number_normal(parser):
     """Тест очистки нормального числа"""
-    assert parser._clean_number("123.45") == 123.45
-    assert parser._clean_number("1 234.56") == 1234.56
-    assert parser._clean_number("-50.5") == -50.5
+    assert parser._clean_number("123.45") == Decimal("123.45")
+    assert parser._clean_number("1 234.56") == Decimal("1234.56")
+    assert parser._clean_number("-50.5") == Decimal("-50.5")
 
 
 def test_clean_number_with_percent(parser):
     """Тест очистки числа с процентами"""
-    assert parser._clean_number("15.5%") == 15.5
-    assert parser._clean_number("20 %") == 20.0
-    assert parser._clean_number("+10%") == 10.0
+    assert parser._clean_number("15.5%") == Decimal("15.5")
+    assert parser._clean_number("20 %") == Decimal("20")
+    assert parser._clean_number("+10%") == Decimal("10")
 
 
 def test_clean_number_with_comma(parser):
     """Тест очистки числа с запятой"""
-    assert parser._clean_number("1,25") == 1.25
+    assert parser._clean_number("1,25") == Decimal("1.25")
 
 
 def test_clean_number_no_information(parser):
     """Тест обработки 'No information!'"""
-    assert parser._clean_number("No information!") == 0.0
-    assert parser._clean_number("") == 0.0
-    assert parser._clean_number(None) == 0.0
+    assert parser._clean_number("No information!") == Decimal("0")
+    assert parser._clean_number("") == Decimal("0")
+    assert parser._clean_number(None) == Decimal("0")
 
 
 def test_clean_number_invalid(parser):
     """Тест обработки невалидного значения"""
-    assert parser._clean_number("abc") == 0.0
-    assert parser._clean_number("---") == 0.0
+    assert parser._clean_number("abc") == Decimal("0")
+    assert parser._clean_number("---") == Decimal("0")
+    assert parser._clean_number("NaN") == Decimal("0")
+    assert parser._clean_number("Infinity") == Decimal("0")
+
+
+def test_clean_number_keeps_precision(parser):
+    """Тест, что значение не проходит через float"""
+    assert str(parser._clean_number("0.1")) == "0.1"
+    assert str(parser._clean_number("12345678901234.05")) == "12345678901234.05"
 
 
 # Тесты основной логики парсинга
@@ -128,11 +176,31 @@ def test_parse_success(parser):
         assert len(result) == 1
         item = result[0]
 
-        assert item["name"] == "Газпром"
-        assert item["ticker"] == "GAZP"
-        assert item["last price, rub"] == "250.50"
-        assert item["price change"] == "+5.2%"
-        assert item["volume, mln rub"] == "1 000 000"
+        assert item.name == "Газпром"
+        assert item.ticker == "GAZP"
+        assert item.last_price_rub == Decimal("250.50")
+        assert item.price_change_percent == Decimal("5.2")
+        assert item.volume_mln_rub == Decimal("1000000")
+
+
+def test_parse_only_table_region(parser):
+    """Тест разбора только контейнера таблицы, без остальной страницы"""
+    table = (
+        "<div class='main__table'><div class='wrap'><table>"
+        "<tr><th>Name</th></tr>"
+        "<tr><td class='trades-table__name'><a href='/test'>Газпром</a></td>"
+        "<td class='trades-table__ticker'>GAZP</td></tr>"
+        "</table></div></div>"
+    )
+    mock_html = f"<html><body><nav>{'<div>меню</div>' * 50}</nav>{table}<footer><div>подвал</div></footer></body></html>"
+
+    with patch.object(parser, "fetch_html", return_value=mock_html), \
+         patch.object(parser, "parse_document", wraps=parser.parse_document) as parse_document:
+        result = parser.parse()
+
+    parse_document.assert_called_once_with(table)
+    assert len(result) == 1
+    assert result[0].ticker == "GAZP"
 
 
 def test_parse_no_table(parser):
@@ -227,9 +295,27 @@ def test_parse_bad_row(parser):
     with patch.object(parser, "fetch_html", return_value=mock_html):
         result = parser.parse()
         assert len(result) >= 1
-        test_row = [r for r in result if r.get("ticker") == "TEST"]
+        test_row = [r for r in result if r.ticker == "TEST"]
         assert len(test_row) == 1
-        assert test_row[0]["ticker"] == "TEST"
+        assert test_row[0].ticker == "TEST"
+
+
+def test_parse_iter_converts_in_batches(parser):
+    """Тест потокового разбора: числа преобразуются пачками по batch_size строк"""
+    rows = "".join(
+        f"<tr><td class='trades-table__ticker'>T{i}</td><td class='trades-table__price'>{i}</td></tr>"
+        for i in range(5)
+    )
+    mock_html = f"<div class='main__table'><table><tr><th>Header</th></tr>{rows}</table></div>"
+    parser.batch_size = 2
+
+    with patch.object(parser, "fetch_html", return_value=mock_html), \
+         patch.object(parser, "_to_records", wraps=parser._to_records) as to_records:
+        result = list(parser.parse_iter())
+
+    assert [len(c.args[0]) for c in to_records.call_args_list] == [2, 2, 1]
+    assert [item.ticker for item in result] == ["T0", "T1", "T2", "T3", "T4"]
+    assert result[4].last_price_rub == Decimal("4")
 
 
 def test_parse_skips_row_on_exception(parser):
@@ -263,20 +349,21 @@ def test_parse_skips_row_on_exception(parser):
     </html>
     """
 
+    extract_row = parser._extract_row
     call_state = {"count": 0}
 
-    def side_effect(*args, **kwargs):
+    def side_effect(row):
         if call_state["count"] == 0:
             call_state["count"] += 1
             raise ValueError("boom")
-        return "OK"
+        return extract_row(row)
 
     with patch.object(parser, "fetch_html", return_value=mock_html):
-        with patch.object(parser, "_extract_cell_text", side_effect=side_effect):
+        with patch.object(parser, "_extract_row", side_effect=side_effect):
             result = parser.parse()
 
     assert len(result) == 1
-    assert all(value == "OK" for value in result[0].values())
+    assert result[0].ticker == "OK"
 
 
 def test_parse_no_html(parser):
@@ -301,16 +388,16 @@ def test_run_smartlab_parser_success():
         smartlab, "SmartlabParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.return_value = [{"name": "OK"}]
-        parser_instance.save_to_db.return_value = None
+        parser_instance.parse_iter.return_value = iter([{"name": "OK"}])
+        parser_instance.save_iter.return_value = 1
         mock_cls.return_value = parser_instance
 
         smartlab.run_smartlab_parser()
 
         mock_logging.basicConfig.assert_called_once()
         mock_cls.assert_called_once()
-        parser_instance.parse.assert_called_once()
-        parser_instance.save_to_db.assert_called_once()
+        parser_instance.parse_iter.assert_called_once()
+        parser_instance.save_iter.assert_called_once_with(parser_instance.parse_iter.return_value)
 
 
 def test_run_smartlab_parser_handles_exception():
@@ -321,7 +408,7 @@ def test_run_smartlab_parser_handles_exception():
         smartlab, "SmartlabParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.side_effect = RuntimeError("boom")
+        parser_instance.parse_iter.side_effect = RuntimeError("boom")
         mock_cls.return_value = parser_instance
 
         with patch.object(smartlab.logger, "error") as mock_error:
@@ -333,19 +420,19 @@ def test_run_smartlab_parser_handles_exception():
 def test_save_to_db(parser):
     """Тест сохранения данных в БД через SQLAlchemy"""
     fake_data = [
-        {
-            "name": "Газпром",
-            "ticker": "GAZP",
-            "last price, rub": "250.50",
-            "price change": "+5.2%",
-            "volume, mln rub": "1 000 000",
-            "change in one week": "+2.1%",
-            "change in one month": "+10.5%",
-            "change in year to date": "+15.3%",
-            "change in twelve month": "+20.1%",
-            "capitalization, bln rub": "5 000",
-            "capitalization, bln usd": "50",
-        }
+        SmartlabQuote(
+            name="Газпром",
+            ticker="GAZP",
+            last_price_rub=Decimal("250.50"),
+            price_change_percent=Decimal("5.2"),
+            volume_mln_rub=Decimal("1000000"),
+            change_week_percent=Decimal("2.1"),
+            change_month_percent=Decimal("10.5"),
+            change_ytd_percent=Decimal("15.3"),
+            change_year_percent=Decimal("20.1"),
+            capitalization_bln_rub=Decimal("5000"),
+            capitalization_bln_usd=Decimal("50"),
+        )
     ]
 
     mock_session = MagicMock()
@@ -364,7 +451,7 @@ def test_save_to_db(parser):
 
         mock_session.query.assert_called()
 
-        assert mock_session.add.called
+        assert mock_session.execute.called
 
         mock_session.commit.assert_called_once()
         mock_session.close.assert_called_once()
@@ -379,19 +466,19 @@ def test_save_to_db_no_data(parser):
 
 def test_save_to_db_source_not_found(parser):
     """Тест случая, когда источник не найден в БД"""
-    fake_data = [{
-        "name": "Test",
-        "ticker": "TEST",
-        "last price, rub": "100",
-        "price change": "+1%",
-        "volume, mln rub": "1000",
-        "change in one week": "+1%",
-        "change in one month": "+1%",
-        "change in year to date": "+1%",
-        "change in twelve month": "+1%",
-        "capitalization, bln rub": "100",
-        "capitalization, bln usd": "1",
-    }]
+    fake_data = [SmartlabQuote(
+        name="Test",
+        ticker="TEST",
+        last_price_rub=Decimal("100"),
+        price_change_percent=Decimal("1"),
+        volume_mln_rub=Decimal("1000"),
+        change_week_percent=Decimal("1"),
+        change_month_percent=Decimal("1"),
+        change_ytd_percent=Decimal("1"),
+        change_year_percent=Decimal("1"),
+        capitalization_bln_rub=Decimal("100"),
+        capitalization_bln_usd=Decimal("1"),
+    )]
 
     mock_session = MagicMock()
     mock_query = MagicMock()
@@ -402,25 +489,26 @@ def test_save_to_db_source_not_found(parser):
         parser.save_to_db(fake_data)
 
         mock_session.query.assert_called()
-        mock_session.add.assert_not_called()
+        mock_session.execute.assert_not_called()
+    assert parser.save_errors == 1
 
 
 def test_save_to_db_rollback_on_error(parser):
     """Тест отката транзакции при ошибке"""
     fake_data = [
-        {
-            "name": "Test",
-            "ticker": "TEST",
-            "last price, rub": "100",
-            "price change": "+1%",
-            "volume, mln rub": "1000",
-            "change in one week": "+1%",
-            "change in one month": "+1%",
-            "change in year to date": "+1%",
-            "change in twelve month": "+1%",
-            "capitalization, bln rub": "100",
-            "capitalization, bln usd": "1",
-        }
+        SmartlabQuote(
+            name="Test",
+            ticker="TEST",
+            last_price_rub=Decimal("100"),
+            price_change_percent=Decimal("1"),
+            volume_mln_rub=Decimal("1000"),
+            change_week_percent=Decimal("1"),
+            change_month_percent=Decimal("1"),
+            change_ytd_percent=Decimal("1"),
+            change_year_percent=Decimal("1"),
+            capitalization_bln_rub=Decimal("100"),
+            capitalization_bln_usd=Decimal("1"),
+        )
     ]
 
     mock_session = MagicMock()
@@ -429,7 +517,7 @@ def test_save_to_db_rollback_on_error(parser):
     mock_query = MagicMock()
     mock_query.filter.return_value.first.return_value = mock_source
     mock_session.query.return_value = mock_query
-    mock_session.add.side_effect = Exception("DB Error")
+    mock_session.execute.side_effect = Exception("DB Error")
 
     with patch.object(parser, "_get_db_session", return_value=mock_session):
         parser.save_to_db(fake_data)
@@ -440,19 +528,19 @@ def test_save_to_db_rollback_on_error(parser):
 def test_save_to_db_cleans_numbers(parser):
     """Тест, что числа очищаются перед сохранением"""
     fake_data = [
-        {
-            "name": "Test",
-            "ticker": "TEST",
-            "last price, rub": "1 234.56",
-            "price change": "+5.2%",
-            "volume, mln rub": "1 000 000",
-            "change in one week": "+2.1%",
-            "change in one month": "+10.5%",
-            "change in year to date": "+15.3%",
-            "change in twelve month": "+20.1%",
-            "capitalization, bln rub": "5 000",
-            "capitalization, bln usd": "50",
-        }
+        SmartlabQuote(
+            name="Test",
+            ticker="TEST",
+            last_price_rub=Decimal("1234.56"),
+            price_change_percent=Decimal("5.2"),
+            volume_mln_rub=Decimal("1000000"),
+            change_week_percent=Decimal("2.1"),
+            change_month_percent=Decimal("10.5"),
+            change_ytd_percent=Decimal("15.3"),
+            change_year_percent=Decimal("20.1"),
+            capitalization_bln_rub=Decimal("5000"),
+            capitalization_bln_usd=Decimal("50"),
+        )
     ]
 
     mock_session = MagicMock()
@@ -465,61 +553,48 @@ def test_save_to_db_cleans_numbers(parser):
     with patch.object(parser, "_get_db_session", return_value=mock_session):
         parser.save_to_db(fake_data)
 
-        assert mock_session.add.called
+        assert mock_session.execute.called
         mock_session.commit.assert_called_once()
 
 
-def test_extract_cell_text_without_class_name(parser):
-    """Тест извлечения текста без указания класса"""
-    html = "<tr><td>Текст без класса</td></tr>"
-    soup = BeautifulSoup(html, "html.parser")
-    row = soup.find("tr")
+def test_extract_row_single_pass(parser):
+    """Тест одного прохода по ячейкам строки"""
+    row = _row(parser, "".join(f"<td class='{css_class}'>1</td>" for css_class in COLUMNS))
+
+    with patch.object(BS4Node, "css", autospec=True, side_effect=BS4Node.css) as css:
+        parser._extract_row(row)
 
-    text = parser._extract_cell_text(row, "td")
-    assert text == "Текст без класса"
+    css.assert_called_once_with(row, "td")
 
 
-def test_extract_cell_text_type_error(parser):
-    """Тест обработки TypeError при извлечении текста"""
+def test_extract_row_bad_row(parser):
+    """Тест некорректной строки - ошибка пробрасывается в parse()"""
     class BadRow:
-        def find(self, *args, **kwargs):
+        def css(self, *args, **kwargs):
             raise TypeError("Bad type")
 
-    bad_row = BadRow()
-    text = parser._extract_cell_text(bad_row, "td", "test")
-    assert text == "No information!"
-
-
-def test_extract_cell_text_attribute_error_in_get_text(parser):
-    """Тест обработки AttributeError при get_text"""
-    html = "<tr><td class='test'>Текст</td></tr>"
-    soup = BeautifulSoup(html, "html.parser")
-    row = soup.find("tr")
-
-    cell = row.find("td", class_="test")
-    with patch.object(cell, "get_text", side_effect=AttributeError("No get_text")):
-        text = parser._extract_cell_text(row, "td", "test")
-        assert text == "No information!"
+    with pytest.raises(TypeError):
+        parser._extract_row(BadRow())
 
 
 def test_clean_number_negative_with_spaces(parser):
     """Тест очистки отрицательного числа с пробелами"""
-    assert parser._clean_number("-1 234.56") == -1234.56
-    assert parser._clean_number("- 50.5") == -50.5
+    assert parser._clean_number("-1 234.56") == Decimal("-1234.56")
+    assert parser._clean_number("- 50.5") == Decimal("-50.5")
 
 
 def test_clean_number_multiple_operations(parser):
     """Тест очистки числа с несколькими операциями"""
-    assert parser._clean_number("+1 234.56%") == 1234.56
-    assert parser._clean_number("-50.5%") == -50.5
-    assert parser._clean_number("1,234") == 1.234
+    assert parser._clean_number("+1 234.56%") == Decimal("1234.56")
+    assert parser._clean_number("-50.5%") == Decimal("-50.5")
+    assert parser._clean_number("1,234") == Decimal("1.234")
 
 
 def test_clean_number_zero(parser):
     """Тест обработки нуля"""
-    assert parser._clean_number("0") == 0.0
-    assert parser._clean_number("0.0") == 0.0
-    assert parser._clean_number("0%") == 0.0
+    assert parser._clean_number("0") == Decimal("0")
+    assert parser._clean_number("0.0") == Decimal("0")
+    assert parser._clean_number("0%") == Decimal("0")
 
 
 def test_parse_multiple_rows(parser):
@@ -566,8 +641,8 @@ def test_parse_multiple_rows(parser):
         result = parser.parse()
 
         assert len(result) == 2
-        assert result[0]["ticker"] == "T1"
-        assert result[1]["ticker"] == "T2"
+        assert result[0].ticker == "T1"
+        assert result[1].ticker == "T2"
 
 
 def test_parse_all_fields_populated(parser):
@@ -602,17 +677,17 @@ def test_parse_all_fields_populated(parser):
 
         assert len(result) == 1
         item = result[0]
-        assert item["name"] == "Полная компания"
-        assert item["ticker"] == "FULL"
-        assert item["last price, rub"] == "123.45"
-        assert item["price change"] == "+5.67%"
-        assert item["volume, mln rub"] == "9 999 999"
-        assert item["change in one week"] == "+1.11%"
-        assert item["change in one month"] == "+2.22%"
-        assert item["change in year to date"] == "+3.33%"
-        assert item["change in twelve month"] == "+4.44%"
-        assert item["capitalization, bln rub"] == "1 000 000"
-        assert item["capitalization, bln usd"] == "10 000"
+        assert item.name == "Полная компания"
+        assert item.ticker == "FULL"
+        assert item.last_price_rub == Decimal("123.45")
+        assert item.price_change_percent == Decimal("5.67")
+        assert item.volume_mln_rub == Decimal("9999999")
+        assert item.change_week_percent == Decimal("1.11")
+        assert item.change_month_percent == Decimal("2.22")
+        assert item.change_ytd_percent == Decimal("3.33")
+        assert item.change_year_percent == Decimal("4.44")
+        assert item.capitalization_bln_rub == Decimal("1000000")
+        assert item.capitalization_bln_usd == Decimal("10000")
 
 
 def test_parse_only_header_row(parser):
@@ -637,32 +712,32 @@ def test_parse_only_header_row(parser):
 def test_save_to_db_multiple_items(parser):
     """Тест сохранения нескольких записей в БД"""
     fake_data = [
-        {
-            "name": "Компания 1",
-            "ticker": "T1",
-            "last price, rub": "100",
-            "price change": "+1%",
-            "volume, mln rub": "1000",
-            "change in one week": "+1%",
-            "change in one month": "+1%",
-            "change in year to date": "+1%",
-            "change in twelve month": "+1%",
-            "capitalization, bln rub": "100",
-            "capitalization, bln usd": "1",
-        },
-        {
-            "name": "Компания 2",
-            "ticker": "T2",
-            "last price, rub": "200",
-            "price change": "+2%",
-            "volume, mln rub": "2000",
-            "change in one week": "+2%",
-            "change in one month": "+2%",
-            "change in year to date": "+2%",
-            "change in twelve month": "+2%",
-            "capitalization, bln rub": "200",
-            "capitalization, bln usd": "2",
-        },
+        SmartlabQuote(
+            name="Компания 1",
+            ticker="T1",
+            last_price_rub=Decimal("100"),
+            price_change_percent=Decimal("1"),
+            volume_mln_rub=Decimal("1000"),
+            change_week_percent=Decimal("1"),
+            change_month_percent=Decimal("1"),
+            change_ytd_percent=Decimal("1"),
+            change_year_percent=Decimal("1"),
+            capitalization_bln_rub=Decimal("100"),
+            capitalization_bln_usd=Decimal("1"),
+        ),
+        SmartlabQuote(
+            name="Компания 2",
+            ticker="T2",
+            last_price_rub=Decimal("200"),
+            price_change_percent=Decimal("2"),
+            volume_mln_rub=Decimal("2000"),
+            change_week_percent=Decimal("2"),
+            change_month_percent=Decimal("2"),
+            change_ytd_percent=Decimal("2"),
+            change_year_percent=Decimal("2"),
+            capitalization_bln_rub=Decimal("200"),
+            capitalization_bln_usd=Decimal("2"),
+        ),
     ]
 
     mock_session = MagicMock()
@@ -673,27 +748,35 @@ def test_save_to_db_multiple_items(parser):
     mock_session.query.return_value = mock_query
 
     with patch.object(parser, "_get_db_session", return_value=mock_session):
-        parser.save_to_db(fake_data)
-
-        assert mock_session.add.call_count == 2
+        assert parser.save_to_db(fake_data) == 2
+
+        # история одним executemany, затем upsert в smartlab_latest и smartlab_ohlc
+        assert mock_session.execute.call_count == 3
+        history, latest, ohlc = mock_session.execute.call_args_list
+        rows = history.args[1]
+        assert [row["ticker"] for row in rows] == [item.ticker for item in fake_data]
+        assert all(row["source_id"] == 1 for row in rows)
+        assert latest.args[0].table.name == "smartlab_latest"
+        assert [row["parsed_at"] for row in latest.args[1]] == [row["parsed_at"] for row in rows]
+        assert len(ohlc.args[1]) == 2 * len(fake_data)
         mock_session.commit.assert_called_once()
 
 
 def test_save_to_db_connection_error(parser):
     """Тест обработки ошибки подключения к БД"""
-    fake_data = [{
-        "name": "Test",
-        "ticker": "TEST",
-        "last price, rub": "100",
-        "price change": "+1%",
-        "volume, mln rub": "1000",
-        "change in one week": "+1%",
-        "change in one month": "+1%",
-        "change in year to date": "+1%",
-        "change in twelve month": "+1%",
-        "capitalization, bln rub": "100",
-        "capitalization, bln usd": "1",
-    }]
+    fake_data = [SmartlabQuote(
+        name="Test",
+        ticker="TEST",
+        last_price_rub=Decimal("100"),
+        price_change_percent=Decimal("1"),
+        volume_mln_rub=Decimal("1000"),
+        change_week_percent=Decimal("1"),
+        change_month_percent=Decimal("1"),
+        change_ytd_percent=Decimal("1"),
+        change_year_percent=Decimal("1"),
+        capitalization_bln_rub=Decimal("100"),
+        capitalization_bln_usd=Decimal("1"),
+    )]
 
     with patch.object(parser, "_get_db_session", side_effect=Exception("Connection error")):
         parser.save_to_db(fake_data)
@@ -701,19 +784,19 @@ def test_save_to_db_connection_error(parser):
 
 def test_save_to_db_cursor_error(parser):
     """Тест обработки ошибки при создании сессии"""
-    fake_data = [{
-        "name": "Test",
-        "ticker": "TEST",
-        "last price, rub": "100",
-        "price change": "+1%",
-        "volume, mln rub": "1000",
-        "change in one week": "+1%",
-        "change in one month": "+1%",
-        "change in year to date": "+1%",
-        "change in twelve month": "+1%",
-        "capitalization, bln rub": "100",
-        "capitalization, bln usd": "1",
-    }]
+    fake_data = [SmartlabQuote(
+        name="Test",
+        ticker="TEST",
+        last_price_rub=Decimal("100"),
+        price_change_percent=Decimal("1"),
+        volume_mln_rub=Decimal("1000"),
+        change_week_percent=Decimal("1"),
+        change_month_percent=Decimal("1"),
+        change_ytd_percent=Decimal("1"),
+        change_year_percent=Decimal("1"),
+        capitalization_bln_rub=Decimal("100"),
+        capitalization_bln_usd=Decimal("1"),
+    )]
 
     mock_session = MagicMock()
     mock_source = MagicMock()
@@ -731,19 +814,19 @@ def test_save_to_db_cursor_error(parser):
 
 def test_save_to_db_close_error(parser):
     """Тест обработки ошибки при закрытии соединения"""
-    fake_data = [{
-        "name": "Test",
-        "ticker": "TEST",
-        "last price, rub": "100",
-        "price change": "+1%",
-        "volume, mln rub": "1000",
-        "change in one week": "+1%",
-        "change in one month": "+1%",
-        "change in year to date": "+1%",
-        "change in twelve month": "+1%",
-        "capitalization, bln rub": "100",
-        "capitalization, bln usd": "1",
-    }]
+    fake_data = [SmartlabQuote(
+        name="Test",
+        ticker="TEST",
+        last_price_rub=Decimal("100"),
+        price_change_percent=Decimal("1"),
+        volume_mln_rub=Decimal("1000"),
+        change_week_percent=Decimal("1"),
+        change_month_percent=Decimal("1"),
+        change_ytd_percent=Decimal("1"),
+        change_year_percent=Decimal("1"),
+        capitalization_bln_rub=Decimal("100"),
+        capitalization_bln_usd=Decimal("1"),
+    )]
 
     mock_session = MagicMock()
     mock_source = MagicMock()
@@ -770,7 +853,7 @@ def test_run_smartlab_parser_empty_data():
         smartlab, "SmartlabParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.return_value = []
+        parser_instance.save_iter.return_value = 0
         mock_cls.return_value = parser_instance
 
         with patch.object(smartlab.logger, "warning") as mock_warning:
@@ -786,8 +869,7 @@ def test_run_smartlab_parser_save_error():
         smartlab, "SmartlabParser"
     ) as mock_cls:
         parser_instance = MagicMock()
-        parser_instance.parse.return_value = [{"name": "OK"}]
-        parser_instance.save_to_db.side_effect = Exception("Save error")
+        parser_instance.save_iter.side_effect = Exception("Save error")
         mock_cls.return_value = parser_instance
 
         with patch.object(smartlab.logger, "error") as mock_error:
@@ -820,12 +902,145 @@ def test_parse_exception_in_row_processing(parser):
     </html>
     """
 
-    def side_effect(*args, **kwargs):
-        if args[1] == "td" and args[2] == "trades-table__ticker":
-            raise Exception("Row processing error")
-        return "Test" if args[1] == "td" and args[2] == "trades-table__name" else "No information!"
-
     with patch.object(parser, "fetch_html", return_value=mock_html):
-        with patch.object(parser, "_extract_cell_text", side_effect=side_effect):
+        with patch.object(parser, "_extract_row", side_effect=Exception("Row processing error")):
             result = parser.parse()
             assert len(result) == 0
+
+
+# Тесты сохранения только изменений
+@pytest.fixture
+def smartlab_db(tmp_path):
+    """sqlite база со схемой проекта и источником SmartLab"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from src.database import Base, Source
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Source(id=1, url="https://smart-lab.ru/q/shares/", name="SmartLab"))
+        session.commit()
+    return engine
+
+
+def _stored(engine):
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from src.database import SmartlabStock
+
+    with Session(engine) as session:
+        return [
+            (row.ticker, row.last_price_rub, row.is_full_snapshot)
+            for row in session.scalars(select(SmartlabStock).order_by(SmartlabStock.id))
+        ]
+
+
+def _quotes(**prices):
+    return [SmartlabQuote(name=t, ticker=t, last_price_rub=Decimal(p)) for t, p in prices.items()]
+
+
+def _save(parser, engine, data):
+    from sqlalchemy.orm import Session
+    with patch.object(parser, "_get_db_session", side_effect=lambda: Session(engine)):
+        return parser.save_iter(iter(data))
+
+
+def test_save_changes_only(parser, smartlab_db):
+    """Тест: первый запуск - полный снимок, дальше только изменившиеся тикеры"""
+    assert _save(parser, smartlab_db, _quotes(GAZP="100", SBER="300")) == 2
+    assert _save(parser, smartlab_db, _quotes(GAZP="100", SBER="300")) == 0
+    assert _save(parser, smartlab_db, _quotes(GAZP="100.00", SBER="301")) == 1
+
+    assert _stored(smartlab_db) == [
+        ("GAZP", Decimal("100"), True),
+        ("SBER", Decimal("300"), True),
+        ("SBER", Decimal("301"), False),
+    ]
+
+
+def test_save_changes_compares_at_column_scale(parser, smartlab_db):
+    """Тест: цена точнее scale колонки (0.01234 -> 0.01) не считается изменением каждый запуск"""
+    assert _save(parser, smartlab_db, _quotes(VTBR="0.01234")) == 1
+    assert _save(parser, smartlab_db, _quotes(VTBR="0.01234")) == 0
+    assert _save(parser, smartlab_db, _quotes(VTBR="0.0149")) == 0
+    assert _save(parser, smartlab_db, _quotes(VTBR="0.0151")) == 1
+
+    assert [row[1] for row in _stored(smartlab_db)] == [Decimal("0.01"), Decimal("0.02")]
+
+
+def test_save_full_snapshot_when_due(parser, smartlab_db):
+    """Тест периодического полного снимка"""
+    _save(parser, smartlab_db, _quotes(GAZP="100", SBER="300"))
+    parser.snapshot_store.mark_full_snapshot(0)
+
+    assert _save(parser, smartlab_db, _quotes(GAZP="100", SBER="300")) == 2
+    assert [row[2] for row in _stored(smartlab_db)] == [True, True, True, True]
+
+
+def test_save_full_mode(parser, smartlab_db):
+    """Тест режима full: каждый запуск сохраняется целиком"""
+    parser.store_mode = "full"
+    _save(parser, smartlab_db, _quotes(GAZP="100"))
+    assert _save(parser, smartlab_db, _quotes(GAZP="100")) == 1
+
+
+def test_save_changes_compares_with_db(parser, smartlab_db):
+    """Тест: новый процесс (пустой снимок) сравнивает с сохраненным в БД"""
+    _save(parser, smartlab_db, _quotes(GAZP="100", SBER="300"))
+
+    fresh = SmartlabParser("https://smart-lab.ru/q/shares/", snapshot_store=MemorySnapshotStore())
+    fresh.snapshot_store.mark_full_snapshot(parser.snapshot_store.last_full_snapshot())
+
+    assert _save(fresh, smartlab_db, _quotes(GAZP="100", SBER="305")) == 1
+    assert _stored(smartlab_db)[-1] == ("SBER", Decimal("305"), False)
+
+
+def test_save_changes_sees_other_process_writes(parser, smartlab_db):
+    """Тест: запись другого процесса воркера не оставляет устаревший снимок"""
+    other = SmartlabParser("https://smart-lab.ru/q/shares/", snapshot_store=MemorySnapshotStore())
+    other.snapshot_store.mark_full_snapshot(float("inf"))
+
+    _save(parser, smartlab_db, _quotes(SBER="100"))
+    parser.snapshot_store.mark_full_snapshot(float("inf"))
+    assert _save(other, smartlab_db, _quotes(SBER="101")) == 1
+    # Цена вернулась к значению, которое этот процесс записывал сам
+    assert _save(parser, smartlab_db, _quotes(SBER="100")) == 1
+
+    assert [row[1] for row in _stored(smartlab_db)] == [Decimal("100"), Decimal("101"), Decimal("100")]
+    assert _latest(smartlab_db) == {"SBER": Decimal("100")}
+
+
+def _latest(engine):
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from src.database import SmartlabLatest
+
+    with Session(engine) as session:
+        return {row.ticker: row.last_price_rub for row in session.scalars(select(SmartlabLatest))}
+
+
+def test_save_maintains_latest_table(parser, smartlab_db):
+    """Тест: smartlab_latest держит одну актуальную строку на тикер"""
+    _save(parser, smartlab_db, _quotes(GAZP="100", SBER="300"))
+    _save(parser, smartlab_db, _quotes(GAZP="100", SBER="301"))
+    _save(parser, smartlab_db, _quotes(LKOH="7000"))
+
+    assert _latest(smartlab_db) == {"GAZP": Decimal("100"), "SBER": Decimal("301"), "LKOH": Decimal("7000")}
+
+
+def test_save_maintains_ohlc_rollups(parser, smartlab_db):
+    """Тест: каждое наблюдение обновляет часовые и дневные OHLC, даже без изменений"""
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from src.database import SmartlabOHLC
+
+    for price in ("100", "104", "104", "98", "101"):
+        _save(parser, smartlab_db, _quotes(GAZP=price))
+
+    with Session(smartlab_db) as session:
+        bars = session.scalars(select(SmartlabOHLC).order_by(SmartlabOHLC.resolution)).all()
+
+    daily = [bar for bar in bars if bar.resolution == "1d"]
+    assert sum(bar.samples for bar in daily) == 5
+    assert max(daily, key=lambda bar: bar.bucket).close == Decimal("101")
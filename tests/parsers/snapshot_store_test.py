@@ -0,0 +1,52 @@
+import pytest
+from src.parsers.sources.snapshot_store import (
+    MemorySnapshotStore, RedisSnapshotStore, get_snapshot_store,
+)
+
+
+class FakeRedis:
+    """Минимальная замена клиента redis для тестов"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = str(value)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemorySnapshotStore()
+    return RedisSnapshotStore("smartlab", client=FakeRedis())
+
+
+def test_store_full_snapshot_time(store):
+    """Тест времени последнего полного снимка"""
+    assert store.last_full_snapshot() is None
+    store.mark_full_snapshot(1700000000.5)
+    assert store.last_full_snapshot() == 1700000000.5
+
+
+def test_redis_store_keys():
+    """Тест ключей Redis с префиксом источника"""
+    client = FakeRedis()
+    store = RedisSnapshotStore("smartlab", client=client)
+    store.mark_full_snapshot(1.0)
+
+    assert client.values == {"smartlab:full_snapshot_at": "1.0"}
+
+
+def test_get_snapshot_store_memory_is_shared():
+    """Тест, что снимок в памяти общий для экземпляров парсера в процессе"""
+    assert get_snapshot_store("test-shared", "memory") is get_snapshot_store("test-shared", "memory")
+    assert get_snapshot_store("test-other", "memory") is not get_snapshot_store("test-shared", "memory")
+
+
+def test_get_snapshot_store_unknown():
+    """Тест неизвестного хранилища"""
+    with pytest.raises(ValueError):
+        get_snapshot_store("smartlab", "memcached")
@@ -18,6 +18,10 @@ def test_coverage_all_parsers() -> None:
         test_dir / "dohod_test.py",
         test_dir / "rbc_test.py",
         test_dir / "smartlab_test.py",
+        test_dir / "rate_limiter_test.py",
+        test_dir / "http_cache_test.py",
+        test_dir / "html_backend_test.py",
+        test_dir / "snapshot_store_test.py",
     ]
 
     cov = coverage.Coverage()
@@ -32,6 +36,12 @@ def test_coverage_all_parsers() -> None:
         parsers_dir / "dohod.py",
         parsers_dir / "rbc.py",
         parsers_dir / "smartlab.py",
+        parsers_dir / "rate_limiter.py",
+        parsers_dir / "http_cache.py",
+        parsers_dir / "html_backend.py",
+        parsers_dir / "records.py",
+        parsers_dir / "convert.py",
+        parsers_dir / "snapshot_store.py",
     ]
 
     sink = io.StringIO()
@@ -0,0 +1,194 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.database import Log, Source
+from src.tasks import db_utils
+from src.tasks.status_board import (
+    MemoryStatusBoard, RedisStatusBoard, entries_from_rows, get_status_board, latest_runs_query, status_entry,
+)
+
+
+class FakeRedis:
+    """Минимальная замена клиента redis для тестов"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        client = self
+
+        class Pipeline:
+            """До multi() после watch() команды выполняются сразу, как в redis-py"""
+
+            def __init__(self):
+                self.calls = []
+                self.immediate = False
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def watch(self, key):
+                self.immediate = True
+
+            def unwatch(self):
+                self.immediate = False
+
+            def multi(self):
+                self.immediate = False
+
+            def __getattr__(self, name):
+                if self.immediate:
+                    return getattr(client, name)
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+            def execute(self):
+                for name, args, kwargs in self.calls:
+                    getattr(client, name)(*args, **kwargs)
+                self.calls = []
+
+        return Pipeline()
+
+
+SOURCES = [
+    Source(id=1, name="RBC", url="https://www.rbc.ru/quote"),
+    Source(id=2, name="SmartLab", url="https://smart-lab.ru/q/shares/"),
+]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def board(request):
+    if request.param == "memory":
+        return MemoryStatusBoard()
+    return RedisStatusBoard(client=FakeRedis())
+
+
+def test_status_entry():
+    """Тест записи табло для источника с запуском и без"""
+    log = Log(status="SUCCESS", started_at=datetime(2025, 1, 1, 10), finished_at=datetime(2025, 1, 1, 10, 1),
+              duration_seconds=60)
+
+    assert status_entry(SOURCES[0], log) == {
+        "source_id": 1, "name": "RBC", "url": "https://www.rbc.ru/quote", "status": "SUCCESS",
+        "started_at": "2025-01-01T10:00:00", "finished_at": "2025-01-01T10:01:00",
+        "duration_seconds": 60, "error_message": None,
+    }
+    assert status_entry(SOURCES[1], None)["status"] == "NO_RUNS"
+
+
+def test_board_set_and_replace(board):
+    """Тест обновления записей и полной пересборки табло"""
+    assert board.get_all() is None
+
+    board.replace(entries_from_rows([(SOURCES[1], None), (SOURCES[0], None)]))
+    board.set(status_entry(SOURCES[1], Log(status="STARTED", started_at=datetime(2025, 1, 1))))
+
+    assert [(entry["source_id"], entry["status"]) for entry in board.get_all()] == [(1, "NO_RUNS"), (2, "STARTED")]
+
+    board.replace([status_entry(SOURCES[0], None)])
+    assert [entry["source_id"] for entry in board.get_all()] == [1]
+
+    board.replace([])
+    assert board.get_all() == []
+
+
+def test_board_without_replace_is_incomplete(board):
+    """Тест: записи без пересборки (табло потеряно) не считаются полным табло"""
+    board.set(status_entry(SOURCES[0], Log(status="STARTED", started_at=datetime(2025, 1, 1))))
+
+    assert board.get_all() is None
+
+
+def test_redis_board_lost_hash_is_incomplete():
+    """Тест: после потери хэша Redis табло снова неполное, даже если пришло событие"""
+    client = FakeRedis()
+    board = RedisStatusBoard(client=client)
+    board.replace(entries_from_rows([(SOURCES[0], None), (SOURCES[1], None)]))
+
+    client.delete(board.key)
+    board.set(status_entry(SOURCES[0], Log(status="STARTED", started_at=datetime(2025, 1, 1))))
+
+    assert board.get_all() is None
+
+
+def test_board_ignores_events_of_older_run(board):
+    """Тест: завершение старого запуска не перезаписывает STARTED нового"""
+    board.replace(entries_from_rows([(SOURCES[0], None)]))
+    board.set(status_entry(SOURCES[0], Log(status="STARTED", started_at=datetime(2025, 1, 1, 11))))
+
+    board.set(status_entry(SOURCES[0], Log(status="SUCCESS", started_at=datetime(2025, 1, 1, 10),
+                                           finished_at=datetime(2025, 1, 1, 11, 30))))
+    assert board.get_all()[0]["status"] == "STARTED"
+
+    board.set(status_entry(SOURCES[0], Log(status="SUCCESS", started_at=datetime(2025, 1, 1, 11),
+                                           finished_at=datetime(2025, 1, 1, 11, 5))))
+    assert board.get_all()[0]["status"] == "SUCCESS"
+
+
+def test_latest_runs_query_is_single_lateral_query():
+    """Тест, что статус всех источников берется одним запросом с LATERAL"""
+    sql = str(latest_runs_query().compile(dialect=postgresql.dialect()))
+
+    assert "LEFT OUTER JOIN LATERAL" in sql
+    assert "ORDER BY logs.started_at DESC, logs.id DESC" in sql
+
+
+def test_get_status_board():
+    """Тест выбора табло"""
+    assert get_status_board("memory") is get_status_board("memory")
+    with pytest.raises(ValueError):
+        get_status_board("file")
+
+
+def test_log_events_update_board():
+    """Тест: _log_started и _log_finished обновляют табло после фиксации"""
+    board = MemoryStatusBoard()
+    board.replace([status_entry(SOURCES[0], None)])
+    session = MagicMock()
+    session.query.return_value.filter.return_value.first.return_value = SOURCES[0]
+
+    with patch.object(db_utils, "get_sync_session", return_value=session), \
+            patch.object(db_utils, "get_status_board", return_value=board):
+        db_utils._log_started("RBC", "task-1")
+        started = board.get_all()[0]
+        assert started["status"] == "STARTED"
+
+        log = Log(source_id=1, status="STARTED", started_at=datetime.fromisoformat(started["started_at"]))
+        log.source = SOURCES[0]
+        session.query.return_value.filter.return_value.first.return_value = log
+        db_utils._log_finished(5, "FAIL", "boom")
+
+    entry = board.get_all()[0]
+    assert (entry["status"], entry["error_message"]) == ("FAIL", "boom")
+    assert entry["finished_at"] is not None
+
+
+def test_board_failure_does_not_fail_task():
+    """Тест: недоступное табло не роняет задачу"""
+    board = MagicMock()
+    board.set.side_effect = ConnectionError("redis down")
+    session = MagicMock()
+    session.query.return_value.filter.return_value.first.return_value = SOURCES[0]
+
+    with patch.object(db_utils, "get_sync_session", return_value=session), \
+            patch.object(db_utils, "get_status_board", return_value=board):
+        db_utils._log_started("RBC", "task-1")
+
+    session.commit.assert_called_once()